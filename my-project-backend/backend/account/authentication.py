@@ -0,0 +1,93 @@
+"""
+JWT authentication that loads the request's user from the cache.
+
+The user behind a token is cached without its password hash and dropped by
+``invalidate_user`` whenever the row is saved or deleted (see
+``account.signals``). That only reaches every worker when the cache is
+shared, e.g. Redis via ``REDIS_URL``; with a per-process backend such as
+the default LocMemCache the other workers would keep authenticating a
+blocked user until the entry expired, so the user is then read from the
+database on every request instead. ``AUTH_USER_CACHE`` forces either way.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+USER_CACHE_TIMEOUT = getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60 * 5)
+
+# Cached in place of a user so deleted accounts don't reach the database either.
+MISSING = "missing"
+
+
+# Backends that keep their entries inside one process.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def use_user_cache():
+    """Whether users are cached: only if invalidating reaches every worker."""
+    forced = getattr(settings, "AUTH_USER_CACHE", None)
+    if forced is not None:
+        return forced
+    return not isinstance(caches["default"], PROCESS_LOCAL_CACHES)
+
+
+def user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_user(user_id):
+    """Drop the cached user once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(user_key(user_id)))
+
+
+def cached_fields():
+    # The password hash stays out of the cache; it is loaded on first use.
+    return [field.attname for field in get_user_model()._meta.concrete_fields if field.name != "password"]
+
+
+def cached_user(user_id):
+    """The user for a token's user id, or None."""
+    key = user_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = (
+            get_user_model().objects.only(*cached_fields())
+            .filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        ) or MISSING
+        cache.set(key, user, timeout=USER_CACHE_TIMEOUT)
+    return None if user == MISSING else user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if not use_user_cache():
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,38 @@
+"""
+Logging in with either a username or an email address.
+
+The username is matched exactly, through its unique index. An address is
+matched case-insensitively through the ``UPPER(email)`` index added by
+this app's migrations, and as emails are not unique the oldest account
+with it is used. Either way the password is hashed exactly once per
+attempt.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models.functions import Upper
+
+
+def find_login_user(identifier):
+    """The user that ``identifier``, a username or an email address, names, or None."""
+    users = get_user_model().objects
+    if "@" in identifier:
+        users = users.alias(email_upper=Upper("email")).filter(email_upper=identifier.upper()).order_by("id")
+    else:
+        users = users.filter(username=identifier)
+    return users.first()
+
+
+class UsernameOrEmailBackend(ModelBackend):
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None or password is None:
+            return None
+        user = find_login_user(username)
+        if user is None:
+            # Hash anyway, so unknown accounts take as long as wrong passwords.
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
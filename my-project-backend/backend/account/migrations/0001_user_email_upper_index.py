@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+# auth.User belongs to Django, so its index on UPPER(email) for
+# case-insensitive logins is added here.
+EMAIL_INDEX = models.Index(Upper('email'), name='auth_user_email_upper_idx')
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), EMAIL_INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
@@ -1,13 +1,12 @@
 from django.contrib.auth.models import User
-from django.conf import settings
 from rest_framework import serializers
 from .models import *
-from django.contrib.auth import authenticate
 from django.db import transaction
-from django.core.mail import send_mail
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
+from tasks.email import send_mail_later
 from .token import email_verification_token
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -75,39 +74,25 @@ Please click the link below to activate your account:
 If you didn't register, ignore this email.
 """
 
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-        )
+        # Queued with the new user, and sent by the task worker once the
+        # registration has committed.
+        send_mail_later(subject, message, [user.email])
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
-    def validate(self, attrs):
-        username_or_email = attrs.get("username")
-        password = attrs.get("password")
-
-
-        if "@" in username_or_email:
-            try:
-                user_obj = User.objects.get(email=username_or_email)
-                username_or_email = user_obj.username
-            except User.DoesNotExist:
-                raise serializers.ValidationError("Invalid credentials")
+    """
+    Tokens for a username or email login. The password is checked once,
+    by ``account.backends.UsernameOrEmailBackend`` through the parent
+    serializer, which then issues the tokens for that user.
+    """
 
-        user = authenticate(username=username_or_email, password=password)
-
-        if user is None:
+    def validate(self, attrs):
+        try:
+            data = super().validate(attrs)
+        except AuthenticationFailed:
             raise serializers.ValidationError("Invalid credentials")
 
-
-        data = super().validate({
-            "username": user.username,
-            "password": password
-        })
-
+        user = self.user
         data["user"] = {
             "id": user.id,
             "username": user.username,
@@ -118,4 +103,4 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             "is_superuser": user.is_superuser,
         }
 
-        return data
\ No newline at end of file
+        return data
@@ -1,3 +1,207 @@
-from django.test import TestCase
+import sys
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+from account.serializers import CustomTokenObtainPairSerializer
+from cart.models import CartItem
+from products.cache import bump_catalog_version
+from products.tests.test_search import make_product
+from wishlist.models import WishlistItem
+
+
+class SessionBootstrapTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", email="buyer@example.com", password="x")
+        self.client.force_authenticate(self.user)
+        self.laptop = make_product(name="Laptop")
+        self.mouse = make_product(name="Mouse")
+
+    def test_one_round_trip_returns_the_session_state(self):
+        CartItem.objects.create(user=self.user, product=self.laptop, quantity=2)
+        CartItem.objects.create(user=self.user, product=self.mouse, quantity=1)
+        WishlistItem.objects.create(user=self.user, product=self.mouse)
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/session/bootstrap/")
+
+        self.assertEqual(response.data["user"]["email"], "buyer@example.com")
+        self.assertEqual(response.data["cart"], {str(self.laptop.id): 2, str(self.mouse.id): 1})
+        self.assertEqual(response.data["wishlist"], [self.mouse.id])
+        self.assertEqual(response.data["counts"], {"cart_lines": 2, "cart_items": 3, "wishlist": 1})
+
+    def test_cached_until_the_cart_or_wishlist_changes(self):
+        self.client.get("/api/session/bootstrap/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/session/bootstrap/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/cart/add/", {"product_id": self.laptop.id})
+        self.assertEqual(self.client.get("/api/session/bootstrap/").data["cart"], {str(self.laptop.id): 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/wishlist/toggle/", {"product_id": self.mouse.id})
+        self.assertEqual(self.client.get("/api/session/bootstrap/").data["wishlist"], [self.mouse.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/cart/batch/", {"operations": [{"product_id": self.laptop.id, "remove": True}]}, format="json"
+            )
+        self.assertEqual(self.client.get("/api/session/bootstrap/").data["cart"], {})
+
+    def test_catalog_version_is_current(self):
+        first = self.client.get("/api/session/bootstrap/").data["catalog_version"]
+        bump_catalog_version()
+
+        self.assertEqual(self.client.get("/api/session/bootstrap/").data["catalog_version"], first + 1)
+
+
+class LegacyTokenSerializer(TokenObtainPairSerializer):
+    """Login as it was: an unindexed email lookup and two password checks."""
+
+    def validate(self, attrs):
+        username = attrs["username"]
+        if "@" in username:
+            try:
+                username = User.objects.get(email=username).username
+            except User.DoesNotExist:
+                raise serializers.ValidationError("Invalid credentials")
+        user = authenticate(username=username, password=attrs["password"])
+        if user is None:
+            raise serializers.ValidationError("Invalid credentials")
+        return super().validate({"username": user.username, "password": attrs["password"]})
+
+
+class LoginTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            "buyer", email="Buyer@Example.com", password="s3cret-pass", first_name="Bea"
+        )
+
+    def login(self, username, password="s3cret-pass"):
+        return self.client.post("/api/account/login/", {"username": username, "password": password})
+
+    def hashes(self):
+        return mock.patch.object(
+            PBKDF2PasswordHasher, "encode", autospec=True, side_effect=PBKDF2PasswordHasher.encode
+        )
+
+    def test_username_or_any_case_of_the_email(self):
+        for username in ("buyer", "buyer@example.com", "BUYER@EXAMPLE.COM"):
+            response = self.login(username)
+            self.assertEqual(response.status_code, 200, username)
+            self.assertEqual(response.data["user"]["first_name"], "Bea")
+            self.assertIn("access", response.data)
+
+    def test_bad_credentials(self):
+        User.objects.create_user("sleeper", email="sleeper@example.com", password="s3cret-pass", is_active=False)
+
+        for username, password in (("buyer", "wrong"), ("nobody@example.com", "s3cret-pass"),
+                                   ("Buyer", "s3cret-pass"), ("sleeper@example.com", "s3cret-pass")):
+            response = self.login(username, password)
+            self.assertEqual(response.status_code, 400, username)
+            self.assertEqual(response.data["non_field_errors"], ["Invalid credentials"])
+
+    def test_the_password_is_hashed_once(self):
+        for username, password in (("buyer@example.com", "s3cret-pass"), ("buyer", "wrong"), ("nobody", "x")):
+            with self.hashes() as encode:
+                self.login(username, password)
+            self.assertEqual(encode.call_count, 1, username)
+
+    def test_email_lookup_uses_the_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.login("buyer@example.com")
+        lookup = next(query["sql"] for query in queries if "UPPER" in query["sql"])
+
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + lookup)
+            plan = " ".join(str(row) for row in cursor.fetchall())
+        self.assertIn("auth_user_email_upper_idx", plan)
+
+    def test_logins_per_second(self):
+        def rate(serializer_class, attempts=3):
+            started = time.perf_counter()
+            for _ in range(attempts):
+                # The stored case, which the old lookup needs.
+                serializer = serializer_class(data={"username": self.user.email, "password": "s3cret-pass"})
+                serializer.is_valid(raise_exception=True)
+            return attempts / (time.perf_counter() - started)
+
+        with self.hashes() as encode:
+            before = rate(LegacyTokenSerializer)
+        self.assertEqual(encode.call_count, 6)
+        after = rate(CustomTokenObtainPairSerializer)
+
+        sys.stderr.write(f"\nlogins per second on one core: {before:.2f} -> {after:.2f}\n")
+        self.assertGreater(after, before * 1.5)
+
+
+# The tests run in one process, so the local cache stands in for a shared one.
+@override_settings(AUTH_USER_CACHE=True)
+class CachedAuthenticationTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.admin = User.objects.create_user("admin", password="x", is_staff=True)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def test_the_user_query_is_cached(self):
+        self.authenticate(self.user)
+        with self.assertNumQueries(2):
+            self.client.get("/api/cart/")
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/cart/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("password", cache.get(f"auth:user:{self.user.pk}").__dict__)
+
+    def test_blocking_takes_effect_at_once(self):
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get("/api/cart/").status_code, 200)
+
+        self.authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/admin/users/{self.user.pk}/block/")
+
+        self.authenticate(self.user)
+        response = self.client.get("/api/cart/")
+        self.assertEqual((response.status_code, response.data["code"]), (401, "user_inactive"))
+
+    def test_edits_and_deletes_are_seen_at_once(self):
+        self.authenticate(self.admin)
+        self.client.get("/api/admin/users/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/admin/users/{self.user.pk}/edit/", {"username": "renamed"})
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get("/api/session/bootstrap/").data["user"]["username"], "renamed")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(self.client.get("/api/cart/").status_code, 401)
+
+    @override_settings(AUTH_USER_CACHE=None)
+    def test_users_are_not_cached_in_a_per_process_cache(self):
+        self.authenticate(self.user)
+        for _ in range(2):
+            with self.assertNumQueries(2):
+                self.assertEqual(self.client.get("/api/cart/").status_code, 200)
+
+        self.assertIsNone(cache.get(f"auth:user:{self.user.pk}"))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/api/cart/").data["code"], "user_inactive")
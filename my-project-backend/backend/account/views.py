@@ -3,13 +3,13 @@ from rest_framework.response import Response
 from rest_framework import status, generics, permissions
 from django.db.models import Q
 from rest_framework.permissions import IsAuthenticated,AllowAny
-from django.conf import settings
 from .models import *
 from .serializers import *
-from django.core.mail import send_mail
+from tasks.email import send_mail_later
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
+from .session import session_bootstrap
 
 
 
@@ -26,7 +26,7 @@ class RegisterView(generics.CreateAPIView):
         user = serializer.save() 
 
     
-        send_mail(
+        send_mail_later(
             subject="Welcome to Cortex Store 🎉",
             message=(
                 f"Hi {user.username},\n\n"
@@ -34,9 +34,7 @@ class RegisterView(generics.CreateAPIView):
                 "We’re excited to have you with us!\n\n"
                 "– Cortex Store Team"
             ),
-            from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
-            fail_silently=False,
         )
 
 class ActivateAccountView(APIView):
@@ -70,6 +68,8 @@ class ActivateAccountView(APIView):
         )
 
 
+class SessionBootstrapView(APIView):
+    permission_classes = [IsAuthenticated]
 
-
-
+    def get(self, request):
+        return Response(session_bootstrap(request.user), status=status.HTTP_200_OK)
@@ -0,0 +1,153 @@
+"""
+Store KPIs for the admin dashboard, read from the daily sales rollups
+(``orders.rollups``) so the cost follows the number of days shown rather
+than the number of orders, and the response stays a few KB. Windows are
+whole days. Cancelled orders count towards the status breakdown only.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import DecimalField, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from orders.listing import InvalidFilter, parse_moment
+from orders.models import DailyProductSales, DailyStatusSales, Order
+from orders.rollups import day_range
+
+
+BUCKETS = ("day", "week", "month")
+# The window shown when no created_after is given.
+DEFAULT_WINDOW = {"day": timedelta(days=30), "week": timedelta(weeks=26), "month": timedelta(days=365)}
+MAX_BUCKETS = 400
+DEFAULT_TOP = 10
+MAX_TOP = 50
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(0, output_field=MONEY)
+
+
+def bucket_start(day, bucket):
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, bucket):
+    if bucket == "day":
+        return day + timedelta(days=1)
+    if bucket == "week":
+        return day + timedelta(weeks=1)
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def bucket_count(first, last, bucket):
+    if bucket == "day":
+        return (last - first).days + 1
+    if bucket == "week":
+        return (bucket_start(last, bucket) - bucket_start(first, bucket)).days // 7 + 1
+    return (last.year - first.year) * 12 + last.month - first.month + 1
+
+
+def bucket_dates(first, last, bucket):
+    day = bucket_start(first, bucket)
+    while day <= last:
+        yield day
+        day = next_bucket(day, bucket)
+
+
+def parse_params(params):
+    """``(bucket, top, start, end)`` from the query string."""
+    bucket = params.get("bucket", "day")
+    if bucket not in BUCKETS:
+        raise InvalidFilter("bucket must be day, week or month")
+    try:
+        top = min(max(int(params.get("top", DEFAULT_TOP)), 1), MAX_TOP)
+    except ValueError:
+        raise InvalidFilter("top must be a number")
+
+    end = parse_moment(params["created_before"], end_of_day=True) if params.get("created_before") else timezone.now()
+    if params.get("created_after"):
+        start = parse_moment(params["created_after"])
+    else:
+        start = end - DEFAULT_WINDOW[bucket]
+    if start >= end:
+        raise InvalidFilter("created_after must be before created_before")
+    return bucket, top, start, end
+
+
+def revenue_series(days, bucket, first, last):
+    """
+    Revenue and order count per bucket from ``{day: (orders, revenue)}``,
+    with empty buckets filled in.
+    """
+    found = defaultdict(lambda: [0, 0])
+    for day, (orders, revenue) in days.items():
+        period = found[bucket_start(day, bucket)]
+        period[0] += orders
+        period[1] += revenue
+    return [
+        {"period": day.isoformat(), "revenue": found[day][1] if day in found else 0,
+         "orders": found[day][0] if day in found else 0}
+        for day in bucket_dates(first, last, bucket)
+    ]
+
+
+def store_analytics(params):
+    """
+    The dashboard KPIs for orders placed in the requested window. Raises
+    ``InvalidFilter`` for parameters that do not parse.
+    """
+    bucket, top, start, end = parse_params(params)
+    # The window includes its start and excludes its end.
+    first = timezone.localtime(start).date()
+    last = timezone.localtime(end - timedelta(microseconds=1)).date()
+    if bucket_count(first, last, bucket) > MAX_BUCKETS:
+        raise InvalidFilter(f"At most {MAX_BUCKETS} {bucket}s can be shown at once")
+    start, end = day_range(first, last)
+
+    # At most a row per day and status, so it is summed up here.
+    days = defaultdict(lambda: (0, Decimal(0)))
+    statuses = defaultdict(lambda: (0, Decimal(0)))
+    for day, status, orders, revenue in (
+        DailyStatusSales.objects.filter(day__range=(first, last), orders__gt=0)
+        .values_list("day", "status", "orders", "revenue")
+    ):
+        statuses[status] = (statuses[status][0] + orders, statuses[status][1] + revenue)
+        if status != Order.CANCELLED:
+            days[day] = (days[day][0] + orders, days[day][1] + revenue)
+    order_count = sum(orders for orders, revenue in days.values())
+    revenue = sum((revenue for orders, revenue in days.values()), Decimal(0))
+
+    lines = DailyProductSales.objects.filter(day__range=(first, last))
+    top_products = [
+        {"id": row["product_id"], "name": row["product__name"], "units": row["units"], "revenue": row["revenue"]}
+        for row in lines.values("product_id", "product__name")
+        .annotate(units=Sum("units"), revenue=Sum("revenue"))
+        .filter(units__gt=0)
+        .order_by("-units", "product_id")[:top]
+    ]
+    all_products = lines.aggregate(units=Coalesce(Sum("units"), 0), revenue=Coalesce(Sum("revenue"), ZERO))
+
+    return {
+        "window": {"created_after": start.isoformat(), "created_before": end.isoformat()},
+        "revenue": revenue,
+        "orders": order_count,
+        "average_order_value": round(revenue / order_count, 2) if order_count else 0,
+        "users": get_user_model().objects.count(),
+        "status_breakdown": [
+            {"status": status, "orders": orders, "revenue": total}
+            for status, (orders, total) in sorted(statuses.items(), key=lambda item: (-item[1][0], item[0]))
+        ],
+        "top_products": top_products,
+        "other_products": {
+            "units": all_products["units"] - sum(row["units"] for row in top_products),
+            "revenue": all_products["revenue"] - sum(row["revenue"] for row in top_products),
+        },
+        "revenue_over_time": {"bucket": bucket, "series": revenue_series(days, bucket, first, last)},
+    }
@@ -1,3 +1,101 @@
-from django.test import TestCase
+import json
+from io import StringIO
+from datetime import datetime, timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from orders.models import Order, OrderItem
+from products.tests.test_search import make_product
+
+
+class AdminAnalyticsTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user("admin", password="x", is_staff=True)
+        self.buyer = User.objects.create_user("buyer", password="x")
+        self.laptop = make_product(name="Laptop", price=1000)
+        self.mouse = make_product(name="Mouse", price=50)
+        self.client.force_authenticate(self.admin)
+
+    def make_order(self, day, lines, status="PAID", month=1):
+        order = Order.objects.create(
+            user=self.buyer, payment_method="COD", name="x", address="x", pincode="1", status=status,
+            total_amount=sum(product.price * quantity for product, quantity in lines),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, price=product.price)
+            for product, quantity in lines
+        ])
+        Order.objects.filter(pk=order.pk).update(created_at=datetime(2026, month, day, 12, tzinfo=timezone.utc))
+        return order
+
+    def analytics(self, **params):
+        # make_order() writes the rows directly, around the rollup hooks.
+        call_command("rebuild_sales_rollups", stdout=StringIO())
+        params.setdefault("created_after", "2026-01-01")
+        params.setdefault("created_before", "2026-01-31")
+        return self.client.get("/api/admin/analytics/", params)
+
+    def test_kpis(self):
+        self.make_order(5, [(self.laptop, 2), (self.mouse, 1)])
+        self.make_order(5, [(self.mouse, 4)])
+        self.make_order(20, [(self.laptop, 1)])
+        self.make_order(21, [(self.laptop, 3)], status="CANCELLED")
+
+        data = self.analytics(top=1).data
+
+        self.assertEqual((data["revenue"], data["orders"], data["users"]), (Decimal("3250"), 3, 2))
+        self.assertEqual(data["average_order_value"], Decimal("1083.33"))
+        self.assertEqual(
+            [(row["status"], row["orders"]) for row in data["status_breakdown"]], [("PAID", 3), ("CANCELLED", 1)]
+        )
+        self.assertEqual(
+            [(row["name"], row["units"], row["revenue"]) for row in data["top_products"]],
+            [("Mouse", 5, Decimal("250"))],
+        )
+        self.assertEqual(data["other_products"], {"units": 3, "revenue": Decimal("3000")})
+
+    def test_revenue_over_time(self):
+        self.make_order(5, [(self.laptop, 1)])
+        self.make_order(6, [(self.mouse, 2)])
+        self.make_order(20, [(self.laptop, 1)])
+
+        days = self.analytics()
+        series = days.data["revenue_over_time"]["series"]
+        self.assertEqual(len(series), 31)
+        self.assertEqual(series[4], {"period": "2026-01-05", "revenue": Decimal("1000"), "orders": 1})
+        self.assertEqual(series[6]["orders"], 0)
+
+        weeks = self.analytics(bucket="week").data["revenue_over_time"]["series"]
+        self.assertEqual(
+            [(row["period"], row["orders"]) for row in weeks if row["orders"]],
+            [("2026-01-05", 2), ("2026-01-19", 1)],
+        )
+
+        months = self.analytics(bucket="month", created_after="2025-12-01").data["revenue_over_time"]["series"]
+        self.assertEqual([(row["period"], row["revenue"]) for row in months], [
+            ("2025-12-01", 0), ("2026-01-01", Decimal("2100")),
+        ])
+
+    def test_queries_and_size_do_not_grow_with_the_data(self):
+        products = [make_product(name=f"Laptop {i}", price=100 + i) for i in range(40)]
+        for day in range(1, 29):
+            self.make_order(day, [(product, 1) for product in products[day % 10::7]])
+
+        call_command("rebuild_sales_rollups", stdout=StringIO())
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/admin/analytics/", {
+                "created_after": "2026-01-01", "created_before": "2026-01-31",
+            })
+
+        self.assertEqual(len(response.data["top_products"]), 10)
+        self.assertLess(len(json.dumps(response.json())), 8 * 1024)
+
+    def test_invalid_parameters(self):
+        for params in ({"bucket": "hour"}, {"top": "many"}, {"created_after": "2026-02-01"},
+                       {"created_after": "2000-01-01", "bucket": "day"}):
+            self.assertEqual(self.analytics(**params).status_code, 400, params)
@@ -2,5 +2,5 @@ from django.urls import path
 from .views import *
 
 urlpatterns = [
-    path("dashboard/", AdminDashboardView.as_view()),
+    path("analytics/", AdminAnalyticsView.as_view()),
 ]
\ No newline at end of file
@@ -1,65 +1,24 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from rest_framework_simplejwt.authentication import JWTAuthentication
-
-
-from django.contrib.auth import get_user_model
-from orders.models import Order, OrderItem
-from products.models import Product
-
-User = get_user_model()
-
-class AdminDashboardView(APIView):
-    authentication_classes = [JWTAuthentication]
+from rest_framework import status
+from account.authentication import CachedJWTAuthentication
+
+from orders.listing import InvalidFilter
+from .analytics import store_analytics
+
+class AdminAnalyticsView(APIView):
+    """
+    Dashboard KPIs for orders placed between ``created_after`` and
+    ``created_before`` (the last 30 days by default), with revenue over
+    time in ``bucket``s of a day, week or month and the ``top`` products.
+    """
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
+    use_replica = True
 
     def get(self, request):
-        
-        users = User.objects.all()
-        users_data = [
-            {
-                "id": u.id,
-                "email": u.email,
-            }
-            for u in users
-        ]
-
-       
-        products = Product.objects.all()
-        products_data = [
-            {
-                "id": p.id,
-                "name": p.name,
-                "price": p.price,
-            }
-            for p in products
-        ]
-
-        
-        orders = Order.objects.prefetch_related("items__product")
-        orders_data = []
-
-        for order in orders:
-            orders_data.append({
-                "id": order.id,
-                "user_email": order.user.email,
-                "products": [
-                    {
-                        "id": item.product.id,
-                        "name": item.product.name,
-                        "price": item.price,
-                        "quantity": item.quantity,
-                    }
-                    for item in order.items.all()
-                ]
-            })
-
-        return Response({
-            "users": users_data,
-            "products": products_data,
-            "orders": orders_data,
-        })
-
-
-
+        try:
+            return Response(store_analytics(request.query_params))
+        except InvalidFilter as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
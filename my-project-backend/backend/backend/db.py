@@ -0,0 +1,225 @@
+"""
+Read/write splitting between the primary database and a read replica.
+
+Views opt in with ``use_replica = True``; their GET and HEAD requests read
+from ``settings.REPLICA_DATABASE`` and everything else uses the primary.
+Once a request writes, its remaining reads go to the primary, and so do
+the writing user's requests for ``REPLICA_STICKY_SECONDS`` afterwards. The
+replica is skipped while it is unreachable or lagging, and a read that
+fails on it is retried on the primary.
+"""
+
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.functional import SimpleLazyObject
+
+
+logger = logging.getLogger(__name__)
+
+STICKY_SECONDS = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+MAX_LAG = getattr(settings, "REPLICA_MAX_LAG", 5)
+HEALTH_INTERVAL = getattr(settings, "REPLICA_HEALTH_INTERVAL", 5)
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def replica_alias():
+    """The configured replica alias, or None when there is no replica."""
+    alias = getattr(settings, "REPLICA_DATABASE", "replica")
+    return alias if alias in connections.settings else None
+
+
+def pin_key(user_id):
+    return f"db:pin:{user_id}"
+
+
+def replica_lag(alias):
+    """Seconds the replica is behind the primary."""
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        # An idle primary replays nothing, so only count the time since the
+        # last replayed transaction while WAL is still waiting to be applied.
+        cursor.execute(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+class ReplicaHealth:
+    """Per-process replica status, re-checked every ``HEALTH_INTERVAL`` seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._healthy = False
+
+    def available(self, alias):
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= HEALTH_INTERVAL:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= HEALTH_INTERVAL:
+                    self._healthy = self.check(alias)
+                    self._checked_at = now
+        return self._healthy
+
+    def check(self, alias):
+        try:
+            connections[alias].ensure_connection()
+            lag = replica_lag(alias)
+        except DatabaseError:
+            logger.warning("Read replica %r is unavailable", alias, exc_info=True)
+            connections[alias].close()
+            return False
+        if lag > MAX_LAG:
+            logger.warning("Read replica %r is %.1fs behind", alias, lag)
+            return False
+        return True
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._healthy = False
+            self._checked_at = time.monotonic()
+        connections[alias].close()
+
+    def reset(self):
+        with self._lock:
+            self._checked_at = None
+
+
+replica_health = ReplicaHealth()
+
+
+class RoutingState:
+
+    def __init__(self, request=None, replica=False):
+        self.request = request
+        self.replica = replica
+        self.wrote = False
+        self.used_replica = False
+        self.user_checked = False
+        self.view = None
+
+
+_state = contextvars.ContextVar("db_routing_state", default=None)
+_primary_only = contextvars.ContextVar("db_primary_only", default=False)
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Send every read inside the block to the primary."""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+@contextlib.contextmanager
+def replica_reads(request=None):
+    """Let reads inside the block use the replica, as an opted-in view does."""
+    token = _state.set(RoutingState(request, replica=True))
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+def recently_wrote(request):
+    # Until DRF has authenticated the request, ``user`` is still Django's
+    # lazy session user; checking it then would only cost a query.
+    user = getattr(request, "user", None)
+    if user is None or isinstance(user, SimpleLazyObject):
+        return None
+    return user.is_authenticated and bool(cache.get(pin_key(user.pk)))
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        alias = replica_alias()
+        if (
+            alias is None or state is None or not state.replica or state.wrote
+            or _primary_only.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return None
+
+        if not state.user_checked and state.request is not None:
+            pinned = recently_wrote(state.request)
+            if pinned is not None:
+                state.user_checked = True
+                if pinned:
+                    state.replica = False
+                    return None
+
+        if not replica_health.available(alias):
+            return None
+        state.used_replica = True
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == replica_alias():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        user = getattr(request, "user", None)
+        if state.wrote and user is not None and user.is_authenticated:
+            cache.set(pin_key(user.pk), True, timeout=STICKY_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        view_class = getattr(view_func, "view_class", None)
+        if state is not None and request.method in SAFE_METHODS and getattr(view_class, "use_replica", False):
+            state.replica = True
+            state.view = (view_func, view_args, view_kwargs)
+        return None
+
+    def process_exception(self, request, exception):
+        state = _state.get()
+        if (
+            state is None or not state.used_replica or state.view is None
+            or not isinstance(exception, DatabaseError)
+        ):
+            return None
+
+        alias = replica_alias()
+        logger.warning("Read from replica %r failed, retrying on the primary", alias, exc_info=exception)
+        replica_health.mark_down(alias)
+        state.replica = False
+        view_func, view_args, view_kwargs = state.view
+        return view_func(request, *view_args, **view_kwargs)
@@ -0,0 +1,192 @@
+"""
+Serving of user-uploaded media.
+
+Product images are linked through content-hashed names such as
+``products/a.3f2a9c1b0d4e.jpg`` (see ``products.imaging.hashed_name``).
+Such a URL always names the same bytes, so it is cached for a year; the
+plain name still works but has to be revalidated. Files are handed to the
+server through ``FileResponse``, which lets ``wsgi.file_wrapper`` use
+sendfile(), or to the front-end proxy with ``MEDIA_ACCEL_REDIRECT_PREFIX``.
+"""
+
+import functools
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from products.imaging import HASH_LENGTH, content_hash
+
+
+HASHED_NAME_RE = re.compile(
+    rf"^(?P<root>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<extension>\.[A-Za-z0-9]+)$"
+)
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Read size when a file is streamed without sendfile().
+BLOCK_SIZE = 64 * 1024
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+
+@functools.lru_cache(maxsize=4096)
+def cached_content_hash(path, size, mtime_ns):
+    # Keyed on size and mtime so a rewritten file is hashed again.
+    return content_hash(path)
+
+
+class RangeFile:
+    """
+    A file limited to ``length`` bytes from its current position.
+
+    ``fileno()`` and the position stay those of the real file, so servers
+    that sendfile() from ``wsgi.file_wrapper`` still can, bounded by the
+    Content-Length header.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Return the inclusive ``(start, end)`` of a single byte range, None when
+    the header should be ignored, or False when it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if not length or not size:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def resolve(path):
+    """Map a request path to ``(full path, expected hash or None)``."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid path")
+
+    match = HASHED_NAME_RE.match(path)
+    if match and not os.path.exists(full_path):
+        return safe_join(settings.MEDIA_ROOT, match["root"] + match["extension"]), match["hash"]
+    return full_path, None
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]
+
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return since is not None and int(mtime) <= since
+
+
+@require_safe
+def serve_media(request, path):
+    full_path, expected_hash = resolve(path)
+    try:
+        stat_result = os.stat(full_path)
+    except OSError:
+        raise Http404("File not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404("File not found")
+
+    size = stat_result.st_size
+    if expected_hash is not None and (
+        cached_content_hash(full_path, size, stat_result.st_mtime_ns) != expected_hash
+    ):
+        # The file has changed since the URL was issued.
+        raise Http404("File not found")
+
+    etag = f'"{size:x}-{stat_result.st_mtime_ns:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat_result.st_mtime),
+        "Cache-Control": IMMUTABLE if expected_hash else REVALIDATE,
+        "Accept-Ranges": "bytes",
+    }
+
+    if not_modified(request, etag, stat_result.st_mtime):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (if_range is None or if_range.strip() in (etag, headers["Last-Modified"])):
+        byte_range = parse_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+
+    accel_prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", None)
+    if accel_prefix:
+        # The proxy serves the bytes and handles Range itself.
+        response = HttpResponse(content_type=content_type)
+        relative = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, "/")
+        response["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + relative
+    elif byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        file = open(full_path, "rb")
+        file.seek(start)
+        response = FileResponse(RangeFile(file, end - start + 1), content_type=content_type, status=206)
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if isinstance(response, FileResponse):
+        response.block_size = BLOCK_SIZE
+    if encoding:
+        response["Content-Encoding"] = encoding
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -18,14 +18,17 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
 from django.urls import re_path
 
+from account.views import SessionBootstrapView
+from .media import serve_media
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
 
     path("api/account/", include("account.urls")),
+    path("api/session/bootstrap/", SessionBootstrapView.as_view()),
     path("api/products/", include("products.urls")),
     path("api/cart/", include("cart.urls")),
     path("api/wishlist/", include("wishlist.urls")),
@@ -37,7 +40,5 @@ urlpatterns = [
 ] 
 
 urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {
-        'document_root': settings.MEDIA_ROOT,
-    }),
+    re_path(r'^media/(?P<path>.*)$', serve_media),
 ]
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Applying a batch of cart operations in one transaction.
+
+Operations on the same product are folded into one change first. Relative
+changes are then written with a single ``INSERT ... ON CONFLICT DO UPDATE
+SET quantity = quantity + excluded.quantity``, so concurrent batches from
+the same user add up instead of overwriting each other.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from account.session import invalidate_session
+from products.models import Product
+from .models import CartItem
+
+
+class CartBatchError(Exception):
+
+    def __init__(self, message, product_ids=()):
+        self.product_ids = sorted(product_ids)
+        super().__init__(message)
+
+
+class UnknownProducts(CartBatchError):
+    pass
+
+
+def fold_operations(operations):
+    """
+    Reduce validated operations to one change per product: ``("delta", n)``
+    or ``("set", n)``, where setting 0 removes the line.
+    """
+    changes = {}
+    for operation in operations:
+        product_id = operation["product_id"]
+        kind, amount = changes.get(product_id, ("delta", 0))
+        if operation.get("remove"):
+            changes[product_id] = ("set", 0)
+        elif "set_quantity" in operation:
+            changes[product_id] = ("set", operation["set_quantity"])
+        else:
+            changes[product_id] = (kind, amount + operation["delta"])
+    return changes
+
+
+def upsert(user_id, quantities, additive):
+    table = CartItem._meta.db_table
+    qn = connection.ops.quote_name
+    user_column = qn(CartItem._meta.get_field("user").column)
+    product_column = qn(CartItem._meta.get_field("product").column)
+    quantity_column = qn("quantity")
+
+    new_quantity = f"EXCLUDED.{quantity_column}"
+    if additive:
+        new_quantity = f"{qn(table)}.{quantity_column} + {new_quantity}"
+
+    values = ", ".join(["(%s, %s, %s)"] * len(quantities))
+    params = [value for product_id, quantity in quantities.items() for value in (user_id, product_id, quantity)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(table)} ({user_column}, {product_column}, {quantity_column}) "
+            f"VALUES {values} "
+            f"ON CONFLICT ({user_column}, {product_column}) "
+            f"DO UPDATE SET {quantity_column} = {new_quantity}",
+            params,
+        )
+
+
+def apply_operations(user, operations, cart_queryset):
+    """
+    Apply the operations to ``user``'s cart and return the resulting cart
+    lines from ``cart_queryset``. Raises ``CartBatchError``, changing
+    nothing, for unknown products or lines beyond the stock.
+    """
+    changes = fold_operations(operations)
+    known = set(Product.objects.filter(id__in=list(changes)).values_list("id", flat=True))
+    unknown = set(changes) - known
+    if unknown:
+        raise UnknownProducts("Product not found", unknown)
+
+    deltas = {pk: amount for pk, (kind, amount) in changes.items() if kind == "delta" and amount}
+    sets = {pk: amount for pk, (kind, amount) in changes.items() if kind == "set" and amount > 0}
+    removed = [pk for pk, (kind, amount) in changes.items() if kind == "set" and amount <= 0]
+
+    with transaction.atomic():
+        if deltas:
+            upsert(user.pk, deltas, additive=True)
+        if sets:
+            upsert(user.pk, sets, additive=False)
+        # Lines removed outright or taken to zero or below.
+        CartItem.objects.filter(user=user).filter(
+            Q(product_id__in=removed) | Q(product_id__in=list(deltas), quantity__lte=0)
+        ).delete()
+
+        items = list(cart_queryset)
+        over_stock = {
+            item.product_id for item in items
+            if item.product_id in changes and item.quantity > item.product.quantity
+        }
+        if over_stock:
+            raise CartBatchError("Not enough stock", over_stock)
+        invalidate_session(user.pk)
+
+    return items
@@ -1,11 +1,58 @@
 from rest_framework import serializers
 from .models import CartItem
-from products.serializers import ProductSerializer
+from products.serializers import LINE_ITEM_FIELDS, ProductSerializer
+
+
+IN_STOCK = "in_stock"
+INSUFFICIENT_STOCK = "insufficient_stock"
+OUT_OF_STOCK = "out_of_stock"
+
+
+def stock_status(quantity, available):
+    if available <= 0:
+        return OUT_OF_STOCK
+    if quantity > available:
+        return INSUFFICIENT_STOCK
+    return IN_STOCK
 
 
 class CartItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer()
+    """Expects lines from ``cart_lines()``, which annotates ``line_total``."""
+    product = ProductSerializer(fields=LINE_ITEM_FIELDS)
+    line_total = serializers.IntegerField(read_only=True)
+    stock_status = serializers.SerializerMethodField()
 
     class Meta:
         model = CartItem
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+    def get_stock_status(self, obj):
+        return stock_status(obj.quantity, obj.product.quantity)
+
+
+def cart_summary(items):
+    """The cart response for already fetched lines, without further queries."""
+    items = list(items)
+    return {
+        "items": CartItemSerializer(items, many=True).data,
+        "item_count": sum(item.quantity for item in items),
+        "subtotal": sum(item.line_total for item in items),
+        "in_stock": all(item.quantity <= item.product.quantity for item in items),
+    }
+
+
+class CartOperationSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    delta = serializers.IntegerField(required=False)
+    set_quantity = serializers.IntegerField(required=False, min_value=0)
+    remove = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        given = [name for name in ("delta", "set_quantity", "remove") if name in attrs]
+        if len(given) != 1 or attrs.get("remove") is False:
+            raise serializers.ValidationError("Give exactly one of delta, set_quantity or remove: true")
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
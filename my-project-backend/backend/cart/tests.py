@@ -1,3 +1,145 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from cart.models import CartItem
+from products.serializers import LINE_ITEM_FIELDS
+from products.tests.test_search import make_product
+
+
+class CartViewTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.client.force_authenticate(self.user)
+
+    def test_cart_lines_use_the_compact_product_representation(self):
+        for i in range(3):
+            CartItem.objects.create(user=self.user, product=make_product(name=f"Laptop {i}"))
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/cart/")
+
+        self.assertEqual(len(response.data["items"]), 3)
+        self.assertEqual(set(response.data["items"][0]["product"]), set(LINE_ITEM_FIELDS))
+
+    def test_query_count_does_not_grow_with_the_cart(self):
+        for count in (1, 25):
+            CartItem.objects.filter(user=self.user).delete()
+            CartItem.objects.bulk_create([
+                CartItem(user=self.user, product=make_product(name=f"Laptop {i}"), quantity=1)
+                for i in range(count)
+            ])
+
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/cart/")
+            self.assertEqual(response.data["item_count"], count)
+
+    def test_totals_and_stock_status_are_computed_on_the_server(self):
+        laptop = make_product(name="Laptop", price=1000, quantity=5)
+        mouse = make_product(name="Mouse", price=250, quantity=1)
+        bag = make_product(name="Bag", price=100, quantity=0)
+        CartItem.objects.create(user=self.user, product=laptop, quantity=2)
+        CartItem.objects.create(user=self.user, product=mouse, quantity=3)
+        CartItem.objects.create(user=self.user, product=bag, quantity=1)
+
+        response = self.client.get("/api/cart/")
+
+        self.assertEqual(
+            [(line["line_total"], line["stock_status"]) for line in response.data["items"]],
+            [(2000, "in_stock"), (750, "insufficient_stock"), (100, "out_of_stock")],
+        )
+        self.assertEqual(response.data["subtotal"], 2850)
+        self.assertEqual(response.data["item_count"], 6)
+        self.assertFalse(response.data["in_stock"])
+
+    def test_adding_is_capped_at_the_stock(self):
+        product = make_product(quantity=3)
+
+        first = self.client.post("/api/cart/add/", {"product_id": product.id, "quantity": 2})
+        second = self.client.post("/api/cart/add/", {"product_id": product.id, "quantity": 2})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(second.data["available"], 3)
+        self.assertEqual(CartItem.objects.get(user=self.user).quantity, 2)
+
+    def test_write_failures_keep_their_error_response(self):
+        product = make_product(quantity=3)
+
+        with mock.patch.object(CartItem.objects, "get_or_create", side_effect=RuntimeError):
+            response = self.client.post("/api/cart/add/", {"product_id": product.id})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.data, {"error": "Failed to add item to cart"})
+
+
+class CartBatchTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.client.force_authenticate(self.user)
+        self.laptop = make_product(name="Laptop", quantity=5)
+        self.mouse = make_product(name="Mouse", quantity=5)
+        self.bag = make_product(name="Bag", quantity=5)
+
+    def batch(self, *operations):
+        return self.client.post("/api/cart/batch/", {"operations": list(operations)}, format="json")
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(user=self.user).values_list("product_id", "quantity"))
+
+    def test_operations_are_applied_and_the_cart_returned(self):
+        CartItem.objects.create(user=self.user, product=self.mouse, quantity=2)
+        CartItem.objects.create(user=self.user, product=self.bag, quantity=1)
+
+        response = self.batch(
+            {"product_id": self.laptop.id, "delta": 1},
+            {"product_id": self.laptop.id, "delta": 1},
+            {"product_id": self.mouse.id, "set_quantity": 4},
+            {"product_id": self.bag.id, "remove": True},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {self.laptop.id: 2, self.mouse.id: 4})
+        self.assertEqual(
+            [(line["product"]["id"], line["quantity"]) for line in response.data["items"]],
+            [(self.mouse.id, 4), (self.laptop.id, 2)],
+        )
+
+    def test_deltas_add_to_the_stored_quantity(self):
+        CartItem.objects.create(user=self.user, product=self.laptop, quantity=3)
+
+        self.batch({"product_id": self.laptop.id, "delta": -1}, {"product_id": self.mouse.id, "delta": 2})
+        self.assertEqual(self.quantities(), {self.laptop.id: 2, self.mouse.id: 2})
+
+        self.batch({"product_id": self.laptop.id, "delta": -5})
+        self.assertEqual(self.quantities(), {self.mouse.id: 2})
+
+    def test_a_failing_batch_changes_nothing(self):
+        CartItem.objects.create(user=self.user, product=self.laptop, quantity=1)
+
+        over_stock = self.batch(
+            {"product_id": self.laptop.id, "delta": 1}, {"product_id": self.mouse.id, "set_quantity": 6}
+        )
+        unknown = self.batch({"product_id": self.laptop.id, "delta": 1}, {"product_id": 999999, "delta": 1})
+
+        self.assertEqual((over_stock.status_code, over_stock.data["product_ids"]), (400, [self.mouse.id]))
+        self.assertEqual((unknown.status_code, unknown.data["product_ids"]), (404, [999999]))
+        self.assertEqual(self.quantities(), {self.laptop.id: 1})
+
+    def test_each_operation_needs_exactly_one_change(self):
+        response = self.batch({"product_id": self.laptop.id, "delta": 1, "remove": True})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.batch().status_code, 400)
+
+    def test_the_batch_is_a_fixed_number_of_queries(self):
+        operations = [{"product_id": product.id, "delta": 1} for product in (self.laptop, self.mouse, self.bag)]
+
+        # Product ids, upsert, delete and the cart read, inside a savepoint.
+        with self.assertNumQueries(6):
+            self.batch(*operations)
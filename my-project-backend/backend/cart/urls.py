@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import CartView, CartAddView, CartRemoveView
+from .views import CartView, CartAddView, CartRemoveView, CartBatchView
 
 urlpatterns = [
     path("", CartView.as_view()),
     path("add/", CartAddView.as_view()),
     path("remove/", CartRemoveView.as_view()),
+    path("batch/", CartBatchView.as_view()),
 ]
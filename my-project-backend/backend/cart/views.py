@@ -1,31 +1,43 @@
+from django.db.models import F
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from account.session import invalidate_session
+from idempotency.keys import idempotent
+from .batch import CartBatchError, UnknownProducts, apply_operations
 from .models import CartItem
-from .serializers import CartItemSerializer
-from products.models import Product
+from .serializers import CartBatchSerializer, cart_summary
+from products.lookup import product_lookup
+from products.serializers import LINE_ITEM_FIELDS, product_columns
+
+
+def cart_lines(user):
+    return (
+        CartItem.objects.filter(user=user)
+        .select_related("product")
+        .only(
+            "id", "quantity", "user",
+            *[f"product__{column}" for column in product_columns(LINE_ITEM_FIELDS)],
+        )
+        .annotate(line_total=F("quantity") * F("product__price"))
+        .order_by("id")
+    )
 
 
 class CartView(APIView):
     permission_classes = [IsAuthenticated]
+    use_replica = True
 
     def get(self, request):
-        try:
-            items = CartItem.objects.filter(user=request.user)
-            serializer = CartItemSerializer(items, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Exception:
-            return Response(
-                {"error": "Failed to fetch cart items"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response(cart_summary(cart_lines(request.user)), status=status.HTTP_200_OK)
 
 
 class CartAddView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         product_id = request.data.get("product_id")
         quantity = request.data.get("quantity", 1)
@@ -48,15 +60,24 @@ class CartAddView(APIView):
             )
 
         
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        product = product_lookup.get(product_id)
+        if product is None:
             return Response(
                 {"error": "Product not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        
+        in_cart = (
+            CartItem.objects.filter(user=request.user, product=product)
+            .values_list("quantity", flat=True)
+            .first()
+        ) or 0
+        if in_cart + quantity > product.quantity:
+            return Response(
+                {"error": f"Only {product.quantity} left in stock", "available": product.quantity},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
             cart_item, created = CartItem.objects.get_or_create(
                 user=request.user,
@@ -69,6 +90,7 @@ class CartAddView(APIView):
                 cart_item.quantity += quantity
 
             cart_item.save()
+            invalidate_session(request.user.pk)
 
             return Response(
                 {
@@ -89,6 +111,7 @@ class CartAddView(APIView):
 class CartRemoveView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         product_id = request.data.get("product_id")
 
@@ -99,9 +122,8 @@ class CartRemoveView(APIView):
             )
 
         
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        product = product_lookup.get(product_id)
+        if product is None:
             return Response(
                 {"error": "Product not found"},
                 status=status.HTTP_404_NOT_FOUND
@@ -119,6 +141,7 @@ class CartRemoveView(APIView):
                     {"error": "Item not found in cart"},
                     status=status.HTTP_404_NOT_FOUND
                 )
+            invalidate_session(request.user.pk)
 
             return Response(
                 {"message": "Removed from cart successfully"},
@@ -130,3 +153,25 @@ class CartRemoveView(APIView):
                 {"error": "Failed to remove item from cart"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class CartBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @idempotent
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            items = apply_operations(
+                request.user, serializer.validated_data["operations"], cart_lines(request.user)
+            )
+        except CartBatchError as exc:
+            return Response(
+                {"error": str(exc), "product_ids": exc.product_ids},
+                status=status.HTTP_404_NOT_FOUND if isinstance(exc, UnknownProducts) else status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(cart_summary(items), status=status.HTTP_200_OK)
@@ -0,0 +1,142 @@
+"""
+``Idempotency-Key`` support for write endpoints.
+
+The first request with a key claims it by inserting a row, runs, and stores
+its rendered response. Repeats of that request get the stored response back
+byte for byte, and repeats that arrive while it is still running wait for
+it. Keys are per user and expire after ``IDEMPOTENCY_KEY_TTL`` seconds.
+"""
+
+import functools
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+TTL = getattr(settings, "IDEMPOTENCY_KEY_TTL", 60 * 60 * 24)
+WAIT = getattr(settings, "IDEMPOTENCY_WAIT", 10.0)
+# A key still running after this long belongs to a request that died.
+LOCK_TIMEOUT = getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT", 60)
+POLL_INTERVAL = 0.05
+
+
+def fingerprint(request):
+    digest = hashlib.sha256(f"{request.method} {request.get_full_path()}\n".encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def claim(user, key, request_fingerprint):
+    """``(record, claimed)``; record is None if it vanished meanwhile."""
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, fingerprint=request_fingerprint), True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=user, key=key).first(), False
+
+
+def acquire(user, key, request_fingerprint):
+    """
+    Claim the key, or return the finished record for it. Waits up to
+    ``WAIT`` seconds for a request holding the same key to finish, and
+    returns the unfinished record if it has not.
+    """
+    deadline = time.monotonic() + WAIT
+    while True:
+        record, claimed = claim(user, key, request_fingerprint)
+        if claimed:
+            return record, True
+        if record is None:
+            continue
+
+        age = (timezone.now() - record.created_at).total_seconds()
+        running = record.status_code is None
+        if age > TTL or (running and age > LOCK_TIMEOUT):
+            IdempotencyKey.objects.filter(pk=record.pk, status_code=record.status_code).delete()
+            continue
+        if not running or record.fingerprint != request_fingerprint or time.monotonic() >= deadline:
+            return record, False
+        time.sleep(POLL_INTERVAL)
+
+
+def replay(record):
+    response = HttpResponse(bytes(record.body), status=record.status_code, content_type=record.content_type)
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent(method):
+    """
+    Honour ``Idempotency-Key`` on an ``APIView`` handler for authenticated
+    users. Only successful (2xx) responses are kept. After a validation
+    error, a conflict, a server error or an exception the key is released,
+    so the request can run again with the same key once it is fixed.
+    """
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or not request.user.is_authenticated:
+            return method(view, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        request_fingerprint = fingerprint(request)
+        record, claimed = acquire(request.user, key, request_fingerprint)
+        if not claimed:
+            if record.fingerprint != request_fingerprint:
+                return Response(
+                    {"error": f"{HEADER} was already used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                return Response(
+                    {"error": f"A request with this {HEADER} is still in progress"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return replay(record)
+
+        try:
+            response = view.finalize_response(request, method(view, request, *args, **kwargs), *args, **kwargs)
+            response.render()
+        except BaseException:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            raise
+
+        if not status.is_success(response.status_code) or response.streaming:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+        else:
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=response.status_code,
+                content_type=response.get("Content-Type", ""),
+                body=response.content,
+            )
+        return response
+
+    return wrapper
+
+
+def sweep_expired(batch_size=1000):
+    """Delete keys older than ``TTL``, ``batch_size`` rows per statement."""
+    cutoff = timezone.now() - timedelta(seconds=TTL)
+    deleted = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(created_at__lt=cutoff).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from idempotency.keys import sweep_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records. Run it periodically, e.g. hourly from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired keys"))
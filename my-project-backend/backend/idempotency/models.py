@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client's ``Idempotency-Key`` and the response it got. ``status_code``
+    is null while the first request with the key is still running.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    body = models.BinaryField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="idempotency_user_key_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
@@ -0,0 +1,152 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+from cart.models import CartItem
+from idempotency.models import IdempotencyKey
+from orders import checkout
+from orders.models import Order
+from products.tests.test_search import make_product
+
+
+ORDER = {
+    "payment_method": "COD", "name": "Buyer", "address": "Somewhere", "pincode": "123456",
+}
+
+
+class IdempotencyTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.client.force_authenticate(self.user)
+        self.laptop = make_product(quantity=5)
+
+    def order(self, key, quantity=1):
+        return self.client.post(
+            "/api/orders/create/",
+            {**ORDER, "items": [{"product": self.laptop.id, "quantity": quantity}]},
+            format="json", HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_a_retried_order_is_placed_once(self):
+        first = self.order("checkout-1")
+        second = self.order("checkout-1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((second.status_code, second.content), (201, first.content))
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+        self.order("checkout-2")
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_a_key_is_bound_to_its_request(self):
+        self.order("checkout-1")
+
+        response = self.order("checkout-1", quantity=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.order("checkout-1")
+        self.client.force_authenticate(User.objects.create_user("other", password="x"))
+
+        self.assertNotIn("Idempotent-Replayed", self.order("checkout-1"))
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_a_failed_request_can_be_retried(self):
+        with mock.patch("orders.serializers.place_order", side_effect=RuntimeError("database went away")):
+            with self.assertRaises(RuntimeError):
+                self.order("checkout-1")
+
+        self.assertEqual(self.order("checkout-1").status_code, 201)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_a_rejected_request_can_be_corrected_under_the_same_key(self):
+        invalid = self.client.post(
+            "/api/orders/create/",
+            {**ORDER, "pincode": "", "items": [{"product": self.laptop.id, "quantity": 1}]},
+            format="json", HTTP_IDEMPOTENCY_KEY="checkout-1",
+        )
+        out_of_stock = self.order("checkout-1", quantity=9)
+        corrected = self.order("checkout-1")
+
+        self.assertEqual((invalid.status_code, out_of_stock.status_code), (400, 409))
+        self.assertEqual(corrected.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", corrected)
+        self.assertEqual(self.order("checkout-1")["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_cart_writes_are_not_repeated(self):
+        for _ in range(3):
+            self.client.post(
+                "/api/cart/add/", {"product_id": self.laptop.id, "quantity": 2}, HTTP_IDEMPOTENCY_KEY="add-1"
+            )
+
+        self.assertEqual(CartItem.objects.get(user=self.user).quantity, 2)
+
+    def test_expired_keys_are_swept(self):
+        self.order("checkout-1")
+        self.order("checkout-2")
+        IdempotencyKey.objects.filter(key="checkout-1").update(created_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command("sweep_idempotency_keys", stdout=out)
+
+        self.assertIn("Deleted 1 expired keys", out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["checkout-2"])
+
+
+class ConcurrentIdempotencyTest(TransactionTestCase):
+
+    def test_a_concurrent_duplicate_waits_for_the_first_response(self):
+        user = User.objects.create_user("buyer", password="x")
+        laptop = make_product(quantity=5)
+        started, release = threading.Event(), threading.Event()
+        place_order = checkout.place_order
+
+        def slow_place_order(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return place_order(*args, **kwargs)
+
+        responses = {}
+
+        def post(name):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                responses[name] = client.post(
+                    "/api/orders/create/",
+                    {**ORDER, "items": [{"product": laptop.id, "quantity": 1}]},
+                    format="json", HTTP_IDEMPOTENCY_KEY="checkout-1",
+                )
+            finally:
+                connection.close()
+
+        with mock.patch("orders.serializers.place_order", side_effect=slow_place_order):
+            first = threading.Thread(target=post, args=("first",))
+            first.start()
+            self.assertTrue(started.wait(5))
+            second = threading.Thread(target=post, args=("second",))
+            second.start()
+            # The second request is polling for the first one's result.
+            second.join(0.3)
+            self.assertTrue(second.is_alive())
+            release.set()
+            first.join()
+            second.join()
+
+        self.assertEqual(responses["first"].status_code, 201)
+        self.assertEqual(responses["second"].content, responses["first"].content)
+        self.assertEqual(Order.objects.count(), 1)
@@ -0,0 +1,63 @@
+"""
+Placing an order as one transaction with a fixed number of statements:
+price the products with one query, insert the order and all of its items,
+take the stock, queue it for the daily rollups and clear the ordered lines
+from the cart.
+"""
+
+from django.db import transaction
+
+from account.session import invalidate_session
+from cart.models import CartItem
+from products.inventory import line_totals, take_stock
+from products.models import Product
+from .models import Order, OrderItem
+from .rollups import schedule_placed
+
+
+class UnknownProducts(Exception):
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__("Product not found")
+
+
+class EmptyOrder(Exception):
+
+    def __init__(self):
+        super().__init__("Order has no items")
+
+
+def place_order(user, lines, clear_cart=True, **details):
+    """
+    Create an order for ``(product_id, quantity)`` lines at the current
+    prices. Raises ``EmptyOrder``, ``UnknownProducts`` or ``OutOfStock``,
+    creating nothing.
+    """
+    totals = line_totals(lines)
+    if not totals:
+        raise EmptyOrder()
+    with transaction.atomic():
+        products = Product.objects.only("id", "price").in_bulk(list(totals))
+        unknown = set(totals) - set(products)
+        if unknown:
+            raise UnknownProducts(unknown)
+
+        order = Order.objects.create(
+            user=user,
+            total_amount=sum(products[product_id].price * quantity for product_id, quantity in totals.items()),
+            **details,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, quantity=quantity, price=products[product_id].price)
+            for product_id, quantity in totals.items()
+        ])
+        take_stock(totals.items(), order=order)
+        schedule_placed(order, [
+            (product_id, quantity, products[product_id].price) for product_id, quantity in totals.items()
+        ])
+
+        if clear_cart:
+            CartItem.objects.filter(user=user, product_id__in=list(totals)).delete()
+            invalidate_session(user.pk)
+    return order
@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from orders.rollups import order_days, rebuild, rollup_discrepancies
+
+
+class Command(BaseCommand):
+    help = "Compare the daily sales rollups with the orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="first", type=date.fromisoformat, help="First day, YYYY-MM-DD.")
+        parser.add_argument("--to", dest="last", type=date.fromisoformat, help="Last day, YYYY-MM-DD.")
+        parser.add_argument("--chunk-days", type=int, default=31)
+        parser.add_argument(
+            "--fix", action="store_true", help="Rebuild the days whose rollups differ."
+        )
+
+    def handle(self, *args, **options):
+        bounds = order_days()
+        if bounds is None and not (options["first"] and options["last"]):
+            self.stdout.write(self.style.SUCCESS("No orders to check"))
+            return
+        first = options["first"] or bounds[0]
+        last = options["last"] or bounds[1]
+
+        days = set()
+        for day, table, key, stored, expected in rollup_discrepancies(first, last, options["chunk_days"]):
+            self.stdout.write(f"{day} {table} {key}: rollup {stored}, orders {expected}")
+            days.add(day)
+
+        if days and options["fix"]:
+            for day in sorted(days):
+                list(rebuild(day, day))
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(days)} days"))
+        elif days:
+            self.stdout.write(self.style.WARNING(f"{len(days)} days differ from the orders"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Rollups match the orders"))
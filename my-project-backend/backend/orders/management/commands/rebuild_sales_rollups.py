@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from orders.rollups import order_days, rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales rollups from the orders, a chunk of days at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="first", type=date.fromisoformat, help="First day, YYYY-MM-DD.")
+        parser.add_argument("--to", dest="last", type=date.fromisoformat, help="Last day, YYYY-MM-DD.")
+        parser.add_argument("--chunk-days", type=int, default=31)
+
+    def handle(self, *args, **options):
+        bounds = order_days()
+        if bounds is None and not (options["first"] and options["last"]):
+            self.stdout.write(self.style.SUCCESS("No orders to roll up"))
+            return
+        first = options["first"] or bounds[0]
+        last = options["last"] or bounds[1]
+
+        for chunk_first, chunk_last in rebuild(first, last, chunk_days=options["chunk_days"]):
+            self.stdout.write(f"Rebuilt {chunk_first} to {chunk_last}")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the rollups from {first} to {last}"))
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    # Count the orders placed before the rollups were kept.
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DailyStatusSales = apps.get_model('orders', 'DailyStatusSales')
+    DailyProductSales = apps.get_model('orders', 'DailyProductSales')
+
+    statuses = (
+        Order.objects.annotate(day=TruncDate('created_at')).values('day', 'status')
+        .annotate(orders=Count('id'), revenue=Sum('total_amount')).order_by()
+    )
+    DailyStatusSales.objects.bulk_create(
+        (DailyStatusSales(**row) for row in statuses.iterator()),
+        batch_size=1000,
+    )
+    products = (
+        OrderItem.objects.exclude(order__status='CANCELLED')
+        .annotate(day=TruncDate('order__created_at')).values('day', 'product_id')
+        .annotate(
+            units=Sum('quantity'),
+            revenue=Sum(F('price') * F('quantity'), output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+        ).order_by()
+    )
+    DailyProductSales.objects.bulk_create(
+        (DailyProductSales(**row) for row in products.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_listing_indexes'),
+        ('products', '0012_stock_movements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStatusSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='daily_status_sales_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'product'), name='daily_product_sales_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from products.inventory import release_stock
 from products.models import Product
 
 
 class Order(models.Model):
+    CANCELLED = "CANCELLED"
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -17,9 +20,46 @@ class Order(models.Model):
     status = models.CharField(max_length=20, default="PAID")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the admin order listing, unfiltered, by status
+            # and by customer.
+            models.Index(fields=["created_at", "id"], name="order_created_id_idx"),
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+            models.Index(fields=["user", "created_at"], name="order_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} - {self.user.username}"
 
+    def cancel(self):
+        """
+        Cancel the order, put its stock back and move it to the cancelled
+        rollups. Returns False, changing nothing, if it was already
+        cancelled.
+        """
+        from .rollups import record_status_change
+
+        with transaction.atomic():
+            # The lock makes the status read here the one being replaced.
+            previous = Order.objects.select_for_update().filter(pk=self.pk).values_list("status", flat=True).first()
+            cancelled = previous not in (None, self.CANCELLED)
+            if cancelled:
+                Order.objects.filter(pk=self.pk).update(status=self.CANCELLED)
+                lines = list(self.items.values_list("product_id", "quantity", "price"))
+                release_stock([(product_id, quantity) for product_id, quantity, price in lines], order=self)
+                record_status_change(self, previous, self.CANCELLED, lines)
+        self.status = self.CANCELLED
+        return cancelled
+
+    def delete(self, *args, **kwargs):
+        """Delete the order and take it out of the daily rollups."""
+        from .rollups import record_deleted
+
+        with transaction.atomic():
+            record_deleted(self, self.items.values_list("product_id", "quantity", "price"))
+            return super().delete(*args, **kwargs)
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(
@@ -30,3 +70,29 @@ class OrderItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+
+
+class DailyStatusSales(models.Model):
+    """Orders and their totals per day and status, kept up to date by ``orders.rollups``."""
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status"], name="daily_status_sales_uniq"),
+        ]
+
+
+class DailyProductSales(models.Model):
+    """Units sold and their revenue per day and product, cancelled orders left out."""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product"], name="daily_product_sales_uniq"),
+        ]
@@ -0,0 +1,261 @@
+"""
+Daily sales rollups.
+
+``DailyStatusSales`` and ``DailyProductSales`` are adjusted with one
+``INSERT ... ON CONFLICT DO UPDATE SET n = n + excluded.n`` per table, so
+dashboards read a row per day instead of scanning every order item.
+
+Cancelling or deleting an order adjusts them in the same transaction. A
+new order only queues a task: every checkout of the day would otherwise
+wait on the same ``(day, status)`` row, so the worker adds queued orders in
+batches instead. Until then they are missing from the rollups. The task
+carries everything it adds, counted under the status the order was placed
+with, so a cancel or delete that gets there first still nets out.
+
+``expected_rollups()`` recomputes them from the orders for the rebuild and
+consistency check commands.
+"""
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.queue import enqueue, handler
+from .models import DailyProductSales, DailyStatusSales, Order, OrderItem
+
+
+PLACED = "sales_rollups.placed"
+
+
+def increment(model, keys, values, rows):
+    """Add ``rows`` of ``keys + values`` to the matching rollup rows."""
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = [qn(model._meta.get_field(name).column) for name in keys + values]
+    key_columns = columns[:len(keys)]
+    value_columns = columns[len(keys):]
+
+    row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row] * len(rows))} "
+            f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+            + ", ".join(f"{column} = {table}.{column} + EXCLUDED.{column}" for column in value_columns),
+            [value for row in rows for value in row],
+        )
+
+
+def product_rows(day, lines, sign):
+    """Rows for ``(product_id, quantity, price)`` lines, merged per product."""
+    units, revenue = Counter(), defaultdict(Decimal)
+    for product_id, quantity, price in lines:
+        units[product_id] += quantity
+        revenue[product_id] += Decimal(price) * quantity
+    return [(day, product_id, sign * units[product_id], sign * revenue[product_id]) for product_id in sorted(units)]
+
+
+def schedule_placed(order, lines):
+    """Queue counting a new order with ``(product_id, quantity, price)`` lines."""
+    enqueue(PLACED, {
+        "order": order.pk,
+        "day": timezone.localdate(order.created_at).isoformat(),
+        "status": order.status,
+        "total": str(order.total_amount),
+        "lines": [[product_id, quantity, str(price)] for product_id, quantity, price in lines],
+    })
+
+
+@handler(PLACED, batch_size=500)
+def record_placed(payloads):
+    """
+    Count a batch of queued orders with one upsert per table. The tasks are
+    deleted in the same transaction, and an order whose task is already gone
+    was counted by a rebuild, so no order is counted twice.
+    """
+    with transaction.atomic():
+        lock_rollups()
+        queued = Task.objects.filter(kind=PLACED, payload__order__in=[payload["order"] for payload in payloads])
+        waiting = set(queued.values_list("payload__order", flat=True))
+        queued.delete()
+
+        statuses = defaultdict(lambda: [0, Decimal(0)])
+        lines = defaultdict(list)
+        for payload in payloads:
+            if payload["order"] not in waiting:
+                continue
+            day = date.fromisoformat(payload["day"])
+            totals = statuses[day, payload["status"]]
+            totals[0] += 1
+            totals[1] += Decimal(payload["total"])
+            if payload["status"] != Order.CANCELLED:
+                lines[day] += payload["lines"]
+
+        increment(DailyStatusSales, ["day", "status"], ["orders", "revenue"], [
+            (day, status, orders, revenue) for (day, status), (orders, revenue) in sorted(statuses.items())
+        ])
+        increment(DailyProductSales, ["day", "product"], ["units", "revenue"], [
+            row for day in sorted(lines) for row in product_rows(day, lines[day], 1)
+        ])
+    return [None] * len(payloads)
+
+
+def record_status_change(order, old_status, new_status, lines):
+    """Move an order with ``(product_id, quantity, price)`` lines between statuses."""
+    day = timezone.localdate(order.created_at)
+    increment(DailyStatusSales, ["day", "status"], ["orders", "revenue"], [
+        (day, old_status, -1, -order.total_amount),
+        (day, new_status, 1, order.total_amount),
+    ])
+    cancelled = new_status == Order.CANCELLED
+    if cancelled != (old_status == Order.CANCELLED):
+        increment(DailyProductSales, ["day", "product"], ["units", "revenue"], product_rows(day, lines, -1 if cancelled else 1))
+
+
+def record_deleted(order, lines):
+    """Take a deleted order out of the rollups."""
+    day = timezone.localdate(order.created_at)
+    increment(DailyStatusSales, ["day", "status"], ["orders", "revenue"], [(day, order.status, -1, -order.total_amount)])
+    if order.status != Order.CANCELLED:
+        increment(DailyProductSales, ["day", "product"], ["units", "revenue"], product_rows(day, lines, -1))
+
+
+def day_range(first, last):
+    """Datetimes bounding the local days ``first`` to ``last``, inclusive."""
+    start = timezone.make_aware(datetime.combine(first, time.min))
+    end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min))
+    return start, end
+
+
+def expected_rollups(first, last):
+    """
+    ``({(day, status): (orders, revenue)}, {(day, product_id): (units,
+    revenue)})`` recomputed from the orders placed from ``first`` to
+    ``last``.
+    """
+    start, end = day_range(first, last)
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end)
+    statuses = {
+        (row["day"], row["status"]): (row["orders"], row["revenue"])
+        for row in orders.annotate(day=TruncDate("created_at")).values("day", "status")
+        .annotate(orders=Count("id"), revenue=Sum("total_amount")).order_by()
+    }
+    products = {
+        (row["day"], row["product_id"]): (row["units"], row["revenue"])
+        for row in OrderItem.objects.filter(order__in=orders.exclude(status=Order.CANCELLED))
+        .annotate(day=TruncDate("order__created_at")).values("day", "product_id")
+        .annotate(
+            units=Sum("quantity"),
+            revenue=Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        ).order_by()
+    }
+    return statuses, products
+
+
+def stored_rollups(first, last):
+    statuses = {
+        (day, status): (orders, revenue)
+        for day, status, orders, revenue in DailyStatusSales.objects.filter(day__range=(first, last))
+        .exclude(orders=0).values_list("day", "status", "orders", "revenue")
+    }
+    products = {
+        (day, product_id): (units, revenue)
+        for day, product_id, units, revenue in DailyProductSales.objects.filter(day__range=(first, last))
+        .exclude(units=0).values_list("day", "product_id", "units", "revenue")
+    }
+    return statuses, products
+
+
+def chunks(first, last, days):
+    while first <= last:
+        chunk_last = min(first + timedelta(days=days - 1), last)
+        yield first, chunk_last
+        first = chunk_last + timedelta(days=1)
+
+
+def days_between(first, last):
+    while first <= last:
+        yield first
+        first += timedelta(days=1)
+
+
+def order_days():
+    """The first and last local day with orders, or None."""
+    bounds = Order.objects.order_by("created_at").values_list("created_at", flat=True)
+    first, last = bounds.first(), bounds.last()
+    if first is None:
+        return None
+    return timezone.localdate(first), timezone.localdate(last)
+
+
+def lock_tables(models, mode):
+    if connection.vendor == "postgresql":
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"LOCK TABLE {', '.join(qn(model._meta.db_table) for model in models)} IN {mode} MODE"
+            )
+    # SQLite has a single writer: the first write of the transaction takes
+    # the lock for everyone.
+
+
+def lock_rollups():
+    """
+    Hold off rollup increments until the current transaction ends. Reads
+    of the rollups are not blocked.
+    """
+    lock_tables([DailyStatusSales, DailyProductSales], "EXCLUSIVE")
+
+
+def lock_orders():
+    """
+    Hold off placing, cancelling and deleting orders until the current
+    transaction ends, so the orders and the queued placements read by a
+    rebuild agree. Taken before ``lock_rollups()``, as cancelling does.
+    """
+    lock_tables([Order, OrderItem], "SHARE")
+
+
+def rebuild(first, last, chunk_days=31):
+    """
+    Recompute the rollups for the days ``first`` to ``last``. Each chunk is
+    read and replaced in one transaction that order changes wait for, so
+    it is safe while orders are being placed. The chunk's queued
+    placements are dropped with it, as the rebuild has counted them.
+    """
+    for chunk_first, chunk_last in chunks(first, last, chunk_days):
+        with transaction.atomic():
+            lock_orders()
+            lock_rollups()
+            days = [day.isoformat() for day in days_between(chunk_first, chunk_last)]
+            Task.objects.filter(kind=PLACED, payload__day__in=days).delete()
+            DailyStatusSales.objects.filter(day__range=(chunk_first, chunk_last)).delete()
+            DailyProductSales.objects.filter(day__range=(chunk_first, chunk_last)).delete()
+            statuses, products = expected_rollups(chunk_first, chunk_last)
+            DailyStatusSales.objects.bulk_create([
+                DailyStatusSales(day=day, status=status, orders=orders, revenue=revenue)
+                for (day, status), (orders, revenue) in statuses.items()
+            ], batch_size=1000)
+            DailyProductSales.objects.bulk_create([
+                DailyProductSales(day=day, product_id=product_id, units=units, revenue=revenue)
+                for (day, product_id), (units, revenue) in products.items()
+            ], batch_size=1000)
+        yield chunk_first, chunk_last
+
+
+def rollup_discrepancies(first, last, chunk_days=31):
+    """Yield ``(day, table, key, stored, expected)`` where the rollups are wrong."""
+    for chunk_first, chunk_last in chunks(first, last, chunk_days):
+        for table, expected, stored in zip(
+            ("status", "product"), expected_rollups(chunk_first, chunk_last), stored_rollups(chunk_first, chunk_last)
+        ):
+            for day, key in sorted(set(expected) | set(stored), key=str):
+                if expected.get((day, key)) != stored.get((day, key)):
+                    yield day, table, key, stored.get((day, key)), expected.get((day, key))
@@ -1,32 +1,37 @@
 from rest_framework import serializers
+from .checkout import place_order
 from .models import Order, OrderItem
 from django.contrib.auth.models import User
 
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
+    # Products are checked, and priced, by place_order() with one query
+    # rather than one lookup per line here.
+    product = serializers.IntegerField(source="product_id", min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
     class Meta:
         model = OrderItem
         fields = ["product", "quantity", "price"]
+        read_only_fields = ["price"]
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    items = OrderItemSerializer(many=True)
+    items = OrderItemSerializer(many=True, allow_empty=False, max_length=500)
 
     class Meta:
         model = Order
         exclude = ["user"]
+        read_only_fields = ["total_amount", "status", "created_at"]
 
     def create(self, validated_data):
         items_data = validated_data.pop("items")
-        user = self.context["request"].user
-
-        order = Order.objects.create(user=user, **validated_data)
-
-        for item in items_data:
-            OrderItem.objects.create(order=order, **item)
-
-        return order
+        return place_order(
+            self.context["request"].user,
+            [(item["product_id"], item["quantity"]) for item in items_data],
+            **validated_data,
+        )
 
 class AdminOrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
@@ -1,3 +1,365 @@
-from django.test import TestCase
+import sys
+import threading
+import time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from cart.models import CartItem
+from orders.checkout import place_order
+from django.utils import timezone
+from orders.models import DailyProductSales, DailyStatusSales, Order, OrderItem
+from orders import rollups
+from orders.rollups import expected_rollups, rollup_discrepancies
+from products.inventory import take_stock
+from products.models import Product, StockMovement
+from products.tests.test_search import make_product
+from tasks.models import Task
+from tasks.queue import run_pending
+
+
+class OrderStockTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.admin = User.objects.create_user("admin", password="x", is_staff=True)
+        self.laptop = make_product(quantity=3)
+        self.mouse = make_product(name="Mouse", quantity=10)
+
+    def place_order(self, *lines):
+        self.client.force_authenticate(self.user)
+        return self.client.post("/api/orders/create/", {
+            "total_amount": "100.00",
+            "payment_method": "COD",
+            "name": "Buyer",
+            "address": "Somewhere",
+            "pincode": "123456",
+            "items": [
+                {"product": product.id, "quantity": quantity, "price": "50.00"}
+                for product, quantity in lines
+            ],
+        }, format="json")
+
+    def assertStock(self, product, quantity):
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, quantity)
+
+    def test_placing_an_order_takes_stock(self):
+        CartItem.objects.create(user=self.user, product=self.laptop)
+
+        response = self.place_order((self.laptop, 2), (self.mouse, 1))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertStock(self.laptop, 1)
+        self.assertStock(self.mouse, 9)
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+        self.assertEqual(
+            StockMovement.objects.filter(order_id=response.data["order_id"]).count(), 2
+        )
+
+    def test_an_order_beyond_the_stock_is_rejected_whole(self):
+        response = self.place_order((self.mouse, 1), (self.laptop, 4))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual((response.data["product_id"], response.data["available"]), (self.laptop.id, 3))
+        self.assertStock(self.mouse, 10)
+        self.assertFalse(Order.objects.exists())
+
+    def test_cancelling_releases_stock_once(self):
+        order_id = self.place_order((self.laptop, 2)).data["order_id"]
+        self.client.force_authenticate(self.admin)
+
+        self.client.patch(f"/api/orders/admin/orders/{order_id}/cancel/")
+        self.client.patch(f"/api/admin/orders/{order_id}/cancel/")
+
+        self.assertEqual(Order.objects.get(pk=order_id).status, "CANCELLED")
+        self.assertStock(self.laptop, 3)
+
+    def test_reorder_takes_stock(self):
+        order_id = self.place_order((self.laptop, 2)).data["order_id"]
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.post(f"/api/orders/admin/orders/{order_id}/reorder/")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertStock(self.laptop, 1)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_reordering_an_order_without_items_is_rejected(self):
+        empty = Order.objects.create(
+            user=self.user, total_amount=0, payment_method="COD", name="x", address="x", pincode="1"
+        )
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.post(f"/api/orders/admin/orders/{empty.id}/reorder/")
+
+        self.assertEqual((response.status_code, response.data["error"]), (400, "Order has no items"))
+        self.assertEqual(Order.objects.count(), 1)
+        take_stock([])
+
+    def test_prices_and_totals_come_from_the_catalog(self):
+        Product.objects.filter(pk=self.laptop.pk).update(price=1000)
+        Product.objects.filter(pk=self.mouse.pk).update(price=250)
+
+        # place_order() sends a price of 50.00 and a total of 100.00.
+        response = self.place_order((self.laptop, 2), (self.mouse, 1), (self.laptop, 1))
+
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.total_amount, Decimal("3250"))
+        self.assertEqual(response.data["total_amount"], Decimal("3250"))
+        self.assertEqual(
+            sorted(order.items.values_list("product_id", "quantity", "price")),
+            [(self.laptop.id, 3, Decimal("1000")), (self.mouse.id, 1, Decimal("250"))],
+        )
+
+    def test_only_the_ordered_lines_leave_the_cart(self):
+        CartItem.objects.create(user=self.user, product=self.laptop)
+        CartItem.objects.create(user=self.user, product=self.mouse)
+
+        self.place_order((self.laptop, 1))
+
+        self.assertEqual(
+            list(CartItem.objects.filter(user=self.user).values_list("product_id", flat=True)), [self.mouse.id]
+        )
+
+    def test_unknown_products_are_rejected(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/api/orders/create/", {
+            "payment_method": "COD", "name": "Buyer", "address": "Somewhere", "pincode": "123456",
+            "items": [{"product": self.laptop.id, "quantity": 1}, {"product": 999999, "quantity": 1}],
+        }, format="json")
+
+        self.assertEqual((response.status_code, response.data["product_ids"]), (400, [999999]))
+        self.assertFalse(Order.objects.exists())
+        self.assertStock(self.laptop, 3)
+
+
+class SalesRollupTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.admin = User.objects.create_user("admin", password="x", is_staff=True)
+        self.laptop = make_product(price=1000, quantity=10)
+        self.mouse = make_product(name="Mouse", price=50, quantity=10)
+        self.today = timezone.localdate()
+
+    def place_order(self, *lines):
+        self.client.force_authenticate(self.user)
+        return self.client.post("/api/orders/create/", {
+            "payment_method": "COD", "name": "Buyer", "address": "Somewhere", "pincode": "123456",
+            "items": [{"product": product.id, "quantity": quantity} for product, quantity in lines],
+        }, format="json").data["order_id"]
+
+    def statuses(self):
+        return {
+            status: (orders, revenue)
+            for status, orders, revenue in DailyStatusSales.objects.filter(day=self.today, orders__gt=0)
+            .values_list("status", "orders", "revenue")
+        }
+
+    def units(self):
+        return dict(DailyProductSales.objects.filter(day=self.today).values_list("product_id", "units"))
+
+    def assertConsistent(self):
+        self.assertEqual(list(rollup_discrepancies(self.today, self.today)), [])
+
+    def test_rollups_follow_orders_through_their_life(self):
+        first = self.place_order((self.laptop, 2), (self.mouse, 1))
+        second = self.place_order((self.mouse, 3))
+        # New orders are counted by the task worker.
+        self.assertEqual(self.statuses(), {})
+        run_pending()
+        self.assertEqual(self.statuses(), {"PAID": (2, Decimal("2200"))})
+        self.assertEqual(self.units(), {self.laptop.id: 2, self.mouse.id: 4})
+
+        self.client.force_authenticate(self.admin)
+        self.client.post(f"/api/orders/admin/orders/{second}/reorder/")
+        run_pending()
+        self.client.patch(f"/api/orders/admin/orders/{first}/cancel/")
+        # Cancelling twice moves the order once.
+        self.client.patch(f"/api/admin/orders/{first}/cancel/")
+        self.assertEqual(self.statuses(), {"PAID": (2, Decimal("300")), "CANCELLED": (1, Decimal("2050"))})
+        self.assertEqual(self.units(), {self.laptop.id: 0, self.mouse.id: 6})
+        self.assertConsistent()
+
+        self.client.delete(f"/api/orders/admin/orders/{first}/delete/")
+        self.client.delete(f"/api/orders/admin/orders/{second}/delete/")
+        self.assertEqual(self.statuses(), {"PAID": (1, Decimal("150"))})
+        self.assertConsistent()
+
+    def test_orders_changed_before_they_are_counted(self):
+        cancelled = self.place_order((self.laptop, 1))
+        deleted = self.place_order((self.mouse, 2))
+        self.place_order((self.mouse, 1))
+
+        self.client.force_authenticate(self.admin)
+        self.client.patch(f"/api/admin/orders/{cancelled}/cancel/")
+        self.client.delete(f"/api/orders/admin/orders/{deleted}/delete/")
+        run_pending()
+        # A retried task is not counted twice.
+        run_pending()
+
+        self.assertEqual(self.statuses(), {"PAID": (1, Decimal("50")), "CANCELLED": (1, Decimal("1000"))})
+        self.assertEqual(self.units(), {self.laptop.id: 0, self.mouse.id: 1})
+        self.assertConsistent()
+
+    def test_checkout_does_not_write_the_rollups(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.place_order((self.laptop, 1))
+
+        tables = (DailyStatusSales._meta.db_table, DailyProductSales._meta.db_table)
+        self.assertFalse([query for query in queries if any(table in query["sql"] for table in tables)])
+        self.assertEqual(Task.objects.filter(kind=rollups.PLACED).count(), 1)
+
+    def test_a_rebuild_counts_queued_orders_once(self):
+        self.place_order((self.laptop, 1))
+
+        list(rollups.rebuild(self.today, self.today))
+        run_pending()
+
+        self.assertEqual(self.statuses(), {"PAID": (1, Decimal("1000"))})
+        self.assertFalse(Task.objects.exists())
+
+    def test_rebuild_and_check(self):
+        self.place_order((self.laptop, 1))
+        self.place_order((self.mouse, 2))
+        run_pending()
+        DailyProductSales.objects.filter(product=self.mouse).delete()
+        DailyStatusSales.objects.update(orders=5)
+
+        out = StringIO()
+        call_command("check_sales_rollups", stdout=out)
+        self.assertIn(f"{self.today} status PAID: rollup (5, Decimal('1100.00')), orders (2,", out.getvalue())
+        self.assertIn(f"{self.today} product {self.mouse.id}: rollup None", out.getvalue())
+
+        call_command("check_sales_rollups", "--fix", stdout=StringIO())
+        self.assertConsistent()
+
+        DailyStatusSales.objects.all().delete()
+        DailyProductSales.objects.all().delete()
+        call_command("rebuild_sales_rollups", "--chunk-days", "1", stdout=StringIO())
+        self.assertEqual(self.statuses(), {"PAID": (2, Decimal("1100"))})
+        self.assertConsistent()
+
+
+class RollupRebuildRaceTest(TransactionTestCase):
+
+    def test_orders_placed_during_a_rebuild_are_kept(self):
+        user = User.objects.create_user("buyer", password="x")
+        product = make_product(price=100, quantity=10)
+        place_order(user, [(product.id, 1)], payment_method="COD", name="x", address="x", pincode="1")
+        today = timezone.localdate()
+        computed = threading.Event()
+
+        def slow_expected_rollups(first, last):
+            result = expected_rollups(first, last)
+            computed.set()
+            # Leave time for a checkout to commit before the chunk is written.
+            time.sleep(0.3)
+            return result
+
+        def rebuild_today():
+            try:
+                list(rollups.rebuild(today, today))
+            finally:
+                connection.close()
+
+        with mock.patch("orders.rollups.expected_rollups", slow_expected_rollups):
+            thread = threading.Thread(target=rebuild_today)
+            thread.start()
+            computed.wait(5)
+            while True:
+                try:
+                    place_order(user, [(product.id, 2)], payment_method="COD", name="x", address="x", pincode="1")
+                except OperationalError:
+                    # SQLite allows one writer at a time; PostgreSQL makes
+                    # the checkout wait on the table lock instead.
+                    time.sleep(0.01)
+                    continue
+                break
+            thread.join()
+        run_pending()
+
+        self.assertEqual(
+            DailyStatusSales.objects.get(day=today, status="PAID").orders, 2
+        )
+        self.assertEqual(DailyProductSales.objects.get(day=today, product=product).units, 3)
+        self.assertEqual(list(rollup_discrepancies(today, today)), [])
+
+
+def legacy_place_order(user, lines):
+    """Checkout as it was: one lookup, insert and stock update per line."""
+    products = [(Product.objects.get(pk=product_id), quantity) for product_id, quantity in lines]
+    with transaction.atomic():
+        order = Order.objects.create(
+            user=user, total_amount=1, payment_method="COD", name="x", address="x", pincode="1"
+        )
+        for product, quantity in products:
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+        for product, quantity in products:
+            Product.objects.filter(pk=product.pk, quantity__gte=quantity).update(quantity=F("quantity") - quantity)
+        StockMovement.objects.bulk_create([
+            StockMovement(product=product, order=order, delta=-quantity, reason=StockMovement.ORDER)
+            for product, quantity in products
+        ])
+    CartItem.objects.filter(user=user).delete()
+    return order
+
+
+class CheckoutScalingTest(TestCase):
+
+    SIZES = (1, 10, 100)
+    ROUNDS = 5
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.products = [make_product(name=f"Laptop {i}", quantity=10000) for i in range(max(self.SIZES))]
+
+    def lines(self, size):
+        return [(product.id, 1) for product in self.products[:size]]
+
+    def place(self, size):
+        return place_order(
+            self.user, self.lines(size), payment_method="COD", name="x", address="x", pincode="1"
+        )
+
+    def test_query_count_does_not_grow_with_the_lines(self):
+        counts = []
+        for size in self.SIZES:
+            with CaptureQueriesContext(connection) as queries:
+                self.place(size)
+            counts.append(len(queries))
+
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def timed(self, checkout, size):
+        started = time.perf_counter()
+        for _ in range(self.ROUNDS):
+            checkout(size)
+        return (time.perf_counter() - started) / self.ROUNDS * 1000
+
+    def test_latency_against_the_per_line_path(self):
+        results = []
+        for size in self.SIZES:
+            old = self.timed(lambda size: legacy_place_order(self.user, self.lines(size)), size)
+            new = self.timed(self.place, size)
+            results.append((size, old, new))
+
+        sys.stderr.write("\ncheckout latency (ms): " + ", ".join(
+            f"{size} lines {old:.1f} -> {new:.1f}" for size, old, new in results
+        ) + "\n")
+        # Timing on shared machines is noisy; only catch a real regression.
+        size, old, new = results[-1]
+        self.assertLess(new, old)
 
-# Create your tests here.
@@ -2,15 +2,18 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated,IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
+from idempotency.keys import idempotent
+from products.inventory import OutOfStock
+from .checkout import EmptyOrder, UnknownProducts, place_order
 from .serializers import AdminOrderSerializer
 from .serializers import OrderSerializer
-from cart.models import CartItem
-from .models import Order,OrderItem
+from .models import Order
 
 
 class CreateOrderView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         serializer = OrderSerializer(
             data=request.data,
@@ -18,15 +21,24 @@ class CreateOrderView(APIView):
         )
 
         if serializer.is_valid():
-            serializer.save()
-
-            
-            CartItem.objects.filter(user=request.user).delete()
+            try:
+                serializer.save()
+            except UnknownProducts as exc:
+                return Response(
+                    {"error": str(exc), "product_ids": exc.product_ids},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            except OutOfStock as exc:
+                return Response(
+                    {"error": str(exc), "product_id": exc.product_id, "available": exc.available},
+                    status=status.HTTP_409_CONFLICT,
+                )
 
             return Response(
                 {
                     "message": "Order placed successfully",
                     "order_id": serializer.instance.id,
+                    "total_amount": serializer.instance.total_amount,
                 },
                 status=status.HTTP_201_CREATED,
             )
@@ -42,40 +54,41 @@ class CancelOrderView(APIView):
         except Order.DoesNotExist:
             return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        order.status = "CANCELLED"
-        order.save()
+        order.cancel()
 
         return Response({"message": "Order cancelled successfully"}, status=status.HTTP_200_OK)
     
 class ReorderView(APIView):
     permission_classes = [IsAdminUser]
 
+    @idempotent
     def post(self, request, order_id):
         try:
             order = Order.objects.get(id=order_id)
         except Order.DoesNotExist:
             return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
 
-       
-        new_order = Order.objects.create(
-            user=order.user,
-            total_amount=order.total_amount,
-            payment_method=order.payment_method,
-            name=order.name,
-            address=order.address,
-            pincode=order.pincode,
-            status="PAID",
-            
-        )
-
-        
-        for item in order.items.all():
-            
-            OrderItem.objects.create(
-                order=new_order,      
-                product=item.product,
-                quantity=item.quantity,
-                price=item.price
+        try:
+            new_order = place_order(
+                order.user,
+                order.items.values_list("product_id", "quantity"),
+                clear_cart=False,
+                payment_method=order.payment_method,
+                name=order.name,
+                address=order.address,
+                pincode=order.pincode,
+            )
+        except EmptyOrder as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except UnknownProducts as exc:
+            return Response(
+                {"error": str(exc), "product_ids": exc.product_ids},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except OutOfStock as exc:
+            return Response(
+                {"error": str(exc), "product_id": exc.product_id, "available": exc.available},
+                status=status.HTTP_409_CONFLICT,
             )
 
         serializer = AdminOrderSerializer(new_order)
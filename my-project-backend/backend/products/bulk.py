@@ -0,0 +1,274 @@
+"""
+Streaming CSV/JSONL import and export of the catalog.
+
+Rows are read, validated and written a batch at a time, so memory stays
+flat however large the file is. Writes go through ``bulk_create`` (COPY on
+PostgreSQL, with psycopg 3 or psycopg2) and ``bulk_update``, which skip the
+per-product signals; the facet tables, similar-product lists, stock
+ledger, lookup cache and catalog version are brought up to date once the
+import is done.
+"""
+
+import csv
+import io
+import json
+
+from django.db import connection, models, transaction
+
+from .cache import bump_catalog_version
+from .facets import rebuild_facets
+from .inventory import adjust, open_missing_balances
+from .lookup import product_lookup
+from .models import Product, SimilarProduct
+from .similarity import schedule_refresh
+from .serializers import IMPORT_FIELDS, validate_rows
+
+
+FORMATS = ("csv", "jsonl")
+
+BATCH_SIZE = 1000
+
+# Row errors beyond this many are counted but not reported individually.
+MAX_REPORTED_ERRORS = 100
+
+JSON_COLUMNS = ("description", "category")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(name, requested=None):
+    fmt = (requested or name.rsplit(".", 1)[-1]).lower()
+    if fmt == "json":
+        fmt = "jsonl"
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported format, expected one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line, dict)`` pairs from a binary CSV or JSONL stream."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or "name" not in reader.fieldnames:
+            raise ImportFormatError("The CSV header must name the product columns")
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line, raw in enumerate(text, 1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            yield line, None
+            continue
+        yield line, row if isinstance(row, dict) else None
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def copy_text(value):
+    """``value`` in the text format of ``COPY ... FROM STDIN``."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t")
+        .replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def copy_values(product, fields):
+    values = []
+    for field in fields:
+        value = field.pre_save(product, add=True)
+        if isinstance(field, models.JSONField):
+            # COPY parses the column's text form, so JSON goes as text on
+            # either driver instead of through its adapter.
+            values.append(None if value is None else json.dumps(value, cls=field.encoder))
+        else:
+            values.append(field.get_db_prep_save(value, connection))
+    return values
+
+
+def copy_rows(cursor, sql, rows):
+    """Send ``rows`` to ``COPY ... FROM STDIN`` on a psycopg 3 or psycopg2 cursor."""
+    if hasattr(cursor, "copy"):
+        with cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_text(value) for value in row) + "\n")
+    buffer.seek(0)
+    cursor.copy_expert(sql, buffer)
+
+
+def copy_products(products):
+    """
+    Insert new products with COPY and return their ids, or None where
+    that's unavailable. COPY returns no ids, so they are read back as the
+    ids past the largest one before it; a product created concurrently may
+    be among them, which only costs it an extra refresh.
+    """
+    if connection.vendor != "postgresql":
+        return None
+
+    fields = [field for field in Product._meta.concrete_fields if not field.primary_key]
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    last_id = Product.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    with connection.cursor() as cursor:
+        copy_rows(
+            cursor.cursor,
+            f"COPY {connection.ops.quote_name(Product._meta.db_table)} ({columns}) FROM STDIN",
+            (copy_values(product, fields) for product in products),
+        )
+    return list(Product.objects.filter(id__gt=last_id).values_list("id", flat=True))
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def write_batch(valid, result):
+    creates = [Product(**data) for line, data in valid if "id" not in data]
+    changes = {data["id"]: (line, data) for line, data in valid if "id" in data}
+
+    existing = Product.objects.in_bulk(list(changes))
+    deltas = {}
+    for pk, (line, data) in changes.items():
+        if pk not in existing:
+            result.add_error(line, {"id": [f"Product {pk} does not exist"]})
+            continue
+        deltas[pk] = data["quantity"] - existing[pk].quantity
+        for name, value in data.items():
+            setattr(existing[pk], name, value)
+
+    with transaction.atomic():
+        created = copy_products(creates) if creates else []
+        if created is None:
+            created = [product.pk for product in Product.objects.bulk_create(creates) if product.pk is not None]
+        # Quantities change as deltas, so orders taken meanwhile are kept.
+        Product.objects.bulk_update(
+            existing.values(), [name for name in IMPORT_FIELDS if name not in ("id", "quantity")]
+        )
+        adjust(deltas)
+        # Stale neighbours go now; a task worker computes the new ones,
+        # including for the rows COPY wrote around the ORM.
+        SimilarProduct.objects.filter(product_id__in=list(existing)).delete()
+        SimilarProduct.objects.filter(similar_id__in=list(existing)).delete()
+        changed = [*existing, *created]
+        if changed:
+            schedule_refresh(changed)
+
+    for pk in existing:
+        product_lookup.invalidate(pk)
+    result.created += len(creates)
+    result.updated += len(existing)
+
+
+def import_products(stream, fmt, batch_size=BATCH_SIZE, progress=None):
+    """
+    Import products from a binary CSV or JSONL stream. Invalid rows are
+    reported with their line number; the valid ones are still written.
+    """
+    result = ImportResult()
+    try:
+        for batch in batches(read_rows(stream, fmt), batch_size):
+            rows = []
+            for line, data in batch:
+                if data is None:
+                    result.add_error(line, {"non_field_errors": ["Not a JSON object"]})
+                else:
+                    rows.append((line, data))
+
+            valid, invalid = validate_rows(rows)
+            for line, errors in invalid:
+                result.add_error(line, errors)
+            if valid:
+                write_batch(valid, result)
+            if progress is not None:
+                progress(result)
+    finally:
+        if result.created or result.updated:
+            # New products start their ledger with the imported quantity.
+            open_missing_balances()
+            rebuild_facets()
+            bump_catalog_version()
+    return result
+
+
+def export_values(product):
+    return {
+        name: product.image.name if name == "image" else getattr(product, name)
+        for name in IMPORT_FIELDS
+    }
+
+
+def iter_products(chunk_size=BATCH_SIZE):
+    # Keyset over id rather than a server-side cursor, so a slow client
+    # never holds a cursor or transaction open.
+    last_id = 0
+    queryset = Product.objects.only(*IMPORT_FIELDS).order_by("id")
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1].id
+
+
+class Echo:
+    """A file-like object whose ``write`` just returns the value."""
+
+    def write(self, value):
+        return value
+
+
+def export_products(fmt, chunk_size=BATCH_SIZE):
+    """Yield the catalog as CSV or JSONL text, a line at a time."""
+    if fmt == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(IMPORT_FIELDS)
+        for product in iter_products(chunk_size):
+            values = export_values(product)
+            for name in JSON_COLUMNS:
+                values[name] = json.dumps(values[name])
+            yield writer.writerow([values[name] for name in IMPORT_FIELDS])
+        return
+
+    for product in iter_products(chunk_size):
+        yield json.dumps(export_values(product)) + "\n"
@@ -0,0 +1,161 @@
+import contextlib
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from backend.db import MAX_LAG, use_primary
+from .serializers import requested_fields
+
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_CHANGED_KEY = "catalog:changed_at"
+# Bumped by every stock change, for the pages that show ``quantity``.
+STOCK_VERSION_KEY = "catalog:stock_version"
+
+PAGE_TIMEOUT = getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 60)
+STALE_TIMEOUT = getattr(settings, "CATALOG_CACHE_STALE_TIMEOUT", 60 * 60 * 24)
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1 so an evicted counter can never
+        # collide with page entries that were cached under an older version.
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        get_version(key)
+        return cache.incr(key)
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_CHANGED_KEY, time.time(), timeout=None)
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def bump_stock_version():
+    cache.set(CATALOG_CHANGED_KEY, time.time(), timeout=None)
+    return bump_version(STOCK_VERSION_KEY)
+
+
+def catalog_recently_changed():
+    """Whether a read replica may not have caught up with the last write."""
+    changed_at = cache.get(CATALOG_CHANGED_KEY)
+    return changed_at is not None and time.time() - changed_at < MAX_LAG
+
+
+@contextlib.contextmanager
+def consistent_reads():
+    """
+    Read from the primary while a replica may still lag the last catalog
+    write, for results that are kept under the current catalog version.
+    """
+    if catalog_recently_changed():
+        with use_primary():
+            yield
+    else:
+        yield
+
+
+def make_etag(body):
+    return '"%s"' % hashlib.md5(body).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag for tag in candidates
+    )
+
+
+def build_http_response(body, etag):
+    response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=0, must-revalidate"
+    return response
+
+
+def not_modified(etag):
+    response = HttpResponse(status=304)
+    response["ETag"] = etag
+    return response
+
+
+def catalog_cached(view_method):
+    """
+    Serve a catalog GET from a pre-rendered body cached per catalog version.
+
+    Entries are keyed by (catalog version, full URL), so any product write
+    invalidates every cached page at once. Pages whose fields (the view's
+    ``default_fields`` unless the URL picks them) include ``quantity`` are
+    also keyed by the stock version, which every stock change bumps. While
+    one worker rebuilds a page after a version bump, the others serve the
+    last rendered copy of the same URL instead of all running the query.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        url = request.build_absolute_uri()
+        url_hash = hashlib.md5(url.encode()).hexdigest()
+        version = get_catalog_version()
+        if "quantity" in requested_fields(request.query_params, default=getattr(self, "default_fields", None)):
+            version = f"{version}.{get_version(STOCK_VERSION_KEY)}"
+        key = f"catalog:page:{version}:{url_hash}"
+        stale_key = f"catalog:stale:{url_hash}"
+
+        entry = cache.get(key)
+        if entry is None:
+            if cache.add(key + ":lock", 1, timeout=LOCK_TIMEOUT):
+                try:
+                    with consistent_reads():
+                        response = view_method(self, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    body = JSONRenderer().render(response.data)
+                    entry = (make_etag(body), body)
+                    cache.set(key, entry, timeout=PAGE_TIMEOUT)
+                    cache.set(stale_key, entry, timeout=STALE_TIMEOUT)
+                finally:
+                    cache.delete(key + ":lock")
+            else:
+                entry = cache.get(stale_key) or wait_for_entry(key)
+                if entry is None:
+                    return view_method(self, request, *args, **kwargs)
+
+        etag, body = entry
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return build_http_response(body, etag)
+
+    return wrapper
+
+
+def wait_for_entry(key):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
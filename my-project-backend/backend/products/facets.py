@@ -0,0 +1,177 @@
+import bisect
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+
+from .models import FacetCount, Product, ProductCategory
+
+
+PRICE_BUCKETS = [0, 50000, 100000, 150000, 200000, 300000, 400000]
+
+CATEGORY_MAX_LENGTH = ProductCategory._meta.get_field("value").max_length
+
+REBUILD_CHUNK_SIZE = 2000
+
+FILTER_PARAMS = ("brand", "category", "min_price", "max_price", "min_rating", "in_stock")
+
+
+def price_bucket(price):
+    i = max(bisect.bisect_right(PRICE_BUCKETS, price) - 1, 0)
+    lower = PRICE_BUCKETS[i]
+    if i + 1 < len(PRICE_BUCKETS):
+        return f"{lower}-{PRICE_BUCKETS[i + 1]}"
+    return f"{lower}+"
+
+
+def category_values(product):
+    return {value[:CATEGORY_MAX_LENGTH] for value in product.category_values()}
+
+
+def facet_keys(product):
+    """The (facet, value) pairs a product contributes a count of one to."""
+    keys = {("brand", product.brand), ("price", price_bucket(product.price))}
+    keys.update(("category", value) for value in category_values(product))
+    return keys
+
+
+def adjust_counts(keys, delta):
+    for facet, value in keys:
+        updated = FacetCount.objects.filter(facet=facet, value=value).update(
+            count=F("count") + delta
+        )
+        if not updated and delta > 0:
+            FacetCount.objects.get_or_create(facet=facet, value=value)
+            FacetCount.objects.filter(facet=facet, value=value).update(
+                count=F("count") + delta
+            )
+
+
+def apply_facet_changes(old_keys, new_keys):
+    with transaction.atomic():
+        adjust_counts(new_keys - old_keys, 1)
+        adjust_counts(old_keys - new_keys, -1)
+
+
+def sync_categories(product):
+    values = category_values(product)
+    existing = set(product.category_links.values_list("value", flat=True))
+
+    if existing - values:
+        product.category_links.filter(value__in=existing - values).delete()
+    if values - existing:
+        ProductCategory.objects.bulk_create(
+            [ProductCategory(product=product, value=value) for value in values - existing],
+            ignore_conflicts=True,
+        )
+
+
+def rebuild_facets():
+    """Recompute the category side table and every facet count from scratch."""
+    counts = Counter()
+    links = []
+
+    with transaction.atomic():
+        ProductCategory.objects.all().delete()
+        FacetCount.objects.all().delete()
+
+        products = Product.objects.only("id", "brand", "category", "price")
+        for product in products.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+            counts.update(facet_keys(product))
+            links.extend(
+                ProductCategory(product_id=product.pk, value=value)
+                for value in category_values(product)
+            )
+            if len(links) >= REBUILD_CHUNK_SIZE:
+                ProductCategory.objects.bulk_create(links)
+                links = []
+
+        ProductCategory.objects.bulk_create(links)
+        FacetCount.objects.bulk_create(
+            FacetCount(facet=facet, value=value, count=count)
+            for (facet, value), count in counts.items()
+        )
+
+    return len(counts)
+
+
+def facet_summary():
+    rows = FacetCount.objects.filter(count__gt=0).values_list("facet", "value", "count")
+
+    brands, categories, prices = [], [], []
+    for facet, value, count in rows:
+        if facet == "brand":
+            brands.append({"value": value, "count": count})
+        elif facet == "category":
+            categories.append({"value": value, "count": count})
+        elif facet == "price":
+            lower, _, upper = value.rstrip("+").partition("-")
+            prices.append({
+                "range": value,
+                "min": int(lower),
+                "max": int(upper) if upper else None,
+                "count": count,
+            })
+
+    brands.sort(key=lambda item: (-item["count"], item["value"]))
+    categories.sort(key=lambda item: (-item["count"], item["value"]))
+    return {
+        "brands": brands,
+        "categories": categories,
+        "price": sorted(prices, key=lambda item: item["min"]),
+    }
+
+
+def list_param(params, name):
+    values = []
+    for raw in params.getlist(name):
+        values.extend(value.strip() for value in raw.split(","))
+    return [value for value in values if value]
+
+
+def number_param(params, name, cast):
+    raw = params.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return cast(raw)
+    except ValueError:
+        raise ValidationError({name: "Must be a number"})
+
+
+def filter_products(queryset, params):
+    """Apply the storefront filter query parameters to a product queryset."""
+    brands = list_param(params, "brand")
+    if brands:
+        brand_filter = Q()
+        for brand in brands:
+            brand_filter |= Q(brand__iexact=brand)
+        queryset = queryset.filter(brand_filter)
+
+    categories = list_param(params, "category")
+    if categories:
+        queryset = queryset.filter(
+            id__in=ProductCategory.objects.filter(value__in=categories).values("product_id")
+        )
+
+    min_price = number_param(params, "min_price", int)
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+
+    max_price = number_param(params, "max_price", int)
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+
+    min_rating = number_param(params, "min_rating", float)
+    if min_rating is not None:
+        queryset = queryset.filter(rating__gte=min_rating)
+
+    if params.get("in_stock", "").lower() in ("1", "true", "yes"):
+        queryset = queryset.filter(quantity__gt=0)
+
+    return queryset
+
+
+def has_filters(params):
+    return any(params.get(name) for name in FILTER_PARAMS)
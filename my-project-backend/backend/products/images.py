@@ -0,0 +1,72 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .imaging import generate_derivatives
+from .models import Product
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, "PRODUCT_IMAGE_WORKERS", 2),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def store_variants(pk, name, variants):
+    product = Product.objects.filter(pk=pk).first()
+    # Skip results for an image that has been replaced in the meantime.
+    if product is None or product.image.name != name:
+        return
+    product.image_variants = variants
+    product.save(update_fields=["image_variants"])
+
+
+def _finish(pk, name, future):
+    try:
+        variants = future.result()
+    except Exception:
+        logger.exception("Generating image derivatives failed for product %s", pk)
+        return
+
+    close_old_connections()
+    try:
+        store_variants(pk, name, variants)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(product):
+    """
+    Generate the product's image variants in the process pool once the
+    current transaction commits. With ``PRODUCT_IMAGE_ASYNC = False`` the
+    work is done inline instead.
+    """
+    if not product.image:
+        return
+
+    pk, name = product.pk, product.image.name
+    media_root = str(settings.MEDIA_ROOT)
+
+    def submit():
+        if not getattr(settings, "PRODUCT_IMAGE_ASYNC", True):
+            store_variants(pk, name, generate_derivatives(media_root, name))
+            return
+        future = get_executor().submit(generate_derivatives, media_root, name)
+        future.add_done_callback(lambda done: _finish(pk, name, done))
+
+    transaction.on_commit(submit)
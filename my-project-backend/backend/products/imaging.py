@@ -0,0 +1,84 @@
+"""
+Pillow-only image work, run in worker processes.
+
+Nothing here may import Django: pool workers are started with the spawn
+method and only import this module.
+"""
+
+import base64
+import hashlib
+import io
+import os
+
+from PIL import Image, ImageOps
+
+
+SIZES = (
+    ("small", 240),
+    ("medium", 480),
+    ("large", 960),
+)
+
+FORMATS = (
+    ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+)
+
+PLACEHOLDER_WIDTH = 16
+
+HASH_LENGTH = 12
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name, digest):
+    """``products/a.jpg`` -> ``products/a.<digest>.jpg``; see backend.media."""
+    root, extension = os.path.splitext(name)
+    return f"{root}.{digest}{extension}"
+
+
+def derivative_dir(name):
+    folder, filename = os.path.split(name)
+    return os.path.join(folder, "derived", os.path.splitext(filename)[0])
+
+
+def generate_derivatives(media_root, name):
+    """
+    Write the resized JPEG/WebP variants of ``name`` next to it under
+    ``derived/`` and return a description of them. Paths are relative to
+    ``media_root`` and carry the content hash of the file they name.
+    """
+    out_dir = derivative_dir(name)
+    os.makedirs(os.path.join(media_root, out_dir), exist_ok=True)
+
+    source_path = os.path.join(media_root, name)
+    with Image.open(source_path) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+
+    variants = {"source": name, "hash": content_hash(source_path)}
+    for label, width in SIZES:
+        resized = image
+        if image.width > width:
+            height = max(round(image.height * width / image.width), 1)
+            resized = image.resize((width, height), Image.LANCZOS)
+
+        entry = {"width": resized.width, "height": resized.height}
+        for extension, image_format, options in FORMATS:
+            path = f"{out_dir}/{label}.{extension}"
+            resized.save(os.path.join(media_root, path), image_format, **options)
+            entry[extension] = hashed_name(path, content_hash(os.path.join(media_root, path)))
+        variants[label] = entry
+
+    tiny = image.copy()
+    tiny.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+    buffer = io.BytesIO()
+    tiny.save(buffer, "JPEG", quality=40)
+    variants["placeholder"] = "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+    return variants
@@ -0,0 +1,130 @@
+import copy
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Product
+
+
+LOCAL_MAX_SIZE = getattr(settings, "PRODUCT_LOOKUP_MAX_SIZE", 2048)
+LOCAL_TTL = getattr(settings, "PRODUCT_LOOKUP_TTL", 30)
+SHARED_TIMEOUT = getattr(settings, "PRODUCT_LOOKUP_SHARED_TIMEOUT", 60 * 10)
+
+# Cached in place of a product so unknown ids don't reach the database either.
+MISSING = "missing"
+
+
+class LRUCache:
+    """Size-bounded, thread-safe LRU whose entries also expire after ``ttl``."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ProductLookup:
+    """
+    Product-by-id reads through a per-process LRU and the shared cache.
+
+    Writes delete the shared entry and this process's LRU entry; other
+    processes drop theirs when the short local TTL runs out.
+    """
+
+    def __init__(self, max_size=LOCAL_MAX_SIZE, ttl=LOCAL_TTL):
+        self.local = LRUCache(max_size, ttl)
+        self.counters = Counter()
+        self._counter_lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(pk):
+        return f"products:lookup:{pk}"
+
+    def get(self, pk):
+        """Return a copy of the product with this id, or None."""
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+
+        product = self.local.get(pk)
+        if product is not None:
+            self._count("local_hits")
+        else:
+            product = cache.get(self.cache_key(pk))
+            if product is not None:
+                self._count("shared_hits")
+            else:
+                self._count("misses")
+                product = Product.objects.filter(pk=pk).first() or MISSING
+                cache.set(self.cache_key(pk), product, timeout=SHARED_TIMEOUT)
+            self.local.set(pk, product)
+
+        if product == MISSING:
+            return None
+        return copy.copy(product)
+
+    def invalidate(self, pk):
+        self.local.delete(pk)
+        cache.delete(self.cache_key(pk))
+
+    def clear(self):
+        self.local.clear()
+        with self._counter_lock:
+            self.counters.clear()
+
+    def _count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._counter_lock:
+            counters = dict(self.counters)
+        lookups = sum(counters.values())
+        hits = counters.get("local_hits", 0) + counters.get("shared_hits", 0)
+        return {
+            "local_hits": counters.get("local_hits", 0),
+            "shared_hits": counters.get("shared_hits", 0),
+            "misses": counters.get("misses", 0),
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "local_size": len(self.local),
+            "local_max_size": self.local.max_size,
+            "local_ttl": self.local.ttl,
+        }
+
+
+product_lookup = ProductLookup()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from products.bulk import BATCH_SIZE, export_products
+
+
+class Command(BaseCommand):
+    help = "Export the catalog as CSV or JSONL, to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        lines = export_products(options["format"], options["batch_size"])
+        if not options["path"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(options["path"], "w", encoding="utf-8", newline="") as f:
+            f.writelines(lines)
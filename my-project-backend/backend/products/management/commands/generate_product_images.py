@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.cache import bump_catalog_version
+from products.images import get_executor
+from products.imaging import generate_derivatives
+from products.lookup import product_lookup
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Generate resized and WebP variants for existing product images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="Regenerate images that already have variants."
+        )
+        parser.add_argument("--batch-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image="").only("id", "image")
+        if not options["force"]:
+            products = products.filter(image_variants={})
+
+        media_root = str(settings.MEDIA_ROOT)
+        batch_size = options["batch_size"]
+        done = failed = 0
+
+        ids = list(products.values_list("id", flat=True))
+        for start in range(0, len(ids), batch_size):
+            batch = list(Product.objects.filter(id__in=ids[start:start + batch_size]).only("id", "image"))
+            futures = [
+                (product, get_executor().submit(generate_derivatives, media_root, product.image.name))
+                for product in batch
+            ]
+
+            updated = []
+            for product, future in futures:
+                try:
+                    product.image_variants = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"Product {product.id} ({product.image.name}): {exc}")
+                    continue
+                updated.append(product)
+
+            Product.objects.bulk_update(updated, ["image_variants"])
+            for product in updated:
+                product_lookup.invalidate(product.id)
+            done += len(updated)
+            self.stdout.write(f"{done}/{len(ids)} products processed")
+
+        if done:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"Generated images for {done} products, {failed} failed"))
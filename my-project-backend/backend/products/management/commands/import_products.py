@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.bulk import BATCH_SIZE, ImportFormatError, detect_format, import_products
+
+
+class Command(BaseCommand):
+    help = "Import products from a CSV or JSONL file, creating or updating by id."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        def progress(result):
+            self.stdout.write(
+                f"{result.created} created, {result.updated} updated, {result.failed} failed"
+            )
+
+        try:
+            fmt = detect_format(options["path"], options["format"])
+            with open(options["path"], "rb") as f:
+                result = import_products(f, fmt, options["batch_size"], progress)
+        except (ImportFormatError, OSError) as exc:
+            raise CommandError(exc)
+
+        for error in result.errors:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created + result.updated} products, {result.failed} rows failed"
+        ))
+        if result.created:
+            self.stdout.write("Run generate_product_images to create the new products' image variants.")
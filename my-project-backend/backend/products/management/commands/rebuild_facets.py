@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product category table and the facet counts from scratch."
+
+    def handle(self, *args, **options):
+        count = rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} facet counts"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from products.similarity import TOP_K, rebuild_similar_products
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored top-K similar products for the whole catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=TOP_K)
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = rebuild_similar_products(
+            k=options["top_k"], chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt similar products for {count} products"))
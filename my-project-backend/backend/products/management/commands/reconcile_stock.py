@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from products.inventory import stock_discrepancies
+from products.models import StockMovement
+
+
+class Command(BaseCommand):
+    help = "Compare product quantities with the stock movement ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true", help="Append adjustments that close the differences."
+        )
+
+    def handle(self, *args, **options):
+        fixes = []
+        for product_id, quantity, total in stock_discrepancies():
+            self.stdout.write(f"Product {product_id}: quantity {quantity}, ledger {total}")
+            fixes.append(
+                StockMovement(product_id=product_id, delta=quantity - total, reason=StockMovement.ADJUST)
+            )
+
+        if fixes and options["fix"]:
+            StockMovement.objects.bulk_create(fixes, batch_size=1000)
+            self.stdout.write(self.style.SUCCESS(f"Adjusted {len(fixes)} products"))
+        elif fixes:
+            self.stdout.write(self.style.WARNING(f"{len(fixes)} products differ from the ledger"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Stock matches the ledger"))
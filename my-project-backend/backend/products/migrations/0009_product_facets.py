@@ -0,0 +1,79 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:01
+
+import bisect
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+PRICE_BUCKETS = [0, 50000, 100000, 150000, 200000, 300000, 400000]
+
+
+def populate_facets(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductCategory = apps.get_model('products', 'ProductCategory')
+    FacetCount = apps.get_model('products', 'FacetCount')
+
+    counts = Counter()
+    links = []
+    for product in Product.objects.only('id', 'brand', 'category', 'price').iterator():
+        category = product.category
+        if isinstance(category, dict):
+            category = list(category.values())
+        elif not isinstance(category, list):
+            category = [category]
+        values = {str(value)[:100] for value in category if value not in (None, '')}
+
+        i = max(bisect.bisect_right(PRICE_BUCKETS, product.price) - 1, 0)
+        if i + 1 < len(PRICE_BUCKETS):
+            bucket = f'{PRICE_BUCKETS[i]}-{PRICE_BUCKETS[i + 1]}'
+        else:
+            bucket = f'{PRICE_BUCKETS[i]}+'
+
+        counts[('brand', product.brand)] += 1
+        counts[('price', bucket)] += 1
+        for value in values:
+            counts[('category', value)] += 1
+            links.append(ProductCategory(product_id=product.pk, value=value))
+
+    ProductCategory.objects.bulk_create(links, batch_size=2000)
+    FacetCount.objects.bulk_create(
+        [FacetCount(facet=facet, value=value, count=count) for (facet, value), count in counts.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(max_length=100)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_links', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['value', 'product'], name='category_value_product_idx')],
+                'unique_together': {('product', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_balances(apps, schema_editor):
+    # Start every product's ledger with its current quantity.
+    Product = apps.get_model('products', 'Product')
+    StockMovement = apps.get_model('products', 'StockMovement')
+    StockMovement.objects.bulk_create(
+        (
+            StockMovement(product_id=pk, delta=quantity, reason='adjust')
+            for pk, quantity in Product.objects.exclude(quantity=0).values_list('id', 'quantity').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('products', '0011_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('order', 'Order placed'), ('cancel', 'Order cancelled'), ('adjust', 'Stock adjusted')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='orders.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'created_at'], name='stock_product_created_idx')],
+            },
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
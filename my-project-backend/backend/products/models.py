@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 # Create your models here.
 
@@ -13,10 +13,166 @@ class Product(models.Model):
     rating = models.FloatField()
     quantity = models.IntegerField()
     image = models.ImageField(upload_to="products/")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        product = super().from_db(db, field_names, values)
+        product._loaded_quantity = product.__dict__.get("quantity")
+        return product
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_quantity = self.__dict__.get("quantity")
+
+    def save(self, *args, **kwargs):
+        """
+        Saves an existing product without writing ``quantity``: checkouts
+        change it concurrently, so the change made to this copy since it
+        was loaded is added to the stored value by ``inventory.adjust``
+        instead, and the stored value is read back.
+        """
+        from .inventory import adjust
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and not self._state.adding:
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ]
+        if update_fields is None or "quantity" not in update_fields:
+            super().save(*args, **kwargs)
+            if "quantity" in self.__dict__:
+                self._loaded_quantity = self.quantity
+            return
+
+        kwargs["update_fields"] = [name for name in update_fields if name != "quantity"]
+        loaded = getattr(self, "_loaded_quantity", None)
+        if loaded is None:
+            loaded = Product.objects.filter(pk=self.pk).values_list("quantity", flat=True).first() or 0
+
+        with transaction.atomic():
+            if kwargs["update_fields"]:
+                super().save(*args, **kwargs)
+            adjust({self.pk: self.quantity - loaded})
+            self.quantity = Product.objects.filter(pk=self.pk).values_list("quantity", flat=True).first()
+        self._loaded_quantity = self.quantity
+
+    def category_values(self):
+        category = self.category
+        if isinstance(category, dict):
+            category = list(category.values())
+        elif not isinstance(category, list):
+            category = [category]
+        return [str(value) for value in category if value not in (None, "")]
+
+    class Meta:
+        db_table = "account_product"
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="product_created_id_idx"),
+            models.Index(fields=["price", "id"], name="product_price_id_idx"),
+            models.Index(fields=["rating", "id"], name="product_rating_id_idx"),
+        ]
+  
+
+
+class ProductCategory(models.Model):
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="category_links"
+    )
+    value = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ("product", "value")
+        indexes = [
+            models.Index(fields=["value", "product"], name="category_value_product_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.value}"
+
+
+class FacetCount(models.Model):
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
     class Meta:
-        db_table = "account_product"  
\ No newline at end of file
+        unique_together = ("facet", "value")
+
+    def __str__(self):
+        return f"{self.facet}={self.value} ({self.count})"
+
+
+class SimilarProduct(models.Model):
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="similar_links"
+    )
+    similar = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ("product", "similar")
+        indexes = [
+            models.Index(fields=["product", "rank"], name="similar_product_rank_idx"),
+            models.Index(fields=["similar"], name="similar_similar_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} ~ {self.similar_id} ({self.score:.3f})"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of changes to ``Product.quantity``. For every
+    product the deltas sum to its current quantity.
+    """
+
+    ORDER = "order"
+    CANCEL = "cancel"
+    ADJUST = "adjust"
+    REASONS = [
+        (ORDER, "Order placed"),
+        (CANCEL, "Order cancelled"),
+        (ADJUST, "Stock adjusted"),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_movements"
+    )
+    # Kept when the order is deleted, so no database constraint.
+    order = models.ForeignKey(
+        "orders.Order",
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+"
+    )
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASONS)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "created_at"], name="stock_product_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.delta:+d} ({self.reason})"
@@ -0,0 +1,161 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def positive_int(value, default):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a (sort column, id) key.
+
+    Each page is a range scan on the matching composite index instead of an
+    OFFSET, and the trailing ``id`` makes the key unique so cursors stay
+    stable when several products share a price, rating or timestamp.
+    """
+
+    page_size = 24
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering_query_param = "sort"
+
+    orderings = {
+        "newest": ("created_at", True),
+        "oldest": ("created_at", False),
+        "price_asc": ("price", False),
+        "price_desc": ("price", True),
+        "rating": ("rating", True),
+    }
+    default_ordering = "newest"
+
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.sort = request.query_params.get(self.ordering_query_param)
+        if self.sort not in self.orderings:
+            self.sort = self.default_ordering
+        self.field, self.descending = self.orderings[self.sort]
+        self.model_field = queryset.model._meta.get_field(self.field)
+
+        cursor = self.decode_cursor(request)
+        backwards = cursor is not None and cursor["d"] == "p"
+
+        # Walking backwards flips the comparison and the ORDER BY, and the
+        # page is reversed again once it has been read.
+        descending = self.descending != backwards
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(prefix + self.field, prefix + "id")
+
+        if cursor is not None:
+            value, pk = cursor["v"]
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{lookup}": value})
+                | Q(**{self.field: value, f"id__{lookup}": pk})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        size = positive_int(
+            request.query_params.get(self.page_size_query_param), self.page_size
+        )
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            value, pk = cursor["v"]
+            if cursor["s"] != self.sort or cursor["d"] not in ("n", "p"):
+                raise ValueError
+            cursor["v"] = (self.parse_cursor_value(value), int(pk))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return cursor
+
+    def parse_cursor_value(self, value):
+        # Cursors come back from the client, so the value is coerced to the
+        # sort column's type before it reaches the WHERE clause.
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise ValueError
+        value = self.model_field.to_python(value)
+        if value is None:
+            raise ValueError
+        return value
+
+    def encode_cursor(self, product, direction):
+        value = getattr(product, self.field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        cursor = {"s": self.sort, "d": direction, "v": [value, product.pk]}
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(cursor, separators=(",", ":")).encode()
+        ).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], "n")
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], "p")
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
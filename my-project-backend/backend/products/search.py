@@ -0,0 +1,243 @@
+import bisect
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from .cache import consistent_reads, get_catalog_version
+from .models import Product
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# How much a term is worth depending on where it appears.
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "brand": 2.5,
+    "category": 2.0,
+    "specs": 1.0,
+}
+
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.7
+FUZZY_MATCH = 0.5
+
+PREFIX_EXPANSIONS = 20
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(term):
+    if len(term) <= 3:
+        return 0
+    if len(term) <= 7:
+        return 1
+    return 2
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, giving up as soon as it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def product_fields(product):
+    return {
+        "name": product.name,
+        "brand": product.brand,
+        "category": " ".join(product.category_values()),
+        "specs": product.specs,
+    }
+
+
+class ProductSearchIndex:
+    """
+    In-memory inverted index over the searchable product columns.
+
+    Only product ids and term weights are kept here; the matching page is
+    loaded from the database by primary key once the ranking is known. The
+    index remembers the catalog version it reflects and is rebuilt when a
+    write from another process moves the version on.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._trigrams = defaultdict(set)
+        self._vocabulary = []
+
+    @property
+    def is_built(self):
+        return self._version is not None
+
+    def build(self, version=None):
+        if version is None:
+            version = get_catalog_version()
+        with self._lock, consistent_reads():
+            self._reset()
+            products = Product.objects.only(
+                "id", "name", "brand", "specs", "category"
+            ).iterator(chunk_size=2000)
+            for product in products:
+                self._add(product.pk, product_fields(product), sort=False)
+            self._vocabulary = sorted(self._postings)
+            self._version = version
+
+    def ensure_built(self):
+        version = get_catalog_version()
+        if self._version != version:
+            self.build(version)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._version = None
+
+    def update(self, product, version=None):
+        if not self.is_built:
+            return
+        with self._lock:
+            self._remove(product.pk)
+            self._add(product.pk, product_fields(product), sort=True)
+            self._advance(version)
+
+    def remove(self, product_id, version=None):
+        if not self.is_built:
+            return
+        with self._lock:
+            self._remove(product_id)
+            self._advance(version)
+
+    def _advance(self, version):
+        # Only skip the rebuild when this write is the sole change since the
+        # index was last current; otherwise another worker changed the catalog.
+        if version is not None and self._version == version - 1:
+            self._version = version
+
+    def _add(self, product_id, fields, sort):
+        weights = defaultdict(float)
+        for field, text in fields.items():
+            for term in tokenize(text):
+                weights[term] += FIELD_WEIGHTS[field]
+
+        for term, weight in weights.items():
+            if term not in self._postings:
+                for gram in trigrams(term):
+                    self._trigrams[gram].add(term)
+                if sort:
+                    bisect.insort(self._vocabulary, term)
+            self._postings[term][product_id] = weight
+
+        self._doc_terms[product_id] = set(weights)
+
+    def _remove(self, product_id):
+        for term in self._doc_terms.pop(product_id, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if postings:
+                continue
+
+            del self._postings[term]
+            for gram in trigrams(term):
+                terms = self._trigrams.get(gram)
+                if terms is not None:
+                    terms.discard(term)
+                    if not terms:
+                        del self._trigrams[gram]
+            i = bisect.bisect_left(self._vocabulary, term)
+            if i < len(self._vocabulary) and self._vocabulary[i] == term:
+                del self._vocabulary[i]
+
+    def _expand(self, term):
+        """Index terms that ``term`` may refer to, with a match quality."""
+        matches = {}
+        if term in self._postings:
+            matches[term] = EXACT_MATCH
+
+        if len(term) >= 2:
+            i = bisect.bisect_left(self._vocabulary, term)
+            end = min(i + PREFIX_EXPANSIONS, len(self._vocabulary))
+            while i < end and self._vocabulary[i].startswith(term):
+                matches.setdefault(self._vocabulary[i], PREFIX_MATCH)
+                i += 1
+
+        limit = max_edits(term)
+        if limit:
+            grams = trigrams(term)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigrams.get(gram, ()))
+
+            # A single edit can break at most three trigrams.
+            needed = len(grams) - 3 * limit
+            for candidate, count in shared.items():
+                if candidate in matches or count < needed:
+                    continue
+                if edit_distance(term, candidate, limit) <= limit:
+                    matches[candidate] = FUZZY_MATCH
+
+        return matches
+
+    def search(self, query):
+        """Return matching product ids, best match first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        self.ensure_built()
+
+        with self._lock:
+            total = len(self._doc_terms) or 1
+            scores = defaultdict(float)
+            hits = defaultdict(int)
+
+            for term in terms:
+                best = {}
+                for match, quality in self._expand(term).items():
+                    postings = self._postings[match]
+                    idf = math.log(1 + total / len(postings))
+                    for product_id, weight in postings.items():
+                        score = quality * idf * weight
+                        if score > best.get(product_id, 0):
+                            best[product_id] = score
+
+                for product_id, score in best.items():
+                    scores[product_id] += score
+                    hits[product_id] += 1
+
+        # Products matching more of the query terms always rank first.
+        return sorted(
+            scores,
+            key=lambda product_id: (-hits[product_id], -scores[product_id], product_id),
+        )
+
+
+search_index = ProductSearchIndex()
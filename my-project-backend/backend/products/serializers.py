@@ -1,11 +1,91 @@
 import json
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from .imaging import hashed_name
 from .models import Product
 
 
+# The compact representation used wherever products are listed.
+CARD_FIELDS = ("id", "name", "brand", "price", "rating", "image", "images", "in_stock")
+
+# Card fields plus the one-line specs shown under cart and wishlist lines.
+LINE_ITEM_FIELDS = CARD_FIELDS + ("specs",)
+
+# The columns read and written by bulk import and export.
+IMPORT_FIELDS = (
+    "id", "name", "specs", "description", "brand", "category",
+    "price", "rating", "quantity", "image",
+)
+
+# Model columns each serializer field is computed from, where not its own.
+FIELD_COLUMNS = {
+    "in_stock": ("quantity",),
+    "images": ("image", "image_variants"),
+    "image": ("image", "image_variants"),
+}
+
+
+def current_variants(product):
+    """The stored image variants, unless they describe a replaced image."""
+    variants = product.image_variants
+    if not variants or variants.get("source", product.image.name) != product.image.name:
+        return None
+    return variants
+
+
+class HashedImageField(serializers.ImageField):
+    """Links the content-hashed name of the image once it is known."""
+
+    def to_representation(self, value):
+        variants = current_variants(value.instance) if value else None
+        if not variants or not variants.get("hash"):
+            return super().to_representation(value)
+
+        url = default_storage.url(hashed_name(value.name, variants["hash"]))
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request is not None else url
+
+
 class ProductSerializer(serializers.ModelSerializer):
+    """
+    Pass ``fields`` or ``exclude`` to serialize only a subset of the fields,
+    e.g. ``ProductSerializer(products, many=True, fields=CARD_FIELDS)``.
+    """
+
     category = serializers.JSONField()
     description = serializers.JSONField()
+    in_stock = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
+    image = HashedImageField()
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in exclude or ():
+            self.fields.pop(name, None)
+
+    def get_in_stock(self, obj):
+        return obj.quantity > 0
+
+    def get_images(self, obj):
+        """Resized JPEG/WebP URLs and an inline placeholder, once generated."""
+        variants = current_variants(obj)
+        if not variants:
+            return None
+
+        images = {"placeholder": variants.get("placeholder")}
+        for label, entry in variants.items():
+            if isinstance(entry, dict):
+                images[label] = {
+                    "width": entry["width"],
+                    "height": entry["height"],
+                    "jpg": default_storage.url(entry["jpg"]),
+                    "webp": default_storage.url(entry["webp"]),
+                }
+        return images
 
     def validate_category(self, value):
         
@@ -30,3 +110,74 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = "__all__"
+
+
+class ProductImportSerializer(ProductSerializer):
+    """
+    Validates one bulk import row. ``image`` names a file already in media
+    storage, and a row with an ``id`` updates that product.
+    """
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    image = serializers.CharField(max_length=100)
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("fields", IMPORT_FIELDS)
+        super().__init__(*args, **kwargs)
+        self._existing_images = {}
+
+    def validate_image(self, value):
+        if value not in self._existing_images:
+            self._existing_images[value] = default_storage.exists(value)
+        if not self._existing_images[value]:
+            raise serializers.ValidationError("No such file in media storage")
+        return value
+
+
+def validate_rows(rows):
+    """
+    Validate a batch of ``(line, data)`` import rows, returning the valid
+    ``(line, validated_data)`` pairs and the ``(line, errors)`` of the rest.
+    """
+    serializer = ProductImportSerializer()
+    valid, invalid = [], []
+    for line, data in rows:
+        if data.get("id") in ("", None):
+            data.pop("id", None)
+        try:
+            valid.append((line, serializer.run_validation(data)))
+        except serializers.ValidationError as exc:
+            invalid.append((line, exc.detail))
+    return valid, invalid
+
+
+def product_field_names():
+    return tuple(ProductSerializer().fields)
+
+
+def requested_fields(params, default=None):
+    """
+    Resolve the ``fields``/``exclude`` query parameters to a tuple of field
+    names, or ``default`` (all fields when None) if neither is given.
+    """
+    available = product_field_names()
+
+    def parse(name):
+        values = [v.strip() for v in params.get(name, "").split(",") if v.strip()]
+        unknown = sorted(set(values) - set(available))
+        if unknown:
+            raise serializers.ValidationError({name: f"Unknown fields: {', '.join(unknown)}"})
+        return values
+
+    fields = parse("fields")
+    exclude = parse("exclude")
+    if not fields:
+        fields = default or available
+    return tuple(name for name in fields if name not in exclude)
+
+
+def product_columns(fields):
+    """Model columns needed to serialize ``fields``, for ``QuerySet.only()``."""
+    return tuple(dict.fromkeys(
+        column for name in fields for column in FIELD_COLUMNS.get(name, (name,))
+    ))
@@ -0,0 +1,72 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version
+from .facets import apply_facet_changes, facet_keys, sync_categories
+from .inventory import record_adjustment
+from .lookup import product_lookup
+from .models import Product, SimilarProduct
+from .search import search_index
+from .similarity import schedule_refresh, similarity_index
+from .suggest import suggestion_index
+
+
+# Saves that only touch these columns don't affect facets or similarity.
+PRESENTATION_FIELDS = {"image_variants"}
+
+
+def presentation_only(update_fields):
+    return update_fields is not None and set(update_fields) <= PRESENTATION_FIELDS
+
+
+@receiver(pre_save, sender=Product)
+def product_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or presentation_only(update_fields):
+        return
+    stored = None
+    if instance.pk:
+        stored = Product.objects.filter(pk=instance.pk).only("brand", "category", "price").first()
+    instance._stored_facet_keys = facet_keys(stored) if stored is not None else set()
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    full_update = not raw and not presentation_only(update_fields)
+
+    if full_update:
+        apply_facet_changes(getattr(instance, "_stored_facet_keys", set()), facet_keys(instance))
+        sync_categories(instance)
+    if created and not raw:
+        # Later changes go through inventory.adjust (see Product.save).
+        record_adjustment(instance.pk, instance.quantity)
+
+    version = bump_catalog_version()
+    search_index.update(instance, version)
+    suggestion_index.update(instance, version)
+    similarity_index.update(instance, version)
+    product_lookup.invalidate(instance.pk)
+
+    if full_update:
+        schedule_refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=Product)
+def product_deleting(sender, instance, **kwargs):
+    # The cascade removes the rows pointing at this product before
+    # post_delete runs, so remember whose lists need recomputing.
+    instance._similar_referrers = list(
+        SimilarProduct.objects.filter(similar_id=instance.pk).values_list("product_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    apply_facet_changes(facet_keys(instance), set())
+
+    version = bump_catalog_version()
+    search_index.remove(instance.pk, version)
+    suggestion_index.remove(instance.pk, version)
+    similarity_index.remove(instance.pk, version)
+    product_lookup.invalidate(instance.pk)
+
+    schedule_refresh([instance.pk], referrers=getattr(instance, "_similar_referrers", ()))
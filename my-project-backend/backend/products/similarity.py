@@ -0,0 +1,326 @@
+import math
+import threading
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Min
+from scipy import sparse
+
+from .cache import consistent_reads, get_catalog_version
+from .models import Product, SimilarProduct
+from .search import tokenize
+from tasks.queue import enqueue, handler
+
+
+TOP_K = 8
+
+REFRESH = "similar_products.refresh"
+
+# Relative importance of each kind of feature before idf weighting.
+BRAND_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+PRICE_WEIGHT = 2.0
+NEAR_PRICE_WEIGHT = 1.0
+SPECS_WEIGHT = 1.0
+
+# Prices within the same 25% band count as the same price point.
+PRICE_BAND_RATIO = 1.25
+
+# Features on more than this share of the catalog are not scored, once
+# the catalog is big enough for the share to say something.
+COMMON_FEATURE_SHARE = 0.5
+COMMON_FEATURE_MIN_PRODUCTS = 20
+
+
+def price_band(price):
+    return int(math.log(max(price, 1), PRICE_BAND_RATIO))
+
+
+def raw_features(product):
+    band = price_band(product.price)
+    features = {
+        f"brand:{product.brand.lower()}": BRAND_WEIGHT,
+        f"price:{band}": PRICE_WEIGHT,
+        f"price:{band - 1}": NEAR_PRICE_WEIGHT,
+        f"price:{band + 1}": NEAR_PRICE_WEIGHT,
+    }
+    for value in product.category_values():
+        features[f"category:{value.lower()}"] = CATEGORY_WEIGHT
+    for token in tokenize(product.specs):
+        features.setdefault(f"specs:{token}", SPECS_WEIGHT)
+    return features
+
+
+class SimilarityIndex:
+    """
+    Idf-weighted, unit-length feature vectors held as a sparse product x
+    feature matrix.
+
+    Products are scored against the whole catalog in batches with one
+    sparse matrix product, so the work follows the shared features rather
+    than pairs of products walked in Python. Features carried by most of
+    the catalog (a busy price band, "intel", "ram") are left out: they add
+    nothing to the ranking but would make every row of the product dense.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self._raw = {}
+        self._drop_matrix()
+
+    def _drop_matrix(self):
+        self._ids = None
+        self._rows = None
+        self._features = None
+        self._matrix = None
+        self._transposed = None
+
+    @property
+    def is_built(self):
+        return self._version is not None
+
+    def build(self, version=None):
+        if version is None:
+            version = get_catalog_version()
+        with self._lock, consistent_reads():
+            self._reset()
+            products = Product.objects.only(
+                "id", "brand", "category", "price", "specs"
+            ).iterator(chunk_size=2000)
+            for product in products:
+                self._raw[product.pk] = raw_features(product)
+            self._version = version
+
+    def ensure_built(self):
+        version = get_catalog_version()
+        if self._version != version:
+            self.build(version)
+
+    def sync(self, pks):
+        """
+        Reload ``pks`` from the database and take the current catalog
+        version, for a process whose index did not see those products'
+        signals. Builds the whole index the first time.
+        """
+        if not self.is_built:
+            self.build()
+            return
+        version = get_catalog_version()
+        with self._lock, consistent_reads():
+            products = Product.objects.only("id", "brand", "category", "price", "specs").filter(pk__in=list(pks))
+            found = {product.pk: raw_features(product) for product in products}
+            for pk in pks:
+                if pk in found:
+                    self._raw[pk] = found[pk]
+                else:
+                    self._raw.pop(pk, None)
+            self._drop_matrix()
+            self._version = version
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._version = None
+
+    def __contains__(self, pk):
+        return pk in self._raw
+
+    def _build_matrix(self):
+        total = len(self._raw)
+        document_frequency = Counter(feature for features in self._raw.values() for feature in features)
+        limit = total * COMMON_FEATURE_SHARE if total >= COMMON_FEATURE_MIN_PRODUCTS else total
+        self._features = {
+            feature: column
+            for column, feature in enumerate(sorted(f for f, df in document_frequency.items() if df <= limit))
+        }
+        idf = np.log1p(total / np.array(
+            [document_frequency[feature] for feature in self._features], dtype=np.float64
+        ))
+
+        self._ids = np.fromiter(self._raw, dtype=np.int64, count=total)
+        self._rows = {pk: row for row, pk in enumerate(self._ids.tolist())}
+        rows, columns, weights = [], [], []
+        for row, features in enumerate(self._raw.values()):
+            for feature, weight in features.items():
+                column = self._features.get(feature)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+                    weights.append(weight)
+
+        columns = np.array(columns, dtype=np.int64)
+        matrix = sparse.csr_matrix(
+            (np.array(weights, dtype=np.float64) * idf[columns], (np.array(rows, dtype=np.int64), columns)),
+            shape=(total, len(self._features)),
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        self._matrix = sparse.diags(1 / norms) @ matrix
+        self._transposed = self._matrix.T.tocsc()
+
+    def _ensure_matrix(self):
+        self.ensure_built()
+        with self._lock:
+            if self._matrix is None:
+                self._build_matrix()
+            return self._ids, self._rows, self._matrix, self._transposed
+
+    def features(self):
+        """The features that take part in scoring."""
+        self._ensure_matrix()
+        return set(self._features)
+
+    def update(self, product, version=None):
+        if not self.is_built:
+            return
+        with self._lock:
+            self._raw[product.pk] = raw_features(product)
+            self._drop_matrix()
+            self._advance(version)
+
+    def remove(self, pk, version=None):
+        if not self.is_built:
+            return
+        with self._lock:
+            self._raw.pop(pk, None)
+            self._drop_matrix()
+            self._advance(version)
+
+    def _advance(self, version):
+        if version is not None and self._version == version - 1:
+            self._version = version
+
+    def score_rows(self, pks):
+        """
+        Yield ``(pk, other ids, scores)`` for each of ``pks`` in the index,
+        with the cosine similarity to every other product sharing a feature.
+        """
+        ids, rows, matrix, transposed = self._ensure_matrix()
+        present = [pk for pk in pks if pk in rows]
+        if not present:
+            return
+        scores = (matrix[[rows[pk] for pk in present]] @ transposed).tocsr()
+        for position, pk in enumerate(present):
+            start, end = scores.indptr[position], scores.indptr[position + 1]
+            others = ids[scores.indices[start:end]]
+            values = scores.data[start:end]
+            keep = (others != pk) & (values > 0)
+            yield pk, others[keep], values[keep]
+
+    def scores(self, pk):
+        """Cosine similarity of ``pk`` to every product sharing a feature."""
+        for _, others, values in self.score_rows([pk]):
+            return dict(zip(others.tolist(), values.tolist()))
+        return {}
+
+    def neighbours_many(self, pks, k=TOP_K):
+        """``{pk: [(other, score), ...]}`` with the top ``k`` for each of ``pks``."""
+        found = {pk: [] for pk in pks}
+        for pk, others, values in self.score_rows(pks):
+            if len(values) > k:
+                # Everything tied with the k-th score, so ties break by id.
+                keep = values >= np.partition(values, len(values) - k)[len(values) - k]
+                others, values = others[keep], values[keep]
+            order = np.lexsort((others, -values))[:k]
+            found[pk] = list(zip(others[order].tolist(), values[order].tolist()))
+        return found
+
+    def neighbours(self, pk, k=TOP_K):
+        return self.neighbours_many([pk], k)[pk]
+
+    def product_ids(self):
+        self.ensure_built()
+        with self._lock:
+            return list(self._raw)
+
+
+similarity_index = SimilarityIndex()
+
+
+def store_neighbours(neighbours_by_product):
+    """Replace the stored top-K rows for each product in the mapping."""
+    # The index can briefly hold products whose insert was rolled back.
+    referenced = set(neighbours_by_product)
+    for neighbours in neighbours_by_product.values():
+        referenced.update(other for other, score in neighbours)
+    existing = set(Product.objects.filter(id__in=referenced).values_list("id", flat=True))
+
+    rows = [
+        SimilarProduct(product_id=pk, similar_id=other, score=score, rank=rank)
+        for pk, neighbours in neighbours_by_product.items()
+        if pk in existing
+        for rank, (other, score) in enumerate(
+            [item for item in neighbours if item[0] in existing], 1
+        )
+    ]
+    with transaction.atomic():
+        SimilarProduct.objects.filter(product_id__in=list(neighbours_by_product)).delete()
+        SimilarProduct.objects.bulk_create(rows, batch_size=1000)
+
+
+def refresh_products(pks, k=TOP_K, referrers=()):
+    """
+    Recompute the neighbour lists a change to ``pks`` can affect.
+
+    That is the products' own lists (where they still exist), the lists
+    that referred to them, and the lists they now score high enough to
+    enter.
+    """
+    pks = set(pks)
+    scored = {pk: dict(zip(others.tolist(), values.tolist())) for pk, others, values in
+              similarity_index.score_rows(sorted(pks))}
+    affected = set(referrers) | set(scored)
+    affected.update(
+        SimilarProduct.objects.filter(similar_id__in=list(pks)).values_list("product_id", flat=True)
+    )
+
+    candidates = {other for scores in scored.values() for other in scores}
+    if candidates:
+        thresholds = {
+            row["product_id"]: (row["count"], row["lowest"])
+            for row in SimilarProduct.objects.filter(product_id__in=list(candidates))
+            .values("product_id")
+            .annotate(count=Count("id"), lowest=Min("score"))
+        }
+        # Lists that were never computed are left to the rebuild command.
+        for scores in scored.values():
+            for other, score in scores.items():
+                if other not in thresholds:
+                    continue
+                count, lowest = thresholds[other]
+                if count < k or score > lowest:
+                    affected.add(other)
+
+    affected -= pks - set(scored)
+    store_neighbours(similarity_index.neighbours_many(sorted(affected), k))
+
+
+def schedule_refresh(pks, referrers=()):
+    """Have a task worker refresh the lists a change to ``pks`` affects."""
+    enqueue(REFRESH, {"product_ids": sorted(pks), "referrers": sorted(referrers)})
+
+
+@handler(REFRESH, batch_size=100)
+def refresh_from_queue(payloads):
+    # One refresh for the whole batch, however many saves queued it.
+    pks = {pk for payload in payloads for pk in payload["product_ids"]}
+    referrers = {pk for payload in payloads for pk in payload["referrers"]}
+    similarity_index.sync(pks)
+    refresh_products(pks, referrers=referrers)
+    return [None] * len(payloads)
+
+
+def rebuild_similar_products(k=TOP_K, chunk_size=500):
+    similarity_index.build()
+    product_ids = similarity_index.product_ids()
+
+    for start in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[start:start + chunk_size]
+        store_neighbours(similarity_index.neighbours_many(chunk, k))
+
+    return len(product_ids)
@@ -0,0 +1,127 @@
+import bisect
+import threading
+
+from .cache import consistent_reads, get_catalog_version
+from .models import Product
+from .search import tokenize
+
+
+SCAN_LIMIT = 500
+
+
+def suggestion_keys(name, brand, categories):
+    """Every normalised string a prefix query can match a product through."""
+    words = tokenize(name)
+    keys = {" ".join(words[i:]) for i in range(len(words))}
+    keys.update(" ".join(tokenize(value)) for value in [brand, *categories])
+    keys.discard("")
+    return keys
+
+
+class SuggestionIndex:
+    """
+    Sorted array of (key, product id) pairs answered with bisect.
+
+    Every word-boundary suffix of a product name is a key, as are its brand
+    and categories, so typing any word of a name, a brand or a category
+    finds the product. Matches are ranked by rating.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self._entries = []
+        self._products = {}
+
+    @property
+    def is_built(self):
+        return self._version is not None
+
+    def build(self, version=None):
+        if version is None:
+            version = get_catalog_version()
+        with self._lock, consistent_reads():
+            self._reset()
+            entries = []
+            products = Product.objects.only(
+                "id", "name", "brand", "category", "rating"
+            ).iterator(chunk_size=2000)
+            for product in products:
+                keys = self._store(product)
+                entries.extend((key, product.pk) for key in keys)
+            entries.sort()
+            self._entries = entries
+            self._version = version
+
+    def ensure_built(self):
+        version = get_catalog_version()
+        if self._version != version:
+            self.build(version)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._version = None
+
+    def _store(self, product):
+        keys = suggestion_keys(product.name, product.brand, product.category_values())
+        self._products[product.pk] = (product.name, product.brand, product.rating, keys)
+        return keys
+
+    def _remove(self, product_id):
+        stored = self._products.pop(product_id, None)
+        if stored is None:
+            return
+        for key in stored[3]:
+            i = bisect.bisect_left(self._entries, (key, product_id))
+            if i < len(self._entries) and self._entries[i] == (key, product_id):
+                del self._entries[i]
+
+    def update(self, product, version=None):
+        if not self.is_built:
+            return
+        with self._lock:
+            self._remove(product.pk)
+            for key in self._store(product):
+                bisect.insort(self._entries, (key, product.pk))
+            self._advance(version)
+
+    def remove(self, product_id, version=None):
+        if not self.is_built:
+            return
+        with self._lock:
+            self._remove(product_id)
+            self._advance(version)
+
+    def _advance(self, version):
+        if version is not None and self._version == version - 1:
+            self._version = version
+
+    def suggest(self, query, limit):
+        prefix = " ".join(tokenize(query))
+        if not prefix:
+            return []
+
+        self.ensure_built()
+
+        with self._lock:
+            matches = set()
+            i = bisect.bisect_left(self._entries, (prefix,))
+            end = min(i + SCAN_LIMIT, len(self._entries))
+            while i < end and self._entries[i][0].startswith(prefix):
+                matches.add(self._entries[i][1])
+                i += 1
+
+            products = [(pk, self._products[pk]) for pk in matches]
+
+        products.sort(key=lambda item: (-item[1][2], item[1][0]))
+        return [
+            {"id": pk, "name": name, "brand": brand}
+            for pk, (name, brand, rating, keys) in products[:limit]
+        ]
+
+
+suggestion_index = SuggestionIndex()
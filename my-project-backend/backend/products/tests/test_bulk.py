@@ -0,0 +1,188 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from products.bulk import copy_rows, copy_values, export_products, import_products
+from products.models import FacetCount, Product
+from products.tests.test_search import make_product
+
+
+CSV_HEADER = "id,name,specs,description,brand,category,price,rating,quantity,image\n"
+
+
+class BulkImportExportTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(f"{self.media_root}/products")
+        open(f"{self.media_root}/products/test.jpg", "wb").close()
+
+        admin = User.objects.create_user("admin", password="x", is_staff=True)
+        self.client.force_authenticate(admin)
+
+    def upload(self, name, content, **data):
+        data["file"] = SimpleUploadedFile(name, content.encode())
+        return self.client.post("/api/products/admin/import/", data, format="multipart")
+
+    def test_csv_import_creates_updates_and_reports_bad_rows(self):
+        existing = make_product(name="Old Name", brand="HP")
+        content = CSV_HEADER + (
+            ',Acer Swift 14,Intel Ultra 7,"[""Thin""]",Acer,"[""Work""]",89990,4.4,5,products/test.jpg\n'
+            f'{existing.id},New Name,Ryzen 7,[],HP,"[""Gaming""]",120000,4.1,2,products/test.jpg\n'
+            ',No Price,x,[],Acer,[],,4.0,1,products/test.jpg\n'
+            ',Missing Image,x,[],Acer,[],100,4.0,1,products/missing.jpg\n'
+            '999999,Ghost,x,[],Acer,[],100,4.0,1,products/test.jpg\n'
+        )
+
+        response = self.upload("products.csv", content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.data["created"], response.data["updated"], response.data["failed"]), (1, 1, 3)
+        )
+        self.assertEqual(
+            sorted((error["line"], list(error["errors"])) for error in response.data["errors"]),
+            [(4, ["price"]), (5, ["image"]), (6, ["id"])],
+        )
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.category), ("New Name", ["Gaming"]))
+        acer = Product.objects.get(name="Acer Swift 14")
+        self.assertEqual((acer.description, acer.price), (["Thin"], 89990))
+
+        # Signals were bypassed, so the derived tables are rebuilt afterwards.
+        brands = dict(FacetCount.objects.filter(facet="brand").values_list("value", "count"))
+        self.assertEqual(brands, {"Acer": 1, "HP": 1})
+        results = self.client.get("/api/products/", {"search": "swift"}).json()["results"]
+        self.assertEqual([product["id"] for product in results], [acer.id])
+
+    def test_jsonl_import_in_small_batches(self):
+        lines = [
+            json.dumps({
+                "name": f"Laptop {i}", "specs": "i5", "description": ["x"], "brand": "Asus",
+                "category": ["Student"], "price": 50000 + i, "rating": 4.0, "quantity": 1,
+                "image": "products/test.jpg",
+            })
+            for i in range(5)
+        ]
+        lines.insert(2, "not json")
+
+        result = import_products(io.BytesIO("\n".join(lines).encode()), "jsonl", batch_size=2)
+
+        self.assertEqual((result.created, result.failed), (5, 1))
+        self.assertEqual(result.errors[0]["line"], 3)
+        self.assertEqual(Product.objects.filter(brand="Asus").count(), 5)
+
+    def test_unsupported_format_is_rejected(self):
+        response = self.upload("products.xlsx", "whatever")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_round_trips_through_import(self):
+        make_product(name="Dell XPS 13", description={"color": "silver"}, category=["Work"])
+        make_product(name="HP Envy", category=["Student", "Work"])
+
+        response = self.client.get("/api/products/admin/export/", {"file_format": "csv"})
+        self.assertTrue(response.streaming)
+        exported = b"".join(response.streaming_content)
+
+        Product.objects.update(name="Renamed", category=[], description=[])
+        result = import_products(io.BytesIO(exported), "csv")
+
+        self.assertEqual((result.updated, result.failed), (2, 0))
+        self.assertEqual(
+            sorted(Product.objects.values_list("name", "category", "description")),
+            [("Dell XPS 13", ["Work"], {"color": "silver"}), ("HP Envy", ["Student", "Work"], ["Test Laptop"])],
+        )
+
+    def test_jsonl_export_streams_in_chunks(self):
+        for i in range(5):
+            make_product(name=f"Laptop {i}")
+
+        lines = list(export_products("jsonl", chunk_size=2))
+
+        self.assertEqual([json.loads(line)["name"] for line in lines], [f"Laptop {i}" for i in range(5)])
+
+    def test_management_commands(self):
+        make_product(name="Dell XPS 13")
+        path = f"{self.media_root}/export.jsonl"
+
+        call_command("export_products", path, format="jsonl")
+        Product.objects.update(name="Renamed")
+        out = StringIO()
+        call_command("import_products", path, stdout=out, stderr=StringIO())
+
+        self.assertIn("Imported 1 products, 0 rows failed", out.getvalue())
+        self.assertEqual(Product.objects.get().name, "Dell XPS 13")
+
+
+class Psycopg3Cursor:
+
+    def __init__(self):
+        self.rows = []
+
+    def copy(self, sql):
+        self.sql = sql
+        cursor = self
+
+        class Copy:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def write_row(self, row):
+                cursor.rows.append(row)
+
+        return Copy()
+
+
+class Psycopg2Cursor:
+
+    def copy_expert(self, sql, file):
+        self.sql = sql
+        self.data = file.read()
+
+
+class CopyRowsTest(SimpleTestCase):
+
+    SQL = "COPY account_product (name) FROM STDIN"
+
+    def test_psycopg3_cursors_write_rows(self):
+        cursor = Psycopg3Cursor()
+
+        copy_rows(cursor, self.SQL, iter([["Acer", 1], ["HP", None]]))
+
+        self.assertEqual((cursor.sql, cursor.rows), (self.SQL, [["Acer", 1], ["HP", None]]))
+
+    def test_psycopg2_cursors_get_escaped_text(self):
+        cursor = Psycopg2Cursor()
+
+        copy_rows(cursor, self.SQL, iter([["Tab\there", None, True], ["Back\\slash\nline", 4.5, False]]))
+
+        self.assertEqual(cursor.sql, self.SQL)
+        self.assertEqual(cursor.data, "Tab\\there\t\\N\tt\nBack\\\\slash\\nline\t4.5\tf\n")
+
+    def test_json_columns_are_sent_as_json_text(self):
+        product = Product(
+            name="Acer", specs="x", description=["Thin"], brand="Acer", category={"a": "Work"},
+            price=100, rating=4.0, quantity=1, image="products/test.jpg",
+        )
+        fields = [Product._meta.get_field(name) for name in ("description", "category", "image", "price")]
+
+        self.assertEqual(copy_values(product, fields), ['["Thin"]', '{"a": "Work"}', "products/test.jpg", 100])
@@ -0,0 +1,84 @@
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from products.cache import get_catalog_version
+from products.inventory import take_stock
+from products.tests.test_search import make_product
+
+
+class CatalogCacheTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(name="Acer Predator Helios")
+
+    def test_product_writes_bump_the_catalog_version(self):
+        version = get_catalog_version()
+
+        self.product.price = 1
+        self.product.save()
+        self.assertEqual(get_catalog_version(), version + 1)
+
+        self.product.delete()
+        self.assertEqual(get_catalog_version(), version + 2)
+
+    def test_repeat_requests_skip_the_database(self):
+        first = self.client.get("/api/products/")
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/products/")
+            not_modified = self.client.get(
+                "/api/products/", HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], first["ETag"])
+
+    def test_stock_changes_reach_pages_showing_quantity(self):
+        url = f"/api/products/{self.product.id}/"
+        self.assertEqual(self.client.get(url).json()["quantity"], 10)
+        self.client.get("/api/products/")
+        self.client.get("/api/products/", {"fields": "id,quantity"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            take_stock([(self.product.id, 2)])
+
+        self.assertEqual(self.client.get(url).json()["quantity"], 8)
+        self.assertEqual(
+            self.client.get("/api/products/", {"fields": "id,quantity"}).json()["results"][0]["quantity"], 8
+        )
+        # Card pages only show in_stock, which has not changed.
+        with self.assertNumQueries(0):
+            self.client.get("/api/products/")
+
+    def test_detail_etag_changes_after_a_write(self):
+        url = f"/api/products/{self.product.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        self.product.name = "Acer Predator Helios Neo"
+        self.product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn(b"Helios Neo", response.content)
+
+    def test_missing_products_are_not_cached(self):
+        self.assertEqual(self.client.get("/api/products/999/").status_code, 404)
+        self.assertEqual(self.client.get("/api/products/999/").status_code, 404)
+
+    def test_stale_page_is_served_while_another_worker_rebuilds(self):
+        url = "http://testserver/api/products/"
+        stale = self.client.get(url).content
+
+        make_product(name="Acer Nitro V")
+        key_hash = hashlib.md5(url.encode()).hexdigest()
+        cache.add(f"catalog:page:{get_catalog_version()}:{key_hash}:lock", 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEqual(response.content, stale)
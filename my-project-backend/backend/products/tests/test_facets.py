@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from products.facets import price_bucket
+from products.models import FacetCount, ProductCategory
+from products.tests.test_search import make_product
+
+
+def counts(facet):
+    return dict(
+        FacetCount.objects.filter(facet=facet, count__gt=0).values_list("value", "count")
+    )
+
+
+class FacetMaintenanceTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.hp = make_product(brand="HP", category=["Gaming", "Work"], price=120000)
+        self.dell = make_product(brand="Dell", category=["Gaming"], price=450000, quantity=0)
+
+    def test_price_buckets(self):
+        self.assertEqual(price_bucket(0), "0-50000")
+        self.assertEqual(price_bucket(120000), "100000-150000")
+        self.assertEqual(price_bucket(999999), "400000+")
+
+    def test_counts_follow_product_writes(self):
+        self.assertEqual(counts("brand"), {"HP": 1, "Dell": 1})
+        self.assertEqual(counts("category"), {"Gaming": 2, "Work": 1})
+
+        self.hp.category = ["Student"]
+        self.hp.brand = "Dell"
+        self.hp.save()
+        self.dell.delete()
+
+        self.assertEqual(counts("brand"), {"Dell": 1})
+        self.assertEqual(counts("category"), {"Student": 1})
+        self.assertEqual(counts("price"), {"100000-150000": 1})
+        self.assertEqual(
+            list(ProductCategory.objects.values_list("product_id", "value")),
+            [(self.hp.id, "Student")],
+        )
+
+    def test_rebuild_command_matches_incremental_counts(self):
+        before = list(FacetCount.objects.order_by("facet", "value").values_list("facet", "value", "count"))
+        FacetCount.objects.all().delete()
+
+        call_command("rebuild_facets", stdout=StringIO())
+
+        after = list(FacetCount.objects.order_by("facet", "value").values_list("facet", "value", "count"))
+        self.assertEqual(after, before)
+
+    def test_list_filters_and_facets_block(self):
+        response = self.client.get("/api/products/", {"category": "Gaming", "in_stock": "1"})
+        data = response.json()
+        self.assertEqual([p["id"] for p in data["results"]], [self.hp.id])
+        self.assertEqual(data["facets"]["categories"][0], {"value": "Gaming", "count": 2})
+
+        response = self.client.get("/api/products/", {"brand": "hp,dell", "min_price": 200000})
+        self.assertEqual([p["id"] for p in response.json()["results"]], [self.dell.id])
+
+        response = self.client.get("/api/products/", {"min_price": "cheap"})
+        self.assertEqual(response.status_code, 400)
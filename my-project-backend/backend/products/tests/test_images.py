@@ -0,0 +1,103 @@
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+from products.imaging import content_hash, generate_derivatives
+from products.models import Product
+
+
+def jpeg_upload(name="laptop.jpg", size=(1200, 800)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "purple").save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class ProductImageTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, PRODUCT_IMAGE_ASYNC=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        admin = User.objects.create_user("admin", password="x", is_staff=True)
+        self.client.force_authenticate(admin)
+
+    def create_product(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/products/admin/", {
+                "name": "Acer Swift 14",
+                "specs": "Intel Ultra 7",
+                "description": '["Thin and light"]',
+                "brand": "Acer",
+                "category": '["Work"]',
+                "price": 89990,
+                "rating": 4.4,
+                "quantity": 5,
+                "image": jpeg_upload(),
+            }, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        return Product.objects.get(pk=response.data["id"])
+
+    def test_generate_derivatives_never_upscales(self):
+        Image.new("RGB", (300, 200)).save(f"{self.media_root}/small.png")
+
+        variants = generate_derivatives(self.media_root, "small.png")
+
+        self.assertEqual((variants["small"]["width"], variants["small"]["height"]), (240, 160))
+        self.assertEqual(variants["large"]["width"], 300)
+        self.assertTrue(variants["placeholder"].startswith("data:image/jpeg;base64,"))
+        medium = f"{self.media_root}/derived/small/medium.webp"
+        self.assertEqual(
+            variants["medium"]["webp"], f"derived/small/medium.{content_hash(medium)}.webp"
+        )
+        with Image.open(medium) as webp:
+            self.assertEqual(webp.format, "WEBP")
+
+    def test_upload_generates_variants_exposed_by_the_serializer(self):
+        product = self.create_product()
+
+        self.assertEqual(product.image_variants["medium"]["width"], 480)
+        card = self.client.get("/api/products/").json()["results"][0]
+        stem = product.image.name[9:-4]
+        small = f"{self.media_root}/products/derived/{stem}/small.webp"
+        self.assertEqual(
+            card["images"]["small"]["webp"],
+            f"/media/products/derived/{stem}/small.{content_hash(small)}.webp",
+        )
+        original = f"{self.media_root}/{product.image.name}"
+        self.assertEqual(card["image"], f"/media/products/{stem}.{content_hash(original)}.jpg")
+
+    def test_variants_of_a_replaced_image_are_not_linked(self):
+        product = self.create_product()
+        Product.objects.filter(pk=product.pk).update(image="products/replaced.jpg")
+        cache.clear()
+
+        card = self.client.get("/api/products/").json()["results"][0]
+
+        self.assertEqual(card["image"], "/media/products/replaced.jpg")
+        self.assertIsNone(card["images"])
+
+    def test_only_a_changed_image_is_regenerated(self):
+        product = self.create_product()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.patch(f"/api/products/admin/{product.id}/", {"price": 79990}, format="multipart")
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f"/api/products/admin/{product.id}/",
+                {"image": jpeg_upload("new.jpg", (100, 100))},
+                format="multipart",
+            )
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants["large"]["width"], 100)
@@ -0,0 +1,142 @@
+import threading
+import time
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from orders.models import Order
+from products.inventory import OutOfStock, release_stock, take_stock
+from products.lookup import product_lookup
+from products.models import Product, StockMovement
+from products.tests.test_search import make_product
+
+
+def ledger_total(product):
+    return StockMovement.objects.filter(product=product).aggregate(total=Sum("delta"))["total"]
+
+
+class InventoryTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.laptop = make_product(quantity=5)
+        self.mouse = make_product(name="Mouse", quantity=2)
+
+    def test_take_stock_is_all_or_nothing(self):
+        with self.assertRaises(OutOfStock) as raised:
+            take_stock([(self.laptop.id, 2), (self.mouse.id, 3)])
+
+        self.assertEqual((raised.exception.product_id, raised.exception.available), (self.mouse.id, 2))
+        self.laptop.refresh_from_db()
+        self.assertEqual(self.laptop.quantity, 5)
+
+    def test_stock_is_taken_by_one_conditional_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            take_stock([(self.laptop.id, 2), (self.mouse.id, 1)])
+
+        table = Product._meta.db_table
+        touching = [query["sql"] for query in queries if table in query["sql"]]
+        # No rows are read or locked before the update that takes the stock.
+        self.assertTrue(touching[0].startswith("UPDATE"), touching)
+        self.assertEqual(sum(sql.startswith("UPDATE") for sql in touching), 1)
+
+    def test_movements_keep_the_ledger_in_step(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            take_stock([(self.laptop.id, 2), (self.laptop.id, 1)])
+            release_stock([(self.laptop.id, 1)])
+
+        self.laptop.refresh_from_db()
+        self.assertEqual(self.laptop.quantity, 3)
+        self.assertEqual(ledger_total(self.laptop), 3)
+        self.assertEqual(
+            list(StockMovement.objects.filter(product=self.laptop).values_list("reason", "delta")),
+            [("adjust", 5), ("order", -3), ("cancel", 1)],
+        )
+
+        self.laptop.quantity = 10
+        self.laptop.save()
+        self.assertEqual(ledger_total(self.laptop), 10)
+
+    def test_saving_a_stale_copy_keeps_orders_taken_meanwhile(self):
+        edited = Product.objects.get(pk=self.laptop.pk)
+        untouched = Product.objects.get(pk=self.laptop.pk)
+        take_stock([(self.laptop.id, 2)])
+
+        edited.quantity += 10
+        edited.save()
+        untouched.name = "Renamed"
+        untouched.save()
+
+        self.laptop.refresh_from_db()
+        self.assertEqual((self.laptop.name, self.laptop.quantity), ("Renamed", 13))
+        self.assertEqual((edited.quantity, untouched.quantity), (13, 13))
+        self.assertEqual(ledger_total(self.laptop), 13)
+
+    def test_cached_lookups_are_dropped_on_commit(self):
+        self.assertEqual(product_lookup.get(self.mouse.id).quantity, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            take_stock([(self.mouse.id, 2)])
+
+        self.assertEqual(product_lookup.get(self.mouse.id).quantity, 0)
+
+    def test_reconcile_stock(self):
+        Product.objects.filter(pk=self.laptop.pk).update(quantity=7)
+        out = StringIO()
+
+        call_command("reconcile_stock", stdout=out)
+        self.assertIn(f"Product {self.laptop.id}: quantity 7, ledger 5", out.getvalue())
+
+        call_command("reconcile_stock", "--fix", stdout=StringIO())
+        self.assertEqual(ledger_total(self.laptop), 7)
+
+
+class ConcurrentOrderTest(TransactionTestCase):
+
+    THREADS = 16
+    ORDERS_PER_THREAD = 10
+
+    def test_no_overselling_under_concurrency(self):
+        product = make_product(quantity=50)
+        user = User.objects.create_user("buyer", password="x")
+        sold = []
+        start = threading.Barrier(self.THREADS)
+
+        def buy():
+            start.wait()
+            try:
+                for _ in range(self.ORDERS_PER_THREAD):
+                    while True:
+                        try:
+                            order = Order.objects.create(
+                                user=user, total_amount=1, payment_method="COD",
+                                name="x", address="x", pincode="1",
+                            )
+                            take_stock([(product.id, 1)], order=order)
+                            sold.append(order.id)
+                        except OutOfStock:
+                            pass
+                        except OperationalError:
+                            # SQLite allows one writer at a time; PostgreSQL
+                            # runs these concurrently.
+                            time.sleep(0.001)
+                            continue
+                        break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(len(sold), 50)
+        self.assertEqual(product.quantity, 0)
+        self.assertEqual(ledger_total(product), 0)
@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from products.lookup import LRUCache, ProductLookup
+from products.tests.test_search import make_product
+
+
+class LRUCacheTest(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_size=2, ttl=60)
+        lru.set(1, "a")
+        lru.set(2, "b")
+        lru.get(1)
+        lru.set(3, "c")
+
+        self.assertEqual(lru.get(1), "a")
+        self.assertIsNone(lru.get(2))
+        self.assertEqual(len(lru), 2)
+
+    def test_entries_expire(self):
+        lru = LRUCache(max_size=2, ttl=30)
+        with mock.patch("products.lookup.time.monotonic", return_value=100):
+            lru.set(1, "a")
+        with mock.patch("products.lookup.time.monotonic", return_value=131):
+            self.assertIsNone(lru.get(1))
+
+
+class ProductLookupTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.lookup = ProductLookup(max_size=10, ttl=60)
+        self.product = make_product(name="Gigabyte Aorus 16X")
+
+    def test_reads_go_local_then_shared_then_database(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.lookup.get(self.product.id).name, "Gigabyte Aorus 16X")
+            self.lookup.get(self.product.id)
+
+        self.lookup.local.clear()
+        with self.assertNumQueries(0):
+            self.lookup.get(self.product.id)
+
+        stats = self.lookup.stats()
+        self.assertEqual(
+            (stats["misses"], stats["local_hits"], stats["shared_hits"]), (1, 1, 1)
+        )
+
+    def test_unknown_ids_are_cached_as_missing(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.lookup.get(999))
+            self.assertIsNone(self.lookup.get(999))
+        self.assertIsNone(self.lookup.get("abc"))
+
+    def test_writes_invalidate_the_shared_entry(self):
+        self.lookup.get(self.product.id)
+        self.lookup.local.clear()
+
+        self.product.name = "Gigabyte Aorus 17X"
+        self.product.save()
+
+        self.assertEqual(self.lookup.get(self.product.id).name, "Gigabyte Aorus 17X")
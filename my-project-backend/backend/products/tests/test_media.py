@@ -0,0 +1,173 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+from django.urls import re_path
+from django.views.static import serve
+
+from backend.media import IMMUTABLE, REVALIDATE, parse_range, serve_media
+from products.imaging import content_hash, hashed_name
+
+
+urlpatterns = [
+    re_path(r"^media/(?P<path>.*)$", serve_media),
+    # The view media used to be served with, for comparison.
+    re_path(r"^static-serve/(?P<path>.*)$", lambda request, path: serve(
+        request, path, document_root=settings.MEDIA_ROOT
+    )),
+]
+
+
+class MediaRootMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write(self, name, data):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+
+@override_settings(ROOT_URLCONF="products.tests.test_media")
+class ServeMediaTest(MediaRootMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.data = bytes(range(256)) * 40
+        self.path = self.write("products/phone.jpg", self.data)
+        self.hashed = hashed_name("products/phone.jpg", content_hash(self.path))
+
+    def test_plain_name_must_be_revalidated(self):
+        response = self.client.get("/media/products/phone.jpg")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.data)
+        self.assertEqual(response["Cache-Control"], REVALIDATE)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Content-Length"], str(len(self.data)))
+
+    def test_hashed_name_is_immutable(self):
+        response = self.client.get(f"/media/{self.hashed}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.data)
+        self.assertEqual(response["Cache-Control"], IMMUTABLE)
+
+    def test_stale_hash_is_not_found(self):
+        self.write("products/phone.jpg", b"replaced")
+
+        self.assertEqual(self.client.get(f"/media/{self.hashed}").status_code, 404)
+
+    def test_conditional_requests(self):
+        first = self.client.get(f"/media/{self.hashed}")
+
+        by_etag = self.client.get(f"/media/{self.hashed}", HTTP_IF_NONE_MATCH=first["ETag"])
+        by_date = self.client.get(
+            "/media/products/phone.jpg", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        changed = self.client.get(f"/media/{self.hashed}", HTTP_IF_NONE_MATCH='"other"')
+
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag["Cache-Control"], IMMUTABLE)
+        self.assertEqual(by_date.status_code, 304)
+        self.assertEqual(changed.status_code, 200)
+
+    def test_range_requests(self):
+        response = self.client.get("/media/products/phone.jpg", HTTP_RANGE="bytes=100-199")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.data[100:200])
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.data)}")
+        self.assertEqual(response["Content-Length"], "100")
+
+        suffix = self.client.get("/media/products/phone.jpg", HTTP_RANGE="bytes=-10")
+        self.assertEqual(b"".join(suffix.streaming_content), self.data[-10:])
+
+        outside = self.client.get("/media/products/phone.jpg", HTTP_RANGE="bytes=999999-")
+        self.assertEqual(outside.status_code, 416)
+        self.assertEqual(outside["Content-Range"], f"bytes */{len(self.data)}")
+
+    def test_if_range_with_an_old_validator_sends_the_whole_file(self):
+        response = self.client.get(
+            "/media/products/phone.jpg", HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b"".join(response.streaming_content)), len(self.data))
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-", 10), (0, 9))
+        self.assertEqual(parse_range("bytes=5-100", 10), (5, 9))
+        self.assertEqual(parse_range("bytes=-100", 10), (0, 9))
+        self.assertIsNone(parse_range("bytes=0-1,4-5", 10))
+        self.assertIsNone(parse_range("items=0-1", 10))
+        self.assertIs(parse_range("bytes=10-", 10), False)
+
+    def test_paths_outside_media_root_are_rejected(self):
+        self.assertEqual(self.client.get("/media/../settings.py").status_code, 404)
+        self.assertEqual(self.client.get("/media/products").status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_accel_redirect_hands_the_file_to_the_proxy(self):
+        response = self.client.get(f"/media/{self.hashed}")
+
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/products/phone.jpg")
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Cache-Control"], IMMUTABLE)
+
+
+@override_settings(ROOT_URLCONF="products.tests.test_media")
+class MediaThroughputTest(MediaRootMixin, LiveServerTestCase):
+    """Serves a product-sized image through a real server with both views."""
+
+    REQUESTS = 30
+
+    def fetch_all(self, url):
+        started = time.perf_counter()
+        for _ in range(self.REQUESTS):
+            with urllib.request.urlopen(url) as response:
+                body = response.read()
+        return self.REQUESTS / (time.perf_counter() - started), body
+
+    def test_throughput_against_django_static_serve(self):
+        data = os.urandom(2 * 1024 * 1024)
+        path = self.write("products/large.jpg", data)
+        hashed = hashed_name("products/large.jpg", content_hash(path))
+
+        old_rate, old_body = self.fetch_all(f"{self.live_server_url}/static-serve/products/large.jpg")
+        new_rate, new_body = self.fetch_all(f"{self.live_server_url}/media/{hashed}")
+        self.assertEqual(old_body, data)
+        self.assertEqual(new_body, data)
+
+        # A browser holding the immutable URL revalidates with its ETag.
+        with urllib.request.urlopen(f"{self.live_server_url}/media/{hashed}") as response:
+            etag = response.headers["ETag"]
+        try:
+            urllib.request.urlopen(urllib.request.Request(
+                f"{self.live_server_url}/media/{hashed}", headers={"If-None-Match": etag}
+            ))
+            status = 200
+        except urllib.error.HTTPError as error:
+            status = error.code
+        self.assertEqual(status, 304)
+
+        sys.stderr.write(
+            f"\nmedia throughput, {len(data) >> 20} MiB file: "
+            f"static.serve {old_rate:.1f} req/s, serve_media {new_rate:.1f} req/s\n"
+        )
+        # Timing on shared machines is noisy; only catch a real regression.
+        self.assertGreater(new_rate, old_rate * 0.5)
@@ -0,0 +1,144 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+from backend.db import ReplicaRouter, replica_health, replica_reads, use_primary
+from cart.models import CartItem
+from products.cache import bump_catalog_version
+from products.lookup import product_lookup
+from products.models import Product
+from products.tests.test_search import make_product
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    The replica is a second SQLite database holding a snapshot of the
+    primary, so reads that reach it see the data as it was then.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The alias only exists while a test has called use_replica().
+        cls.databases = cls.databases | {"replica"}
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.product = make_product(name="Old Name", quantity=5)
+
+    def use_replica(self, name):
+        connections.settings["replica"] = connections.configure_settings({
+            "default": connections.settings["default"],
+            "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": name},
+        })["replica"]
+        self.addCleanup(self.remove_replica)
+        replica_health.reset()
+        # Start from a clean cache, as if the last catalog write were old.
+        cache.clear()
+        product_lookup.clear()
+
+    def remove_replica(self):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        replica_health.reset()
+
+    def snapshot_replica(self):
+        path = os.path.join(self.tmp, "replica.sqlite3")
+        target = sqlite3.connect(path)
+        connections["default"].ensure_connection()
+        connections["default"].connection.backup(target)
+        target.close()
+        self.use_replica(path)
+
+    def test_opted_in_reads_go_to_the_replica(self):
+        self.snapshot_replica()
+        Product.objects.filter(pk=self.product.pk).update(name="New Name")
+
+        response = self.client.get(f"/api/products/{self.product.pk}/")
+
+        self.assertEqual(response.json()["name"], "Old Name")
+
+    def test_writes_and_other_views_use_the_primary(self):
+        self.snapshot_replica()
+        router = ReplicaRouter()
+
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Product), "replica")
+            with use_primary():
+                self.assertIsNone(router.db_for_read(Product))
+            self.assertIsNone(router.db_for_write(Product))
+            # Reads after a write in the same request stay on the primary.
+            self.assertIsNone(router.db_for_read(Product))
+        self.assertIsNone(router.db_for_read(Product))
+        self.assertFalse(router.allow_migrate("replica", "products"))
+
+    def test_a_user_reads_their_own_writes(self):
+        self.snapshot_replica()
+        self.client.force_authenticate(self.user)
+
+        self.client.post("/api/cart/add/", {"product_id": self.product.pk})
+        response = self.client.get("/api/cart/")
+
+        self.assertEqual(response.data["item_count"], 1)
+
+        # Once the sticky window has passed the stale replica answers.
+        cache.delete(f"db:pin:{self.user.pk}")
+        self.assertEqual(self.client.get("/api/cart/").data["items"], [])
+        self.assertTrue(CartItem.objects.exists())
+
+    def test_recent_catalog_writes_are_read_from_the_primary(self):
+        self.snapshot_replica()
+        Product.objects.filter(pk=self.product.pk).update(name="New Name")
+        bump_catalog_version()
+        product_lookup.clear()
+
+        response = self.client.get("/api/products/", {"fields": "id,name"})
+
+        self.assertEqual(response.json()["results"][0]["name"], "New Name")
+
+    def test_unreachable_replica_falls_back_to_the_primary(self):
+        self.use_replica(os.path.join(self.tmp, "missing", "replica.sqlite3"))
+
+        with self.assertLogs("backend.db", "WARNING") as logs:
+            response = self.client.get(f"/api/products/{self.product.pk}/")
+
+        self.assertIn("is unavailable", logs.output[0])
+        self.assertEqual(response.json()["name"], "Old Name")
+        self.assertFalse(replica_health.available("replica"))
+
+    def test_failed_replica_read_is_retried_on_the_primary(self):
+        # Reachable, but without the tables.
+        self.use_replica(os.path.join(self.tmp, "empty.sqlite3"))
+
+        with self.assertLogs("backend.db", "WARNING") as logs:
+            response = self.client.get(f"/api/products/{self.product.pk}/")
+
+        self.assertIn("retrying on the primary", logs.output[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "Old Name")
+        self.assertFalse(replica_health.available("replica"))
+
+    def test_cart_and_wishlist_reads_are_retried_on_the_primary(self):
+        self.use_replica(os.path.join(self.tmp, "empty.sqlite3"))
+        self.client.force_authenticate(self.user)
+        CartItem.objects.create(user=self.user, product=self.product, quantity=2)
+
+        for url in ("/api/cart/", "/api/wishlist/"):
+            replica_health.reset()
+            with self.subTest(url=url), self.assertLogs("backend.db", "WARNING") as logs:
+                response = self.client.get(url)
+
+                self.assertIn("retrying on the primary", logs.output[0])
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get("/api/cart/").data["item_count"], 2)
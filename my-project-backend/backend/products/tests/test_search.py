@@ -0,0 +1,55 @@
+from django.test import TestCase
+from products.models import Product
+from products.search import ProductSearchIndex, edit_distance
+
+
+def make_product(**fields):
+    data = {
+        "name": "Test Laptop",
+        "specs": "Intel i5, RTX 3050",
+        "description": ["Test Laptop"],
+        "brand": "TestBrand",
+        "category": ["Gaming"],
+        "price": 99999,
+        "rating": 4.0,
+        "quantity": 10,
+        "image": "products/test.jpg",
+    }
+    data.update(fields)
+    return Product.objects.create(**data)
+
+
+class ProductSearchIndexTest(TestCase):
+
+    def setUp(self):
+        self.omen = make_product(name="HP OMEN Max 16", brand="HP", specs="Intel Ultra 9, RTX 5080")
+        self.alienware = make_product(name="Dell Alienware m18", brand="Dell", category=["Gaming", "Rendering"])
+        self.vivobook = make_product(name="ASUS Vivobook 15", brand="ASUS", category={"type": "Student"})
+        self.index = ProductSearchIndex()
+
+    def test_edit_distance_stops_at_limit(self):
+        self.assertEqual(edit_distance("alienware", "alienwrae", 2), 2)
+        self.assertEqual(edit_distance("omen", "vivobook", 1), 2)
+
+    def test_exact_prefix_and_typo_matches(self):
+        self.assertEqual(self.index.search("omen"), [self.omen.id])
+        self.assertEqual(self.index.search("alien"), [self.alienware.id])
+        self.assertEqual(self.index.search("alienwere"), [self.alienware.id])
+        self.assertEqual(self.index.search("student"), [self.vivobook.id])
+
+    def test_products_matching_more_terms_rank_first(self):
+        results = self.index.search("dell rendering rtx")
+        self.assertEqual(results[0], self.alienware.id)
+        self.assertIn(self.omen.id, results)
+
+    def test_index_follows_product_writes(self):
+        self.index.build()
+
+        self.vivobook.name = "ASUS Zenbook 14"
+        self.vivobook.save()
+        self.index.update(self.vivobook)
+        self.assertEqual(self.index.search("zenbook"), [self.vivobook.id])
+        self.assertEqual(self.index.search("vivobook"), [])
+
+        self.index.remove(self.omen.id)
+        self.assertEqual(self.index.search("omen"), [])
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from products.models import Product
+from products.serializers import CARD_FIELDS, ProductSerializer
+from products.tests.test_search import make_product
+
+
+class SparseProductFieldsTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(quantity=0, specs="x" * 2000)
+
+    def test_serializer_fields_and_exclude(self):
+        data = ProductSerializer(self.product, fields=("id", "name")).data
+        self.assertEqual(set(data), {"id", "name"})
+
+        data = ProductSerializer(self.product, exclude=("specs", "description")).data
+        self.assertNotIn("specs", data)
+        self.assertFalse(data["in_stock"])
+
+    def test_list_defaults_to_cards_and_defers_heavy_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/")
+
+        self.assertEqual(set(response.json()["results"][0]), set(CARD_FIELDS))
+        table = Product._meta.db_table
+        listing = next(q["sql"] for q in queries if f'FROM "{table}"' in q["sql"])
+        self.assertNotIn('"specs"', listing)
+        self.assertNotIn('"description"', listing)
+
+    def test_query_parameters_select_fields(self):
+        response = self.client.get("/api/products/", {"fields": "id,specs"})
+        self.assertEqual(response.json()["results"], [{"id": self.product.id, "specs": "x" * 2000}])
+
+        response = self.client.get(f"/api/products/{self.product.id}/", {"exclude": "specs,description"})
+        self.assertNotIn("specs", response.json())
+        self.assertIn("category", response.json())
+
+        response = self.client.get("/api/products/", {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,106 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from products.models import SimilarProduct
+from products.similarity import REFRESH, similarity_index
+from products.tests.test_search import make_product
+from tasks.models import Task
+from tasks.queue import run_pending
+
+
+def stored(product):
+    return list(
+        SimilarProduct.objects.filter(product=product).order_by("rank").values_list("similar_id", flat=True)
+    )
+
+
+class SimilarProductsTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        similarity_index.clear()
+        self.omen = make_product(
+            brand="HP", category=["Gaming"], price=300000, specs="Intel Ultra 9, RTX 5080, 32GB RAM"
+        )
+        self.victus = make_product(
+            brand="HP", category=["Gaming"], price=280000, specs="Intel Ultra 7, RTX 5070, 32GB RAM"
+        )
+        self.alienware = make_product(
+            brand="Dell", category=["Gaming"], price=320000, specs="Intel i9, RTX 5090, 64GB RAM"
+        )
+        self.inspiron = make_product(
+            brand="Dell", category=["Office"], price=50000, specs="Intel i3, 8GB RAM"
+        )
+
+    def test_neighbours_rank_closest_products_first(self):
+        neighbours = [pk for pk, score in similarity_index.neighbours(self.omen.id)]
+
+        self.assertEqual(neighbours[:2], [self.victus.id, self.alienware.id])
+        self.assertEqual(neighbours[-1], self.inspiron.id)
+
+    def test_features_on_most_of_the_catalog_are_not_scored(self):
+        for i in range(20):
+            make_product(brand=f"Brand {i}", category=["Office"], price=20000 + 997 * i, specs="Intel i5, 8GB RAM")
+
+        features = similarity_index.features()
+        self.assertNotIn("specs:intel", features)
+        self.assertIn("specs:rtx", features)
+        self.assertEqual(similarity_index.neighbours(self.omen.id, 2)[0][0], self.victus.id)
+
+    def test_batches_score_like_single_products(self):
+        products = [self.omen.id, self.victus.id, self.alienware.id, self.inspiron.id]
+
+        batch = similarity_index.neighbours_many(products, 2)
+
+        self.assertEqual(batch, {pk: similarity_index.neighbours(pk, 2) for pk in products})
+        self.assertNotIn(self.omen.id, [other for other, score in batch[self.omen.id]])
+
+    def test_rebuild_command_stores_top_k(self):
+        call_command("rebuild_similar_products", "--top-k", "2", stdout=StringIO())
+
+        self.assertEqual(stored(self.omen), [self.victus.id, self.alienware.id])
+        self.assertEqual(SimilarProduct.objects.count(), 8)
+
+    def test_lists_refresh_when_products_change(self):
+        call_command("rebuild_similar_products", stdout=StringIO())
+
+        twin = make_product(
+            brand="HP", category=["Gaming"], price=300000, specs="Intel Ultra 9, RTX 5080, 32GB RAM"
+        )
+        # Saving only queues the refresh.
+        self.assertNotIn(twin.id, stored(self.omen))
+        run_pending(threads=1)
+        self.assertEqual(stored(self.omen)[0], twin.id)
+
+        twin.delete()
+        run_pending(threads=1)
+        self.assertEqual(stored(self.omen), [self.victus.id, self.alienware.id, self.inspiron.id])
+
+    def test_saving_does_not_score_the_catalog(self):
+        call_command("rebuild_similar_products", stdout=StringIO())
+        similarity_index.clear()
+        Task.objects.all().delete()
+
+        with mock.patch.object(similarity_index, "build") as build:
+            self.omen.price = 310000
+            self.omen.save()
+        build.assert_not_called()
+        self.assertEqual(Task.objects.filter(kind=REFRESH).count(), 1)
+
+    def test_endpoint(self):
+        response = self.client.get(f"/api/products/{self.omen.id}/similar/", {"limit": 2})
+        self.assertEqual(
+            [p["id"] for p in response.json()], [self.victus.id, self.alienware.id]
+        )
+        # Computed for the response, but left to the worker to store.
+        self.assertFalse(SimilarProduct.objects.exists())
+
+        call_command("rebuild_similar_products", stdout=StringIO())
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/products/{self.omen.id}/similar/", {"limit": 2})
+        self.assertEqual(len(response.json()), 2)
+
+        self.assertEqual(self.client.get("/api/products/999/similar/").status_code, 404)
@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from products.suggest import suggestion_index
+from products.tests.test_search import make_product
+
+
+class SuggestionIndexTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        suggestion_index.clear()
+        self.omen = make_product(name="HP OMEN Max 16", brand="HP", category=["Gaming"], rating=4.6)
+        self.victus = make_product(name="HP Victus 15", brand="HP", category=["Student"], rating=4.2)
+        self.legion = make_product(name="Lenovo Legion Pro 7", brand="Lenovo", category=["Gaming"], rating=4.8)
+
+    def names(self, query, limit=5):
+        return [item["name"] for item in suggestion_index.suggest(query, limit)]
+
+    def test_matches_word_prefixes_brands_and_categories(self):
+        self.assertEqual(self.names("ome"), ["HP OMEN Max 16"])
+        self.assertEqual(self.names("max 1"), ["HP OMEN Max 16"])
+        self.assertEqual(self.names("hp"), ["HP OMEN Max 16", "HP Victus 15"])
+        self.assertEqual(self.names("gam"), ["Lenovo Legion Pro 7", "HP OMEN Max 16"])
+        self.assertEqual(self.names("gam", limit=1), ["Lenovo Legion Pro 7"])
+        self.assertEqual(self.names("   "), [])
+
+    def test_follows_product_writes(self):
+        self.names("hp")
+
+        self.victus.name = "HP Pavilion 15"
+        self.victus.save()
+        self.legion.delete()
+
+        self.assertEqual(self.names("pav"), ["HP Pavilion 15"])
+        self.assertEqual(self.names("victus"), [])
+        self.assertEqual(self.names("legion"), [])
+
+    def test_endpoint_returns_compact_suggestions(self):
+        response = self.client.get("/api/products/suggest/", {"q": "len"})
+
+        self.assertEqual(
+            response.json(),
+            [{"id": self.legion.id, "name": "Lenovo Legion Pro 7", "brand": "Lenovo"}],
+        )
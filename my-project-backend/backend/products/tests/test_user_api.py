@@ -0,0 +1,102 @@
+import base64
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from products.search import search_index
+from products.tests.test_search import make_product
+
+
+class UserProductSearchApiTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        search_index.clear()
+        self.products = [
+            make_product(name=f"Razer Blade {size}", brand="Razer")
+            for size in (14, 16, 18)
+        ]
+        make_product(name="Lenovo Legion 5", brand="Lenovo")
+
+    def test_search_returns_only_the_requested_page(self):
+        response = self.client.get("/api/products/", {"search": "razr", "page_size": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 3)
+        self.assertEqual(len(response.json()["results"]), 2)
+        self.assertTrue(all(p["brand"] == "Razer" for p in response.json()["results"]))
+        self.assertIn("page=2", response.json()["next"])
+
+    def test_new_products_are_searchable(self):
+        self.client.get("/api/products/", {"search": "legion"})
+        product = make_product(name="MSI Katana 15", brand="MSI")
+
+        response = self.client.get("/api/products/", {"search": "katana"})
+
+        self.assertEqual([p["id"] for p in response.json()["results"]], [product.id])
+
+
+class UserProductPaginationApiTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Duplicate prices make sure the id tie-breaker keeps pages disjoint.
+        self.products = [
+            make_product(name=f"Laptop {i}", price=1000 * (i % 3), rating=4.0)
+            for i in range(7)
+        ]
+
+    def walk(self, url, params):
+        seen, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(p["id"] for p in response.json()["results"])
+            pages += 1
+            if not response.json()["next"]:
+                return seen, pages, response
+            response = self.client.get(response.json()["next"])
+
+    def test_pages_cover_catalog_once_in_sort_order(self):
+        for sort in ("newest", "price_asc", "price_desc", "rating"):
+            seen, pages, _ = self.walk("/api/products/", {"sort": sort, "page_size": 3})
+            self.assertEqual(len(seen), 7)
+            self.assertEqual(len(set(seen)), 7)
+            self.assertEqual(pages, 3)
+
+        seen, _, _ = self.walk("/api/products/", {"sort": "price_asc", "page_size": 2})
+        prices = {p.id: p.price for p in self.products}
+        self.assertEqual(seen, sorted(seen, key=lambda pk: (prices[pk], pk)))
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get("/api/products/", {"page_size": 3})
+        second = self.client.get(first.json()["next"])
+        back = self.client.get(second.json()["previous"])
+
+        self.assertEqual(back.json()["results"], first.json()["results"])
+
+    def test_page_size_is_capped_and_bad_cursors_rejected(self):
+        response = self.client.get("/api/products/", {"page_size": 10000})
+        self.assertEqual(len(response.json()["results"]), 7)
+
+        response = self.client.get("/api/products/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_values_are_rejected_on_every_sort(self):
+        for sort in ("newest", "oldest", "price_asc", "price_desc", "rating"):
+            for value in ("abc", [1], {"a": 1}, None, True):
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps({"s": sort, "d": "n", "v": [value, 1]}).encode()
+                ).decode()
+                with self.subTest(sort=sort, value=value):
+                    response = self.client.get("/api/products/", {"sort": sort, "cursor": cursor})
+                    self.assertEqual(response.status_code, 404)
+
+    def test_admin_listing_is_paginated(self):
+        admin = User.objects.create_user("admin", password="x", is_staff=True)
+        self.client.force_authenticate(admin)
+
+        _, pages, _ = self.walk("/api/products/admin/", {"page_size": 5})
+
+        self.assertEqual(pages, 2)
@@ -2,16 +2,26 @@ from django.urls import path
 from .views import (
     UserProductList,
     UserProductDetail,
+    ProductSuggestView,
+    UserProductSimilarView,
     AdminProductListCreate,
     AdminProductDetail,
+    AdminProductLookupStatsView,
+    AdminProductImportView,
+    AdminProductExportView,
 )
 
 urlpatterns = [
     
     path("", UserProductList.as_view()),
+    path("suggest/", ProductSuggestView.as_view()),
     path("<int:pk>/", UserProductDetail.as_view()),
+    path("<int:pk>/similar/", UserProductSimilarView.as_view()),
 
     
     path("admin/", AdminProductListCreate.as_view()),
     path("admin/<int:pk>/", AdminProductDetail.as_view()),
+    path("admin/lookup-stats/", AdminProductLookupStatsView.as_view()),
+    path("admin/import/", AdminProductImportView.as_view()),
+    path("admin/export/", AdminProductExportView.as_view()),
 ]
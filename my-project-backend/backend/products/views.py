@@ -1,3 +1,4 @@
+from django.http import StreamingHttpResponse
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -5,41 +6,210 @@ from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework import status
 from .models import Product
-from .serializers import ProductSerializer
+from .serializers import (
+    CARD_FIELDS,
+    ProductSerializer,
+    product_columns,
+    requested_fields,
+)
+from .search import search_index
+from .pagination import KeysetPagination, positive_int
+from .cache import catalog_cached
+from .lookup import product_lookup
+from .facets import facet_summary, filter_products, has_filters
+from .suggest import suggestion_index
+from .models import SimilarProduct
+from .similarity import similarity_index
+from .images import schedule_derivatives
+from .bulk import ImportFormatError, detect_format, export_products, import_products
+from rest_framework.utils.urls import replace_query_param
 
 
+class UserProductList(APIView):
+    permission_classes = [AllowAny]
+    use_replica = True
+    pagination_class = KeysetPagination
+    default_fields = CARD_FIELDS
+
+    @catalog_cached
+    def get(self, request):
+        query = request.query_params.get("search", "").strip()
+        if query:
+            return self.search(request, query)
 
+        fields = requested_fields(request.query_params, default=CARD_FIELDS)
+        # The keyset columns are always loaded since the cursor is built from them.
+        queryset = Product.objects.only(
+            *product_columns(fields), "created_at", "price", "rating"
+        )
+        queryset = filter_products(queryset, request.query_params)
 
-class UserProductList(APIView):
+        paginator = self.pagination_class()
+        products = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = ProductSerializer(products, many=True, fields=fields)
+        response = paginator.get_paginated_response(serializer.data)
+        response.data["facets"] = facet_summary()
+        return response
+
+    def search(self, request, query):
+        # Relevance order only exists in the search index, so search results
+        # are paged by position in the ranked id list rather than by keyset.
+        fields = requested_fields(request.query_params, default=CARD_FIELDS)
+        paginator = self.pagination_class()
+        page_size = paginator.get_page_size(request)
+        page = positive_int(request.query_params.get("page"), 1)
+
+        ranked = search_index.search(query)
+        if has_filters(request.query_params):
+            allowed = set(
+                filter_products(Product.objects.filter(id__in=ranked), request.query_params)
+                .values_list("id", flat=True)
+            )
+            ranked = [pk for pk in ranked if pk in allowed]
+        page_ids = ranked[(page - 1) * page_size:page * page_size]
+
+        found = Product.objects.only(*product_columns(fields)).in_bulk(page_ids)
+        products = [found[pk] for pk in page_ids if pk in found]
+        serializer = ProductSerializer(products, many=True, fields=fields)
+
+        url = request.build_absolute_uri()
+        return Response({
+            "count": len(ranked),
+            "next": (
+                replace_query_param(url, "page", page + 1)
+                if page * page_size < len(ranked) else None
+            ),
+            "previous": (
+                replace_query_param(url, "page", page - 1) if page > 1 else None
+            ),
+            "results": serializer.data,
+            "facets": facet_summary(),
+        })
+
+
+class ProductSuggestView(APIView):
     permission_classes = [AllowAny]
+    use_replica = True
+    authentication_classes = []
+
+    default_limit = 5
+    max_limit = 10
 
     def get(self, request):
-        products = Product.objects.all().order_by("-created_at")
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        query = request.query_params.get("q", "")
+        limit = min(
+            positive_int(request.query_params.get("limit"), self.default_limit),
+            self.max_limit,
+        )
+        return Response(suggestion_index.suggest(query, limit))
 
 
 class UserProductDetail(APIView):
     permission_classes = [AllowAny]
+    use_replica = True
 
+    @catalog_cached
     def get(self, request, pk):
-        try:
-            product = Product.objects.get(pk=pk)
-        except Product.DoesNotExist:
+        fields = requested_fields(request.query_params)
+        product = product_lookup.get(pk)
+        if product is None:
             return Response({"error": "Product not found"}, status=404)
-        serializer = ProductSerializer(product)
+        serializer = ProductSerializer(product, fields=fields)
         return Response(serializer.data)
 
 
 
 
+class UserProductSimilarView(APIView):
+    permission_classes = [AllowAny]
+    use_replica = True
+
+    def get(self, request, pk):
+        fields = requested_fields(request.query_params, default=CARD_FIELDS)
+        if product_lookup.get(pk) is None:
+            return Response({"error": "Product not found"}, status=404)
+
+        similar = [
+            link.similar for link in
+            SimilarProduct.objects.filter(product_id=pk)
+            .select_related("similar")
+            .only("rank", *[f"similar__{column}" for column in product_columns(fields)])
+            .order_by("rank")
+        ]
+        if not similar:
+            # Not stored yet, e.g. a product created since the last rebuild.
+            # A GET only reads; the task worker or the rebuild command
+            # stores the list.
+            ids = [other for other, score in similarity_index.neighbours(pk)]
+            found = Product.objects.only(*product_columns(fields)).in_bulk(ids)
+            similar = [found[other] for other in ids if other in found]
+
+        limit = positive_int(request.query_params.get("limit"), len(similar))
+        serializer = ProductSerializer(similar[:limit], many=True, fields=fields)
+        return Response(serializer.data)
+
+
 class AdminProductListCreate(generics.ListCreateAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAdminUser]
+    use_replica = True
+    pagination_class = KeysetPagination
+
+    def perform_create(self, serializer):
+        product = serializer.save()
+        schedule_derivatives(product)
 
 
 class AdminProductDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAdminUser]
+
+    def perform_update(self, serializer):
+        previous_image = serializer.instance.image.name
+        product = serializer.save()
+        if product.image.name != previous_image:
+            schedule_derivatives(product)
+
+
+class AdminProductLookupStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(product_lookup.stats())
+
+
+class AdminProductImportView(APIView):
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Upload a CSV or JSONL file as 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            fmt = detect_format(upload.name, request.data.get("file_format"))
+            result = import_products(upload, fmt)
+        except ImportFormatError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except UnicodeDecodeError:
+            return Response({"error": "The file must be UTF-8 encoded"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result.as_dict())
+
+
+class AdminProductExportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            fmt = detect_format("", request.query_params.get("file_format", "csv"))
+        except ImportFormatError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        response = StreamingHttpResponse(export_products(fmt), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="products.{fmt}"'
+        return response
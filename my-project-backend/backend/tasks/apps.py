@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    name = 'tasks'
+
+    def ready(self):
+        # Register the built-in handlers with the worker.
+        from . import email  # noqa: F401
@@ -0,0 +1,41 @@
+"""
+Email delivery as background tasks. Each worker batch is sent over one
+connection to the mail server.
+"""
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from .queue import enqueue, handler
+
+
+EMAIL = "email"
+BATCH_SIZE = getattr(settings, "TASK_EMAIL_BATCH_SIZE", 50)
+
+
+def send_mail_later(subject, message, recipient_list, from_email=None):
+    """Queue a plain-text email, sent once the current transaction commits."""
+    return enqueue(EMAIL, {
+        "subject": subject,
+        "message": message,
+        "from_email": from_email or settings.DEFAULT_FROM_EMAIL,
+        "recipient_list": list(recipient_list),
+    })
+
+
+@handler(EMAIL, batch_size=BATCH_SIZE)
+def deliver(payloads):
+    errors = []
+    with get_connection() as connection:
+        for payload in payloads:
+            message = EmailMessage(
+                payload["subject"], payload["message"], payload["from_email"], payload["recipient_list"],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                errors.append(exc)
+            else:
+                errors.append(None)
+    return errors
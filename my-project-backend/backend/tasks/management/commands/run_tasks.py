@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.queue import run_pending
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=getattr(settings, "TASK_WORKER_THREADS", 4))
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument("--once", action="store_true", help="Run the tasks that are due and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            done = run_pending(options["batch_size"], threads=options["threads"])
+            if done:
+                self.stdout.write(f"Ran {done} tasks")
+            if options["once"]:
+                return
+            if not done:
+                time.sleep(options["poll_interval"])
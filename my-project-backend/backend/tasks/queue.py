@@ -0,0 +1,153 @@
+"""
+A database-backed task queue.
+
+``enqueue`` inserts the task in the caller's transaction, so it becomes
+visible to workers exactly when that transaction commits and disappears
+with it on rollback. Workers (``manage.py run_tasks``) claim due tasks in
+batches, hand each kind's tasks to its handler in groups of up to the
+handler's ``batch_size`` on a thread pool, delete the ones that succeed and
+retry the rest with exponential backoff until ``TASK_MAX_ATTEMPTS``.
+"""
+
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, "TASK_MAX_ATTEMPTS", 5)
+BACKOFF = getattr(settings, "TASK_RETRY_BACKOFF", 30)
+MAX_BACKOFF = getattr(settings, "TASK_MAX_RETRY_BACKOFF", 60 * 60)
+# A claimed task not finished after this long belongs to a worker that died.
+LEASE = getattr(settings, "TASK_LEASE", 60 * 5)
+
+HANDLERS = {}
+
+
+class Handler:
+
+    def __init__(self, function, batch_size):
+        self.function = function
+        self.batch_size = batch_size
+
+
+def handler(kind, batch_size=1):
+    """
+    Register the decorated function for tasks of ``kind``. It is called
+    with a list of up to ``batch_size`` payloads and returns one error per
+    payload, None where it succeeded; raising fails the whole group.
+    """
+    def register(function):
+        HANDLERS[kind] = Handler(function, batch_size)
+        return function
+    return register
+
+
+def enqueue(kind, payload, delay=0):
+    if kind not in HANDLERS:
+        raise ValueError(f"No handler for {kind!r} tasks")
+    return Task.objects.create(kind=kind, payload=payload, run_after=timezone.now() + timedelta(seconds=delay))
+
+
+def backoff(attempts):
+    """Seconds to wait before the next try after ``attempts`` failed ones."""
+    return min(BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+
+
+def due(now):
+    return Q(status=Task.PENDING, run_after__lte=now) | Q(status=Task.RUNNING, locked_until__lt=now)
+
+
+def claim(limit):
+    """Claim up to ``limit`` due tasks for this worker and return them."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(
+            Task.objects.select_for_update(skip_locked=True).filter(due(now))
+            .order_by("run_after", "id").values_list("id", flat=True)[:limit]
+        )
+        # Repeating the condition keeps two workers on a database without
+        # row locks from claiming the same task.
+        Task.objects.filter(due(now), id__in=ids).update(
+            status=Task.RUNNING, claimed_by=token, locked_until=now + timedelta(seconds=LEASE),
+            attempts=F("attempts") + 1,
+        )
+    return list(Task.objects.filter(claimed_by=token, status=Task.RUNNING).order_by("id"))
+
+
+def run_group(kind, tasks):
+    """Run one handler call and return ``(task, error)`` pairs."""
+    entry = HANDLERS.get(kind)
+    try:
+        if entry is None:
+            raise LookupError(f"No handler for {kind!r} tasks")
+        errors = entry.function([task.payload for task in tasks])
+    except Exception as exc:
+        logger.exception("%s tasks %s failed", kind, [task.pk for task in tasks])
+        errors = [exc] * len(tasks)
+    return list(zip(tasks, errors))
+
+
+def finish(results):
+    done = [task.pk for task, error in results if error is None]
+    Task.objects.filter(pk__in=done).delete()
+
+    now = timezone.now()
+    for task, error in results:
+        if error is None:
+            continue
+        if task.attempts >= MAX_ATTEMPTS:
+            status, run_after = Task.FAILED, task.run_after
+        else:
+            status, run_after = Task.PENDING, now + timedelta(seconds=backoff(task.attempts))
+        Task.objects.filter(pk=task.pk, claimed_by=task.claimed_by).update(
+            status=status, run_after=run_after, locked_until=None, last_error=str(error) or repr(error),
+        )
+
+
+def groups(tasks):
+    by_kind = {}
+    for task in tasks:
+        by_kind.setdefault(task.kind, []).append(task)
+    for kind, kind_tasks in by_kind.items():
+        size = HANDLERS[kind].batch_size if kind in HANDLERS else 1
+        for start in range(0, len(kind_tasks), size):
+            yield kind, kind_tasks[start:start + size]
+
+
+def run_in_thread(kind, tasks):
+    try:
+        results = run_group(kind, tasks)
+        finish(results)
+        return results
+    finally:
+        connection.close()
+
+
+def run_pending(limit=100, threads=1):
+    """
+    Claim up to ``limit`` due tasks, run them and return the number that
+    succeeded. With one thread the handlers run in the calling thread.
+    """
+    tasks = claim(limit)
+    if threads <= 1:
+        results = []
+        for kind, group in groups(tasks):
+            group_results = run_group(kind, group)
+            finish(group_results)
+            results += group_results
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(run_in_thread, kind, group) for kind, group in groups(tasks)]
+            results = [result for future in futures for result in future.result()]
+    return sum(1 for task, error in results if error is None)
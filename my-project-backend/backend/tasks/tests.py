@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from tasks import queue
+from tasks.email import send_mail_later
+from tasks.models import Task
+from tasks.queue import enqueue, handler, run_pending
+
+
+class RegistrationEmailTest(APITestCase):
+
+    def register(self, username="newbie"):
+        return self.client.post("/api/account/register/", {
+            "first_name": "New", "last_name": "Buyer", "username": username,
+            "email": f"{username}@example.com", "password": "s3cret-pass", "confirm_password": "s3cret-pass",
+        })
+
+    def test_emails_wait_for_the_worker(self):
+        response = self.register()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Task.objects.filter(kind="email").count(), 2)
+
+        call_command("run_tasks", "--once", "--threads", "1", stdout=StringIO())
+
+        self.assertEqual(
+            sorted(message.subject for message in mail.outbox), ["Activate your account", "Welcome to Cortex Store 🎉"]
+        )
+        self.assertEqual(mail.outbox[0].to, ["newbie@example.com"])
+        self.assertFalse(Task.objects.exists())
+
+    def test_a_batch_shares_one_connection(self):
+        for name in ("one", "two", "three"):
+            self.register(name)
+
+        with mock.patch.object(EmailBackend, "open", autospec=True, side_effect=EmailBackend.open) as opened:
+            self.assertEqual(run_pending(threads=1), 6)
+
+        self.assertEqual((opened.call_count, len(mail.outbox)), (1, 6))
+
+
+class TaskQueueTest(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.addCleanup(queue.HANDLERS.pop, "flaky", None)
+
+        @handler("flaky", batch_size=10)
+        def flaky(payloads):
+            self.calls.append([payload["n"] for payload in payloads])
+            return [None if payload["n"] % 2 else "odd one out" for payload in payloads]
+
+    def test_rolled_back_tasks_are_never_run(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            send_mail_later("Hi", "Hello", ["a@example.com"])
+            raise RuntimeError
+
+        self.assertEqual(run_pending(threads=1), 0)
+        self.assertEqual(mail.outbox, [])
+
+    def test_failures_are_retried_with_backoff(self):
+        for n in range(4):
+            enqueue("flaky", {"n": n})
+        enqueue("flaky", {"n": 9}, delay=60)
+
+        self.assertEqual(run_pending(threads=1), 2)
+        self.assertEqual(self.calls, [[0, 1, 2, 3]])
+        retried = Task.objects.filter(status=Task.PENDING, attempts=1)
+        self.assertEqual(sorted(task.payload["n"] for task in retried), [0, 2])
+        self.assertGreater(retried[0].run_after, timezone.now() + timedelta(seconds=queue.BACKOFF - 5))
+        self.assertEqual(retried[0].last_error, "odd one out")
+
+        # Nothing is due until the backoff has passed.
+        self.assertEqual(run_pending(threads=1), 0)
+
+        for attempt in range(2, queue.MAX_ATTEMPTS + 1):
+            Task.objects.update(run_after=timezone.now())
+            run_pending(threads=1)
+        self.assertEqual(self.calls[-1], [0, 2])
+        self.assertEqual(Task.objects.filter(status=Task.FAILED).count(), 2)
+        self.assertEqual(queue.backoff(3), queue.BACKOFF * 4)
+
+    def test_unknown_kinds_are_refused(self):
+        with self.assertRaises(ValueError):
+            enqueue("nope", {})
+
+    def test_abandoned_claims_are_picked_up_again(self):
+        enqueue("flaky", {"n": 1})
+        Task.objects.update(status=Task.RUNNING, locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(run_pending(threads=1), 1)
+
+
+class ThreadedWorkerTest(TransactionTestCase):
+
+    def test_a_thread_pool_sends_every_email_once(self):
+        for n in range(30):
+            send_mail_later(f"Message {n}", "Hello", [f"user{n}@example.com"])
+
+        # Six batches of five across the pool.
+        self.addCleanup(setattr, queue.HANDLERS["email"], "batch_size", queue.HANDLERS["email"].batch_size)
+        queue.HANDLERS["email"].batch_size = 5
+        done = run_pending(limit=100, threads=4)
+
+        self.assertEqual(done, 30)
+        self.assertEqual(sorted(message.subject for message in mail.outbox), sorted(f"Message {n}" for n in range(30)))
+        self.assertFalse(Task.objects.exists())
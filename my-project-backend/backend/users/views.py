@@ -4,12 +4,13 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework import status
 from django.contrib.auth.models import User
 from .serializers import AdminUserSerializer
-from orders.models import Order
+from orders.listing import InvalidFilter, OrderPagination, admin_orders, filter_orders
 from orders.serializers import OrderSerializer
 
 
 class AdminUserListView(APIView):
     permission_classes = [IsAdminUser]
+    use_replica = True
 
     def get(self, request):
         users = User.objects.all().order_by("-id")
@@ -92,18 +93,24 @@ class AdminUserEditView(APIView):
 
 
 class AdminUserOrdersView(APIView):
+    """The user's orders, paged and filtered like the admin order listing."""
     permission_classes = [IsAdminUser]
+    pagination_class = OrderPagination
+    use_replica = True
 
     def get(self, request, user_id):
         try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
+            orders = filter_orders(admin_orders(detailed=False), request.query_params)
+        except InvalidFilter as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(orders.filter(user_id=user_id), request, view=self)
+        # Only an empty page needs the user looked up.
+        if not page and not User.objects.filter(id=user_id).exists():
             return Response(
                 {"detail": "User not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        orders = Order.objects.filter(user=user).order_by("-id")
-        serializer = OrderSerializer(orders, many=True)
-
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(OrderSerializer(page, many=True).data)
@@ -1,3 +1,103 @@
-from django.test import TestCase
+import base64
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from orders.models import Order, OrderItem
+from products.tests.test_search import make_product
+
+
+class AdminOrderListTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user("admin", password="x", is_staff=True)
+        self.alice = User.objects.create_user("alice", email="alice@example.com", password="x")
+        self.bob = User.objects.create_user("bob", email="bob@example.com", password="x")
+        self.laptop = make_product(name="Laptop")
+        self.client.force_authenticate(self.admin)
+
+    def make_order(self, user, total, day, status="PAID", payment_method="COD", lines=1):
+        order = Order.objects.create(
+            user=user, total_amount=total, payment_method=payment_method,
+            name="x", address="x", pincode="1", status=status,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.laptop, quantity=1, price=total) for _ in range(lines)
+        ])
+        created_at = datetime(2026, 1, day, 12, tzinfo=timezone.utc)
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        return order
+
+    def ids(self, response):
+        return [order["id"] for order in response.data["results"]]
+
+    def test_pages_take_two_queries_whatever_their_size(self):
+        for day in range(1, 21):
+            self.make_order(self.alice if day % 2 else self.bob, 100, day, lines=3)
+
+        for size in (5, 20):
+            with self.assertNumQueries(2):
+                response = self.client.get("/api/admin/orders/", {"page_size": size})
+            self.assertEqual(len(response.data["results"]), size)
+
+        first = response.data["results"][0]
+        self.assertEqual(first["userEmail"], "bob@example.com")
+        self.assertEqual(len(first["products"]), 3)
+        self.assertEqual(first["products"][0]["name"], "Laptop")
+
+    def test_cursor_walks_every_order_once(self):
+        orders = [self.make_order(self.alice, total, day) for day, total in enumerate((300, 100, 200, 100), 1)]
+
+        seen, url = [], "/api/admin/orders/?sort=total_asc&page_size=3"
+        while url:
+            response = self.client.get(url)
+            seen += self.ids(response)
+            url = response.data["next"]
+
+        self.assertEqual(seen, [orders[1].id, orders[3].id, orders[2].id, orders[0].id])
+
+    def test_tampered_cursor_values_are_rejected(self):
+        for sort in ("newest", "oldest", "total_desc", "total_asc"):
+            for value in ("abc", "NaN", [1]):
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps({"s": sort, "d": "n", "v": [value, 1]}).encode()
+                ).decode()
+                with self.subTest(sort=sort, value=value):
+                    response = self.client.get("/api/admin/orders/", {"sort": sort, "cursor": cursor})
+                    self.assertEqual(response.status_code, 404)
+
+    def test_filters(self):
+        cancelled = self.make_order(self.alice, 500, 3, status="CANCELLED")
+        card = self.make_order(self.bob, 900, 5, payment_method="CARD")
+        small = self.make_order(self.bob, 50, 7)
+
+        def listed(**params):
+            return self.ids(self.client.get("/api/admin/orders/", params))
+
+        self.assertEqual(listed(status="cancelled"), [cancelled.id])
+        self.assertEqual(listed(payment_method="CARD"), [card.id])
+        self.assertEqual(listed(user_id=self.bob.id), [small.id, card.id])
+        self.assertEqual(listed(min_total="100"), [card.id, cancelled.id])
+        self.assertEqual(listed(created_after="2026-01-04", created_before="2026-01-05"), [card.id])
+        self.assertEqual(listed(created_before="2026-01-05T11:00:00Z"), [cancelled.id])
+
+        response = self.client.get("/api/admin/orders/", {"created_after": "last tuesday"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_user_orders_are_paged_in_two_queries(self):
+        for day in range(1, 6):
+            self.make_order(self.alice, Decimal("10.50"), day, lines=2)
+        self.make_order(self.bob, 10, 6)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/admin/users/{self.alice.id}/orders/", {"page_size": 3})
+
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(len(response.data["results"][0]["items"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+        self.assertEqual(self.client.get("/api/admin/users/999999/orders/").status_code, 404)
@@ -1,46 +1,42 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework import status
+from account.authentication import CachedJWTAuthentication
 
+from orders.listing import InvalidFilter, OrderPagination, admin_orders, filter_orders
 from orders.models import Order
+from orders.serializers import AdminOrderSerializer
 
 class AdminOrdersView(APIView):
-    authentication_classes = [JWTAuthentication]
+    """
+    Keyset pages of orders, newest first, filtered by ``status``,
+    ``payment_method``, ``user_id``, ``min_total``, ``created_after`` and
+    ``created_before`` and sorted by ``sort``. Two queries per page.
+    """
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
+    pagination_class = OrderPagination
+    use_replica = True
 
     def get(self, request):
-        orders = Order.objects.prefetch_related("items__product", "user")
-
-        data = []
-        for order in orders:
-            data.append({
-                "id": order.id,
-                "userEmail": order.user.email,
-                "userId": order.user.id,
-                "status": order.status,
-                "products": [
-                    {
-                        "name": item.product.name,
-                        "price": item.price,
-                        "quantity": item.quantity,
-                    }
-                    for item in order.items.all()
-                ],
-                "total": order.total_amount,
-            })
+        try:
+            orders = filter_orders(admin_orders(), request.query_params)
+        except InvalidFilter as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(data)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(orders, request, view=self)
+        return paginator.get_paginated_response(AdminOrderSerializer(page, many=True).data)
 
 class AdminCancelOrderView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def patch(self, request, pk):
         try:
             order = Order.objects.get(pk=pk)
-            order.status = "CANCELLED"
-            order.save()
+            order.cancel()
             return Response({"message": "Order cancelled"})
         except Order.DoesNotExist:
             return Response({"error": "Order not found"}, status=404)
@@ -0,0 +1,89 @@
+"""
+Set-based wishlist changes: moving lines into the cart and adding, removing
+or toggling many products at once, each in one transaction with a fixed
+number of statements however many products are involved.
+"""
+
+from django.db import connection, transaction
+
+from account.session import invalidate_session
+from cart.batch import UnknownProducts
+from cart.models import CartItem
+from products.models import Product
+from .models import WishlistItem
+
+
+ADD = "add"
+REMOVE = "remove"
+TOGGLE = "toggle"
+
+
+def move_to_cart(user, product_ids=None):
+    """
+    Add one of each wishlisted product (or only of ``product_ids``) to the
+    cart, incrementing lines already there, and drop them from the
+    wishlist. Products that would go beyond their stock stay on the
+    wishlist. Returns the moved product ids.
+    """
+    qn = connection.ops.quote_name
+    cart = qn(CartItem._meta.db_table)
+    wishlist = qn(WishlistItem._meta.db_table)
+    product = qn(Product._meta.db_table)
+
+    selected = ""
+    params = [user.pk]
+    if product_ids is not None:
+        if not product_ids:
+            return []
+        selected = f"AND w.product_id IN ({', '.join(['%s'] * len(product_ids))})"
+        params.extend(product_ids)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {cart} (user_id, product_id, quantity) "
+                f"SELECT w.user_id, w.product_id, 1 FROM {wishlist} w "
+                f"JOIN {product} p ON p.id = w.product_id "
+                f"LEFT JOIN {cart} c ON c.user_id = w.user_id AND c.product_id = w.product_id "
+                f"WHERE w.user_id = %s {selected} AND p.quantity > COALESCE(c.quantity, 0) "
+                f"ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = {cart}.quantity + EXCLUDED.quantity "
+                f"RETURNING product_id",
+                params,
+            )
+            moved = sorted(row[0] for row in cursor.fetchall())
+        if moved:
+            WishlistItem.objects.filter(user=user, product_id__in=moved).delete()
+            invalidate_session(user.pk)
+    return moved
+
+
+def apply_bulk(user, action, product_ids):
+    """
+    Add, remove or toggle ``product_ids`` on the user's wishlist. Raises
+    ``UnknownProducts``, changing nothing, if any of them does not exist.
+    """
+    product_ids = set(product_ids)
+    known = set(Product.objects.filter(id__in=list(product_ids)).values_list("id", flat=True))
+    unknown = product_ids - known
+    if unknown:
+        raise UnknownProducts("Product not found", unknown)
+
+    with transaction.atomic():
+        items = WishlistItem.objects.filter(user=user)
+        if action == REMOVE:
+            removed, added = product_ids, set()
+        elif action == ADD:
+            removed, added = set(), product_ids
+        else:
+            removed = set(items.filter(product_id__in=list(product_ids)).values_list("product_id", flat=True))
+            added = product_ids - removed
+
+        if removed:
+            items.filter(product_id__in=list(removed)).delete()
+        if added:
+            WishlistItem.objects.bulk_create(
+                [WishlistItem(user=user, product_id=product_id) for product_id in sorted(added)],
+                ignore_conflicts=True,
+            )
+        invalidate_session(user.pk)
+
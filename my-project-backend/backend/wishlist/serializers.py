@@ -1,13 +1,46 @@
 from rest_framework import serializers
+from .bulk import ADD, REMOVE, TOGGLE
 from .models import WishlistItem
-from products.serializers import ProductSerializer
+from cart.serializers import stock_status
+from products.serializers import LINE_ITEM_FIELDS, ProductSerializer
 
 
 
 class WishlistItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer()
+    product = ProductSerializer(fields=LINE_ITEM_FIELDS)
+    stock_status = serializers.SerializerMethodField()
 
     class Meta:
         model = WishlistItem
         fields = "__all__"
 
+    def get_stock_status(self, obj):
+        return stock_status(1, obj.product.quantity)
+
+
+def wishlist_summary(items):
+    items = list(items)
+    return {
+        "items": WishlistItemSerializer(items, many=True).data,
+        "item_count": len(items),
+        "in_stock_count": sum(1 for item in items if item.product.quantity > 0),
+    }
+
+
+class WishlistMoveSerializer(serializers.Serializer):
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=100
+    )
+    all = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if attrs["all"] == ("product_ids" in attrs):
+            raise serializers.ValidationError("Give either product_ids or all: true")
+        return attrs
+
+
+class WishlistBulkSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=[ADD, REMOVE, TOGGLE])
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=100
+    )
@@ -1,3 +1,121 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from cart.models import CartItem
+from products.tests.test_search import make_product
+from wishlist.models import WishlistItem
 
-# Create your tests here.
+
+class WishlistViewTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.client.force_authenticate(self.user)
+
+    def test_query_count_does_not_grow_with_the_wishlist(self):
+        for count in (1, 25):
+            WishlistItem.objects.filter(user=self.user).delete()
+            WishlistItem.objects.bulk_create([
+                WishlistItem(user=self.user, product=make_product(name=f"Laptop {i}", quantity=i % 2))
+                for i in range(count)
+            ])
+
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/wishlist/")
+            self.assertEqual(response.data["item_count"], count)
+            self.assertEqual(response.data["in_stock_count"], count // 2)
+
+    def test_lines_carry_their_stock_status(self):
+        WishlistItem.objects.create(user=self.user, product=make_product(name="Laptop", quantity=3))
+        WishlistItem.objects.create(user=self.user, product=make_product(name="Mouse", quantity=0))
+
+        response = self.client.get("/api/wishlist/")
+
+        self.assertEqual(
+            [line["stock_status"] for line in response.data["items"]], ["in_stock", "out_of_stock"]
+        )
+
+
+class WishlistBulkTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("buyer", password="x")
+        self.client.force_authenticate(self.user)
+        self.laptop = make_product(name="Laptop", quantity=5)
+        self.mouse = make_product(name="Mouse", quantity=1)
+        self.bag = make_product(name="Bag", quantity=0)
+        for product in (self.laptop, self.mouse, self.bag):
+            WishlistItem.objects.create(user=self.user, product=product)
+
+    def wishlisted(self):
+        return set(WishlistItem.objects.filter(user=self.user).values_list("product_id", flat=True))
+
+    def cart(self):
+        return dict(CartItem.objects.filter(user=self.user).values_list("product_id", "quantity"))
+
+    def test_move_all_to_cart(self):
+        CartItem.objects.create(user=self.user, product=self.laptop, quantity=2)
+        CartItem.objects.create(user=self.user, product=self.mouse, quantity=1)
+
+        response = self.client.post("/api/wishlist/move-to-cart/", {"all": True}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["moved"], [self.laptop.id])
+        # The mouse is already in the cart up to its stock, the bag has none.
+        self.assertEqual(response.data["skipped"], [self.mouse.id, self.bag.id])
+        self.assertEqual(self.cart(), {self.laptop.id: 3, self.mouse.id: 1})
+        self.assertEqual(self.wishlisted(), {self.mouse.id, self.bag.id})
+        self.assertEqual(response.data["wishlist"]["item_count"], 2)
+
+    def test_move_selected_to_cart(self):
+        response = self.client.post(
+            "/api/wishlist/move-to-cart/", {"product_ids": [self.mouse.id]}, format="json"
+        )
+
+        self.assertEqual((response.data["moved"], response.data["skipped"]), ([self.mouse.id], []))
+        self.assertEqual(self.cart(), {self.mouse.id: 1})
+        self.assertEqual(self.wishlisted(), {self.laptop.id, self.bag.id})
+
+    def test_move_runs_a_fixed_number_of_queries(self):
+        extra = [make_product(name=f"Laptop {i}") for i in range(20)]
+        WishlistItem.objects.bulk_create([WishlistItem(user=self.user, product=product) for product in extra])
+
+        # Transaction, INSERT ... SELECT, DELETE, then reading the wishlist back.
+        with self.assertNumQueries(5):
+            response = self.client.post("/api/wishlist/move-to-cart/", {"all": True}, format="json")
+
+        self.assertEqual(len(response.data["moved"]), 22)
+
+    def test_move_needs_ids_or_all(self):
+        for body in ({}, {"all": True, "product_ids": [self.laptop.id]}):
+            response = self.client.post("/api/wishlist/move-to-cart/", body, format="json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_bulk_actions(self):
+        other = make_product(name="Monitor")
+
+        self.client.post(
+            "/api/wishlist/bulk/", {"action": "toggle", "product_ids": [self.laptop.id, other.id]}, format="json"
+        )
+        self.assertEqual(self.wishlisted(), {self.mouse.id, self.bag.id, other.id})
+
+        self.client.post(
+            "/api/wishlist/bulk/", {"action": "add", "product_ids": [self.laptop.id, other.id]}, format="json"
+        )
+        self.assertEqual(self.wishlisted(), {self.laptop.id, self.mouse.id, self.bag.id, other.id})
+
+        response = self.client.post(
+            "/api/wishlist/bulk/", {"action": "remove", "product_ids": [self.mouse.id, self.bag.id]}, format="json"
+        )
+        self.assertEqual(self.wishlisted(), {self.laptop.id, other.id})
+        self.assertEqual(response.data["item_count"], 2)
+
+    def test_bulk_with_unknown_products_changes_nothing(self):
+        response = self.client.post(
+            "/api/wishlist/bulk/", {"action": "remove", "product_ids": [self.laptop.id, 999999]}, format="json"
+        )
+
+        self.assertEqual((response.status_code, response.data["product_ids"]), (404, [999999]))
+        self.assertEqual(len(self.wishlisted()), 3)
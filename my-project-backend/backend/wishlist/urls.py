@@ -1,8 +1,12 @@
 from django.urls import path
-from .views import WishlistView, WishlistToggleView, WishlistRemoveView
+from .views import (
+    WishlistBulkView, WishlistMoveToCartView, WishlistRemoveView, WishlistToggleView, WishlistView,
+)
 
 urlpatterns = [
     path("", WishlistView.as_view()),
     path("toggle/", WishlistToggleView.as_view()),
     path("remove/", WishlistRemoveView.as_view()),
-]
\ No newline at end of file
+    path("move-to-cart/", WishlistMoveToCartView.as_view()),
+    path("bulk/", WishlistBulkView.as_view()),
+]
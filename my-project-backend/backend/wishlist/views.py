@@ -3,24 +3,34 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from account.session import invalidate_session
+from idempotency.keys import idempotent
+from cart.batch import UnknownProducts
+from .bulk import apply_bulk, move_to_cart
 from .models import WishlistItem
-from .serializers import WishlistItemSerializer
-from products.models import Product
+from .serializers import WishlistBulkSerializer, WishlistMoveSerializer, wishlist_summary
+from products.lookup import product_lookup
+from products.serializers import LINE_ITEM_FIELDS, product_columns
+
+
+def wishlist_lines(user):
+    return (
+        WishlistItem.objects.filter(user=user)
+        .select_related("product")
+        .only(
+            "id", "user",
+            *[f"product__{column}" for column in product_columns(LINE_ITEM_FIELDS)],
+        )
+        .order_by("id")
+    )
 
 
 class WishlistView(APIView):
     permission_classes = [IsAuthenticated]
+    use_replica = True
 
     def get(self, request):
-        try:
-            items = WishlistItem.objects.filter(user=request.user)
-            serializer = WishlistItemSerializer(items, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Exception:
-            return Response(
-                {"error": "Failed to fetch wishlist items"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response(wishlist_summary(wishlist_lines(request.user)), status=status.HTTP_200_OK)
 
 
 class WishlistToggleView(APIView):
@@ -36,9 +46,8 @@ class WishlistToggleView(APIView):
             )
 
         
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        product = product_lookup.get(product_id)
+        if product is None:
             return Response(
                 {"error": "Product not found"},
                 status=status.HTTP_404_NOT_FOUND
@@ -50,6 +59,7 @@ class WishlistToggleView(APIView):
                 user=request.user,
                 product=product,
             )
+            invalidate_session(request.user.pk)
 
             if not created:
                 wishlist_item.delete()
@@ -83,9 +93,8 @@ class WishlistRemoveView(APIView):
             )
 
         
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        product = product_lookup.get(product_id)
+        if product is None:
             return Response(
                 {"error": "Product not found"},
                 status=status.HTTP_404_NOT_FOUND
@@ -103,6 +112,7 @@ class WishlistRemoveView(APIView):
                     {"error": "Item not found in wishlist"},
                     status=status.HTTP_404_NOT_FOUND
                 )
+            invalidate_session(request.user.pk)
 
             return Response(
                 {"message": "Removed from wishlist successfully"},
@@ -114,3 +124,46 @@ class WishlistRemoveView(APIView):
                 {"error": "Failed to remove item from wishlist"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class WishlistMoveToCartView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @idempotent
+    def post(self, request):
+        serializer = WishlistMoveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        requested = serializer.validated_data.get("product_ids")
+        moved = move_to_cart(request.user, requested)
+
+        items = list(wishlist_lines(request.user))
+        # Whatever was asked for and is still on the wishlist had no stock.
+        skipped = [
+            item.product_id for item in items
+            if requested is None or item.product_id in requested
+        ]
+        return Response(
+            {"moved": moved, "skipped": skipped, "wishlist": wishlist_summary(items)},
+            status=status.HTTP_200_OK
+        )
+
+
+class WishlistBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = WishlistBulkSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            apply_bulk(request.user, **serializer.validated_data)
+        except UnknownProducts as exc:
+            return Response(
+                {"error": str(exc), "product_ids": exc.product_ids},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(wishlist_summary(wishlist_lines(request.user)), status=status.HTTP_200_OK)
@@ -9,6 +9,7 @@ import api from "../api/axios";
 function Cart() {
   const navigate = useNavigate();
   const [cart, setCart] = useState([]);
+  const [summary, setSummary] = useState({ subtotal: 0, item_count: 0, in_stock: true });
 
   useEffect(() => {
     if (!localStorage.getItem("access")) {
@@ -18,21 +19,25 @@ function Cart() {
     fetchCart();
   }, [navigate]);
 
+  const showCart = ({ items, subtotal, item_count, in_stock }) => {
+    const cartFixed = items.map((item) => ({
+      ...item,
+      product: {
+        ...item.product,
+        image: item.product.image
+          ? `https://backend-api-s44j.onrender.com${item.product.image}`
+          : "https://via.placeholder.com/250x200",
+      },
+    }));
+
+    setCart(cartFixed);
+    setSummary({ subtotal, item_count, in_stock });
+  };
+
   const fetchCart = async () => {
     try {
       const res = await api.get("/cart/");
-
-      const cartFixed = res.data.map((item) => ({
-        ...item,
-        product: {
-          ...item.product,
-          image: item.product.image
-            ? `https://backend-api-s44j.onrender.com${item.product.image}`
-            : "https://via.placeholder.com/250x200",
-        },
-      }));
-
-      setCart(cartFixed);
+      showCart(res.data);
     } catch {
       Swal.fire("Error", "Failed to load cart", "error");
     }
@@ -40,10 +45,12 @@ function Cart() {
 
   const updateQuantity = async (productId, delta) => {
   try {
-    await api.post("/cart/add/", { product_id: productId, quantity: delta });
-    fetchCart();
-  } catch {
-    Swal.fire("Error", "Failed to update quantity", "error");
+    const res = await api.post("/cart/batch/", {
+      operations: [{ product_id: productId, delta }],
+    });
+    showCart(res.data);
+  } catch (error) {
+    Swal.fire("Error", error.response?.data?.error || "Failed to update quantity", "error");
   }
 };
 const handleRemove = async (productId, name) => {
@@ -137,8 +144,14 @@ const handleRemove = async (productId, name) => {
                     </div>
 
                     <p className="prodect-price">
-                      <b>₹{(item.product.price * item.quantity).toLocaleString()}</b>
+                      <b>₹{item.line_total.toLocaleString()}</b>
                     </p>
+                    {item.stock_status === "out_of_stock" && (
+                      <p className="prodect-p">Out of stock</p>
+                    )}
+                    {item.stock_status === "insufficient_stock" && (
+                      <p className="prodect-p">Not enough stock for this quantity</p>
+                    )}
 
                     <button
                       onClick={() => handleRemove(item.product.id, item.product.name)}
@@ -152,8 +165,15 @@ const handleRemove = async (productId, name) => {
             </div>
           )}
 
+          {cart.length > 0 && (
+            <h2 className="prodect-price">
+              Subtotal ({summary.item_count} items): ₹{summary.subtotal.toLocaleString()}
+            </h2>
+          )}
+
           {cart.length > 0 && (
             <motion.button
+              disabled={!summary.in_stock}
               whileHover={{ scale: 1.05 }}
               whileTap={{ scale: 0.9 }}
               onClick={handleBuyNow}
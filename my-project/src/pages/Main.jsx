@@ -22,7 +22,6 @@ function Main() {
     if (storedUser) {
       setUser(JSON.parse(storedUser));
       fetchCounts();
-      fetchWishlist();
     }
 
     fetchProducts();
@@ -32,8 +31,8 @@ function Main() {
 
   const fetchProducts = async () => {
     try {
-      const res = await api.get("/products/");
-      const data = res.data.map((p) => ({
+      const res = await api.get("/products/", { params: { page_size: 12, fields: "id,name,brand,price,rating,image,specs" } });
+      const data = res.data.results.map((p) => ({
         ...p,
         image: p.image
           ? `https://backend-api-s44j.onrender.com${p.image}`
@@ -46,27 +45,17 @@ function Main() {
   };
 
 
-  const fetchWishlist = async () => {
-    try {
-      const res = await api.get("/wishlist/");
-      const data = res.data;
-      setWishlist(data.map((item) => item.product.id));
-    } catch {
-      setWishlist([]);
-    }
-  };
-
-
   const fetchCounts = async () => {
     try {
-      const cartRes = await api.get("/cart/");
-      const wishlistRes = await api.get("/wishlist/");
+      const res = await api.get("/session/bootstrap/");
 
-      setCartCount(cartRes.data.length);
-      setWishlistCount(wishlistRes.data.length);
+      setCartCount(res.data.counts.cart_lines);
+      setWishlistCount(res.data.counts.wishlist);
+      setWishlist(res.data.wishlist);
     } catch {
       setCartCount(0);
       setWishlistCount(0);
+      setWishlist([]);
     }
   };
 
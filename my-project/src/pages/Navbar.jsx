@@ -10,7 +10,7 @@ function Navbar({ cartLength, wishlistLength, onLogout }) {
   const [searchQuery, setSearchQuery] = useState("");
   const dropdownRef = useRef(null);
   const [suggestions, setSuggestions] = useState([]);
-  const [allProducts, setAllProducts] = useState([]);
+  const latestQuery = useRef("");
   const [showSuggestions, setShowSuggestions] = useState(false);
 
   // ✅ Read user safely from localStorage
@@ -69,22 +69,10 @@ function Navbar({ cartLength, wishlistLength, onLogout }) {
     return () => document.removeEventListener("mousedown", handleClickOutside);
   }, []);
 
-  useEffect(() => {
-    const loadProducts = async () => {
-      try {
-        const res = await api.get("/products/");
-        setAllProducts(res.data);
-      } catch {
-        setAllProducts([]);
-      }
-    };
-
-    loadProducts();
-  }, []);
-
-  const handleSearchChange = (e) => {
+  const handleSearchChange = async (e) => {
     const value = e.target.value;
     setSearchQuery(value);
+    latestQuery.current = value;
 
     if (!value.trim()) {
       setSuggestions([]);
@@ -92,20 +80,15 @@ function Navbar({ cartLength, wishlistLength, onLogout }) {
       return;
     }
 
-    const filtered = allProducts.filter((p) => {
-      const categoryText = Array.isArray(p.category)
-        ? p.category.join(" ")
-        : p.category;
-
-      return (
-        p.name.toLowerCase().includes(value.toLowerCase()) ||
-        p.brand.toLowerCase().includes(value.toLowerCase()) ||
-        categoryText.toLowerCase().includes(value.toLowerCase())
-      );
-    });
-
-    setSuggestions(filtered.slice(0, 5));
-    setShowSuggestions(true);
+    try {
+      const res = await api.get("/products/suggest/", { params: { q: value } });
+      // Ignore responses for keystrokes that have since been superseded
+      if (latestQuery.current !== value) return;
+      setSuggestions(res.data);
+      setShowSuggestions(true);
+    } catch {
+      setSuggestions([]);
+    }
   };
 
   const handleLogout = () => {
@@ -17,6 +17,8 @@ function Payment() {
   const [pincode, setPincode] = useState("");
   const [paymentMethod, setPaymentMethod] = useState("");
   const [loading, setLoading] = useState(false);
+  // One key per checkout, so a retried submit cannot place a second order.
+  const [idempotencyKey] = useState(() => crypto.randomUUID());
 
   useEffect(() => {
     const loggedUser = JSON.parse(localStorage.getItem("user"));
@@ -27,7 +29,9 @@ function Payment() {
     setUser(loggedUser);
   }, [navigate]);
 
-  const productsToPay = product ? [product] : cart || [];
+  const productsToPay = product
+    ? [product]
+    : (cart || []).map((item) => ({ ...item.product, quantity: item.quantity }));
 
   const totalAmount = productsToPay.reduce(
     (sum, item) => sum + item.price * (item.quantity || 1),
@@ -59,8 +63,8 @@ function Payment() {
     setLoading(true);
 
     
+    // Prices and the total are worked out by the server.
     const orderPayload = {
-      total_amount: totalAmount,
       payment_method: paymentMethod,
       name,
       address,
@@ -68,7 +72,6 @@ function Payment() {
       items: productsToPay.map((item) => ({
         product: Number(item.id), 
         quantity: Number(item.quantity || 1),
-        price: Number(item.price),
       })),
     };
 
@@ -77,7 +80,7 @@ function Payment() {
 
      
       const response = await api.post("/orders/create/", orderPayload, {
-        headers: { Authorization: `Bearer ${token}` },
+        headers: { Authorization: `Bearer ${token}`, "Idempotency-Key": idempotencyKey },
       });
 
       
@@ -89,7 +92,7 @@ function Payment() {
             .map((item) => `- ${item.name} (Qty: ${item.quantity || 1})`)
             .join("<br>")}
           <br><br>
-          <strong>Total:</strong> ₹${totalAmount.toLocaleString()}<br><br>
+          <strong>Total:</strong> ₹${Number(response.data.total_amount).toLocaleString()}<br><br>
           <strong>Shipping to:</strong><br>
           ${name}<br>
           ${address}, ${pincode}<br><br>
@@ -57,16 +57,12 @@ function ProductInspection() {
   const fetchCounts = async () => {
     try {
       const token = localStorage.getItem("access");
-      const cartRes = await api.get("cart/", {
+      const res = await api.get("session/bootstrap/", {
         headers: { Authorization: `Bearer ${token}` },
       });
 
-      const wishlistRes = await api.get("wishlist/", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-
-      setCartCount(cartRes.data.length);
-      setWishlistCount(wishlistRes.data.length);
+      setCartCount(res.data.counts.cart_lines);
+      setWishlistCount(res.data.counts.wishlist);
     } catch {
       setCartCount(0);
       setWishlistCount(0);
@@ -75,11 +71,8 @@ function ProductInspection() {
 
   const fetchSimilarProducts = async () => {
     try {
-      const res = await api.get("products/");
-      // Filter out current product and take first 4
+      const res = await api.get(`products/${id}/similar/`, { params: { limit: 4 } });
       const filtered = res.data
-        .filter(p => p.id !== Number(id))
-        .slice(0, 4)
         .map(p => ({
           ...p,
           image: p.image ? `https://backend-api-s44j.onrender.com${p.image}` : `https://via.placeholder.com/250x200?text=${encodeURIComponent(p.name)}`
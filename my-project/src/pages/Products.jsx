@@ -8,6 +8,8 @@ import "./Register.css";
 
 function Products() {
   const [products, setProducts] = useState([]);
+  const [next, setNext] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [user, setUser] = useState(null);
   const [cartCount, setCartCount] = useState(0);
   const [wishlistCount, setWishlistCount] = useState(0);
@@ -36,32 +38,52 @@ function Products() {
       setLoading(true);
 
    
-      const res = await api.get(`products/?search=${searchQuery}`);
+      const res = await api.get("products/", {
+        params: {
+          search: searchQuery,
+          fields: "id,name,brand,price,rating,image,in_stock,specs,category",
+        },
+      });
       console.log("PRODUCT API RESPONSE 👉", res.data);
 
-      setProducts(Array.isArray(res.data) ? res.data : []);
+      setProducts(Array.isArray(res.data.results) ? res.data.results : []);
+      setNext(res.data.next || null);
     } catch (err) {
       console.error(err);
       Swal.fire("Error", "Failed to load products", "error");
       setProducts([]);
+      setNext(null);
     } finally {
       setLoading(false);
     }
   };
 
 
+  const loadMore = async () => {
+    if (!next || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const res = await api.get(next);
+      setProducts((prev) => [...prev, ...(res.data.results || [])]);
+      setNext(res.data.next || null);
+    } catch (err) {
+      console.error(err);
+      Swal.fire("Error", "Failed to load more products", "error");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+
   const fetchCounts = async () => {
     try {
       const token = localStorage.getItem("access");
       if (!token) return;
 
-      const [cartRes, wishlistRes] = await Promise.all([
-        api.get("cart/"),
-        api.get("wishlist/"),
-      ]);
+      const res = await api.get("session/bootstrap/");
 
-      setCartCount(cartRes.data.length || 0);
-      setWishlistCount(wishlistRes.data.length || 0);
+      setCartCount(res.data.counts.cart_lines || 0);
+      setWishlistCount(res.data.counts.wishlist || 0);
     } catch {
       setCartCount(0);
       setWishlistCount(0);
@@ -262,6 +284,14 @@ function Products() {
           ))}
         </>
       )}
+
+      {!loading && next && (
+        <div style={{ textAlign: "center", marginTop: 40 }}>
+          <button onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </motion.div>
   );
 }
@@ -22,21 +22,24 @@ function Wishlist() {
     fetchCartCount();
   }, [navigate]);
 
+  const showWishlist = (items) => {
+    const wishlistFixed = items.map((item) => ({
+      ...item,
+      product: {
+        ...item.product,
+        image: item.product.image
+          ? `https://backend-api-s44j.onrender.com${item.product.image}`
+          : "https://via.placeholder.com/250x200",
+      },
+    }));
+
+    setWishlist(wishlistFixed);
+  };
+
   const fetchWishlist = async () => {
     try {
       const res = await api.get("/wishlist/");
-
-      const wishlistFixed = res.data.map((item) => ({
-        ...item,
-        product: {
-          ...item.product,
-          image: item.product.image
-            ? `https://backend-api-s44j.onrender.com${item.product.image}`
-            : "https://via.placeholder.com/250x200",
-        },
-      }));
-
-      setWishlist(wishlistFixed);
+      showWishlist(res.data.items);
     } catch {
       Swal.fire("Error", "Failed to load wishlist", "error");
     }
@@ -44,26 +47,31 @@ function Wishlist() {
 
   const fetchCartCount = async () => {
     try {
-      const res = await api.get("/cart/");
-      setCartCount(res.data.length);
+      const res = await api.get("/session/bootstrap/");
+      setCartCount(res.data.counts.cart_lines);
     } catch {
       setCartCount(0);
     }
   };
 
+  const moveToCart = async (body) => {
+    const res = await api.post("/wishlist/move-to-cart/", body);
+    showWishlist(res.data.wishlist.items);
+    fetchCartCount();
+    return res.data;
+  };
+
   const handleAddToCart = async (productId, productName) => {
     if (loading) return;
     setLoading(true);
 
     try {
-      // Add to cart
-      await api.post("/cart/add/", { product_id: productId, quantity: 1 });
-
-      // Remove from wishlist
-      await api.post("/wishlist/remove/", { product_id: productId });
+      const { moved } = await moveToCart({ product_ids: [productId] });
 
-      await fetchWishlist();
-      await fetchCartCount();
+      if (moved.length === 0) {
+        Swal.fire("Out of stock", `No more ${productName} left in stock.`, "warning");
+        return;
+      }
 
       Swal.fire({
         title: "Added to Cart!",
@@ -78,6 +86,26 @@ function Wishlist() {
     }
   };
 
+  const handleMoveAll = async () => {
+    if (loading) return;
+    setLoading(true);
+
+    try {
+      const { moved, skipped } = await moveToCart({ all: true });
+      Swal.fire(
+        "Moved to Cart!",
+        skipped.length
+          ? `${moved.length} moved, ${skipped.length} out of stock.`
+          : `${moved.length} items moved to cart.`,
+        "success"
+      );
+    } catch {
+      Swal.fire("Error", "Failed to move items to cart", "error");
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const handleRemove = async (productId, productName) => {
     const confirm = await Swal.fire({
       title: "Remove from Wishlist?",
@@ -149,6 +177,9 @@ function Wishlist() {
                     <p className="prodect-price">
                       <b>₹{item.product.price.toLocaleString()}</b>
                     </p>
+                    {item.stock_status === "out_of_stock" && (
+                      <p className="prodect-p">Out of stock</p>
+                    )}
 
                     <div className="cart-buttons">
                       <button
@@ -177,6 +208,19 @@ function Wishlist() {
             </div>
           )}
 
+          {wishlist.length > 0 && (
+            <motion.button
+              whileHover={{ scale: 1.05 }}
+              whileTap={{ scale: 0.9 }}
+              disabled={loading}
+              onClick={handleMoveAll}
+              className="back-to-home"
+              style={{ marginTop: "20px" }}
+            >
+              Move All to Cart
+            </motion.button>
+          )}
+
           <motion.button
             whileHover={{ scale: 1.05 }}
             whileTap={{ scale: 0.9 }}
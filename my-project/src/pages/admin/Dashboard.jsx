@@ -1,43 +1,37 @@
 import React, { useEffect, useState } from "react";
 import { motion } from "framer-motion";
 import api from "../../api/axios";
-import { PieChart, Pie, Cell, BarChart, Bar, XAxis, YAxis, Tooltip, ResponsiveContainer } from "recharts";
+import {
+  PieChart, Pie, Cell, BarChart, Bar, LineChart, Line, XAxis, YAxis, Tooltip, ResponsiveContainer,
+} from "recharts";
 
 const Dashboard = () => {
-  const [orders, setOrders] = useState([]);
-  const [users, setUsers] = useState([]);
-  const [products, setProducts] = useState([]);
+  const [analytics, setAnalytics] = useState(null);
+  const [bucket, setBucket] = useState("day");
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const { data } = await api.get("admin/dashboard/");
-
-        setUsers(data.users);
-        setProducts(data.products);
-        setOrders(data.orders);
-
+        const { data } = await api.get("admin/analytics/", { params: { bucket } });
+        setAnalytics(data);
       } catch (error) {
         console.error("Admin dashboard error:", error);
       }
     };
 
     fetchData();
-  }, []);
-
-  const totalRevenue = orders.reduce(
-    (sum, order) => sum + order.products.reduce((oSum, p) => oSum + p.price * (p.quantity || 1), 0),
-    0
-  );
+  }, [bucket]);
 
   const COLORS = ["#0088FE", "#00C49F", "#FFBB28", "#FF8042", "#AA00FF", "#FF00CC"];
-  const salesData = products.map(p => ({
-    name: p.name,
-    sales: orders.reduce((sum, o) => {
-      const match = o.products.find(pr => pr.id === p.id);
-      return sum + (match ? match.quantity || 0 : 0);
-    }, 0),
-  }));
+  const salesData = analytics
+    ? analytics.top_products.map((p) => ({ name: p.name, sales: p.units }))
+    : [];
+  const distributionData = analytics && analytics.other_products.units > 0
+    ? [...salesData, { name: "Other products", sales: analytics.other_products.units }]
+    : salesData;
+  const revenueData = analytics
+    ? analytics.revenue_over_time.series.map((row) => ({ ...row, revenue: Number(row.revenue) }))
+    : [];
 
   const cardVariants = {
     hidden: { opacity: 0, y: 20 },
@@ -50,9 +44,9 @@ const Dashboard = () => {
 
       <div className="dashboard-metrics">
         {[
-          { label: "Total Revenue", value: `₹${totalRevenue.toLocaleString()}` },
-          { label: "Total Orders", value: orders.length },
-          { label: "Total Users", value: users.length },
+          { label: "Revenue (period)", value: `₹${Number(analytics?.revenue || 0).toLocaleString()}` },
+          { label: "Orders (period)", value: analytics?.orders ?? 0 },
+          { label: "Total Users", value: analytics?.users ?? 0 },
         ].map((metric, i) => (
           <motion.div
             key={metric.label}
@@ -78,8 +72,8 @@ const Dashboard = () => {
           <h3>Sales Distribution</h3>
           <ResponsiveContainer width="100%" height={300}>
             <PieChart>
-              <Pie data={salesData} dataKey="sales" cx="50%" cy="50%" outerRadius={100}>
-                {salesData.map((_, i) => (
+              <Pie data={distributionData} dataKey="sales" cx="50%" cy="50%" outerRadius={100}>
+                {distributionData.map((_, i) => (
                   <Cell key={i} fill={COLORS[i % COLORS.length]} />
                 ))}
               </Pie>
@@ -104,6 +98,28 @@ const Dashboard = () => {
             </BarChart>
           </ResponsiveContainer>
         </motion.div>
+
+        <motion.div
+          className="chart-card"
+          initial={{ opacity: 0, y: 20 }}
+          animate={{ opacity: 1, y: 0 }}
+          transition={{ delay: 0.4, duration: 0.5 }}
+        >
+          <h3>Revenue Over Time</h3>
+          <select value={bucket} onChange={(e) => setBucket(e.target.value)}>
+            <option value="day">Daily (30 days)</option>
+            <option value="week">Weekly (26 weeks)</option>
+            <option value="month">Monthly (12 months)</option>
+          </select>
+          <ResponsiveContainer width="100%" height={300}>
+            <LineChart data={revenueData}>
+              <XAxis dataKey="period" tick={{ fontSize: 12 }} />
+              <YAxis />
+              <Tooltip />
+              <Line type="monotone" dataKey="revenue" stroke="#00C49F" />
+            </LineChart>
+          </ResponsiveContainer>
+        </motion.div>
       </div>
     </motion.div>
   );
@@ -3,21 +3,49 @@ import Swal from "sweetalert2";
 import { motion, AnimatePresence } from "framer-motion";
 import api from "../../api/axios";
 
+const emptyFilters = {
+  status: "",
+  payment_method: "",
+  created_after: "",
+  created_before: "",
+  min_total: "",
+  sort: "newest",
+};
+
 const Orders = () => {
   const [orders, setOrders] = useState([]);
+  const [next, setNext] = useState(null);
+  const [filters, setFilters] = useState(emptyFilters);
 
   useEffect(() => {
     const fetchOrders = async () => {
+      const params = Object.fromEntries(
+        Object.entries(filters).filter(([, value]) => value !== "")
+      );
       try {
-        const { data } = await api.get("admin/orders/");
-        setOrders(data);
+        const { data } = await api.get("admin/orders/", { params });
+        setOrders(data.results);
+        setNext(data.next);
       } catch (error) {
         console.error("Error fetching orders:", error);
       }
     };
 
     fetchOrders();
-  }, []);
+  }, [filters]);
+
+  const loadMore = async () => {
+    try {
+      const { data } = await api.get(next);
+      setOrders((prev) => [...prev, ...data.results]);
+      setNext(data.next);
+    } catch (error) {
+      console.error("Error fetching orders:", error);
+    }
+  };
+
+  const setFilter = (name) => (e) =>
+    setFilters((prev) => ({ ...prev, [name]: e.target.value }));
 
   const handleCancelOrder = async (orderId) => {
     const confirm = await Swal.fire({
@@ -115,6 +143,23 @@ const handleDeleteOrder = async (orderId) => {
   return (
     <div className="admin-table-section">
       <h1 style={{display:"flex" ,justifyContent:"center", paddingBottom:"20px"}}>Orders</h1>
+      <div style={{ display: "flex", gap: "8px", flexWrap: "wrap", paddingBottom: "20px" }}>
+        <select value={filters.status} onChange={setFilter("status")}>
+          <option value="">All statuses</option>
+          <option value="PAID">Paid</option>
+          <option value="CANCELLED">Cancelled</option>
+        </select>
+        <input placeholder="Payment method" value={filters.payment_method} onChange={setFilter("payment_method")} />
+        <input type="date" value={filters.created_after} onChange={setFilter("created_after")} />
+        <input type="date" value={filters.created_before} onChange={setFilter("created_before")} />
+        <input type="number" placeholder="Min total" value={filters.min_total} onChange={setFilter("min_total")} />
+        <select value={filters.sort} onChange={setFilter("sort")}>
+          <option value="newest">Newest</option>
+          <option value="oldest">Oldest</option>
+          <option value="total_desc">Highest total</option>
+          <option value="total_asc">Lowest total</option>
+        </select>
+      </div>
       {orders.length === 0 ? (
         <p>No orders found.</p>
       ) : (
@@ -147,12 +192,7 @@ const handleDeleteOrder = async (orderId) => {
                       </div>
                     ))}
                   </td>
-                  <td>
-                    ₹
-                    {o.products
-                      .reduce((sum, p) => sum + p.price * p.quantity, 0)
-                      .toLocaleString()}
-                  </td>
+                  <td>₹{Number(o.total_amount).toLocaleString()}</td>
 
 
 
@@ -202,6 +242,11 @@ const handleDeleteOrder = async (orderId) => {
           </tbody>
         </table>
       )}
+      {next && (
+        <button onClick={loadMore} style={{ marginTop: "20px" }}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };
@@ -6,6 +6,7 @@ import "../Register.css";
 
 const Products = () => {
   const [products, setProducts] = useState([]);
+  const [next, setNext] = useState(null);
   const [newProduct, setNewProduct] = useState({
     name: "",
     price: 0,
@@ -26,8 +27,19 @@ const Products = () => {
 
   const fetchProducts = async () => {
     try {
-      const { data } = await api.get("products/");
-      setProducts(data);
+      const { data } = await api.get("products/admin/", { params: { page_size: 100 } });
+      setProducts(data.results);
+      setNext(data.next);
+    } catch (error) {
+      Swal.fire("Error", "Failed to load products.", "error");
+    }
+  };
+
+  const loadMore = async () => {
+    try {
+      const { data } = await api.get(next);
+      setProducts((prev) => [...prev, ...data.results]);
+      setNext(data.next);
     } catch (error) {
       Swal.fire("Error", "Failed to load products.", "error");
     }
@@ -253,6 +265,16 @@ const Products = () => {
           </tbody>
         </table>
       </div>
+      {next && (
+        <div className="flex justify-center pt-6">
+          <button 
+            onClick={loadMore} 
+            className="bg-gradient-to-r from-[#4a3aff] to-[#9a3aff] hover:from-[#5a4aff] hover:to-[#aa4aff] text-white font-bold py-3 px-8 rounded-xl transition-all duration-300 hover:scale-[1.02] hover:shadow-lg hover:shadow-[#7a3aff]/20"
+          >
+            Load more
+          </button>
+        </div>
+      )}
     </motion.div>
   );
 };
@@ -99,7 +99,7 @@ const Users = () => {
     try {
       const response = await api.get(`admin/users/${userId}/orders/`);
 
-      const orders = response.data;
+      const orders = response.data.results;
 
       if (orders.length === 0) {
         Swal.fire("No Orders", "This user has no orders.", "info");